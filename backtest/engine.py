@@ -0,0 +1,135 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config.config import BREAKOUT_PERIODS, MA_PERIODS, VOLUME_PERIOD
+from utils.panel import build_panel, compute_indicators, rolling_mean
+from utils.rules import Rule, compile_rules, evaluate_mask
+
+DEFAULT_HORIZONS = (1, 4, 16)
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Return from each bar's close to the close `horizon` bars later; NaN where that bar does not exist yet.
+    """
+    result = np.full(close.shape, np.nan)
+    if horizon < close.shape[-1]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[..., :-horizon] = close[..., horizon:] / close[..., :-horizon] - 1
+    return result
+
+
+def features_from_panel(panel: Dict[str, np.ndarray], indicators: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Merge OHLCV and indicator arrays into the features mapping the rules evaluate.
+    """
+    features = {field: values for field, values in panel.items() if field not in ('symbols', 'Date')}
+    features.update(indicators)
+    return features
+
+
+def summarize(features: Dict[str, np.ndarray], rules: List[Rule],
+              horizons: Sequence[int] = DEFAULT_HORIZONS) -> pd.DataFrame:
+    """
+    Evaluate every rule on every bar and report the forward returns that followed.
+
+    Indicators at a bar only use that bar and earlier ones, and the signal is
+    assumed to be acted on at that bar's close, so there is no lookahead.
+    Returns are signed by the rule's direction, so a bearish signal followed by
+    a fall counts as a positive return and a hit.
+
+    :param features: dict - (symbols x bars) arrays from `features_from_panel`.
+    :param rules: List[Rule] - Rules from `utils.rules.compile_rules`.
+    :param horizons: Sequence[int] - Forward horizons in bars.
+    :return: pd.DataFrame - Indexed by rule, with the signal count and, per
+        horizon h, the mean signed return ('mean_h') and share of positive ones ('hit_rate_h').
+    """
+    close = features['Close']
+    returns = {horizon: forward_returns(close, horizon) for horizon in horizons}
+    mask = evaluate_mask(features, rules)
+    report = {}
+    for column, rule in enumerate(rules):
+        triggered = mask[..., column]
+        direction = rule.direction(features) if callable(rule.direction) else rule.direction
+        direction = np.broadcast_to(direction, close.shape)[triggered]
+        stats = {'signals': int(triggered.sum())}
+        for horizon, values in returns.items():
+            outcome = values[triggered] * direction
+            outcome = outcome[~np.isnan(outcome)]
+            stats[f'mean_{horizon}'] = outcome.mean() if len(outcome) else np.nan
+            stats[f'hit_rate_{horizon}'] = (outcome > 0).mean() if len(outcome) else np.nan
+        report[rule.name] = stats
+    return pd.DataFrame.from_dict(report, orient='index')
+
+
+def run_backtest(dfs: List[pd.DataFrame], symbols: List[str], rules: List[Rule] = None,
+                 horizons: Sequence[int] = DEFAULT_HORIZONS) -> pd.DataFrame:
+    """
+    Backtest the signal rules over stored candles of many symbols.
+
+    :param dfs: List[pd.DataFrame] - Closed candles per symbol in the `PriceChecker.fetch_candles` layout.
+    :param symbols: List[str] - Symbol of each frame.
+    :param rules: List[Rule] - Rules to test, compiled from the config by default.
+    :param horizons: Sequence[int] - Forward horizons in bars.
+    :return: pd.DataFrame - The `summarize` report.
+    """
+    panel = build_panel(dfs, symbols)
+    # The periods the rules compiled from the config read
+    indicators = compute_indicators(panel, ma_periods=MA_PERIODS, volume_period=VOLUME_PERIOD,
+                                    breakout_periods=BREAKOUT_PERIODS)
+    features = features_from_panel(panel, indicators)
+    # Support/resistance levels are only built for the latest bar, so their rules are not backtested
+    return summarize(features, rules if rules is not None else compile_rules(level_breaks=False), horizons)
+
+
+# Per-process state of a parameter sweep, set once by `_init_worker`
+_worker_features: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(panel: Dict[str, np.ndarray], ma_periods: Sequence[int], breakout_periods: Sequence[int],
+                 volume_periods: Sequence[int]) -> None:
+    global _worker_features
+    indicators = compute_indicators(panel, ma_periods=ma_periods, volume_period=volume_periods[0],
+                                    breakout_periods=breakout_periods)
+    for period in volume_periods[1:]:
+        indicators[f'Average_Volume_{period}'] = rolling_mean(panel['Volume'], period)
+    _worker_features = features_from_panel(panel, indicators)
+
+
+def _run_params(params: dict, horizons: Sequence[int]) -> pd.DataFrame:
+    report = summarize(_worker_features, compile_rules(**{'level_breaks': False, **params}), horizons)
+    for name, value in params.items():
+        report[name] = [value] * len(report)
+    return report
+
+
+def sweep(dfs: List[pd.DataFrame], symbols: List[str], grid: Dict[str, list],
+          horizons: Sequence[int] = DEFAULT_HORIZONS, processes: int = None) -> pd.DataFrame:
+    """
+    Backtest every combination of rule parameters in parallel.
+
+    Each worker process builds the indicators once and then evaluates its share
+    of the combinations as array masks.
+
+    :param grid: dict - Lists of values per `utils.rules.compile_rules` argument,
+        e.g. {'rsi_lower': [25, 30, 35], 'volume_spike_rate': [1.5, 2.0]}.
+    :param processes: int - Worker processes, the CPU count by default.
+    :return: pd.DataFrame - The `summarize` reports of all combinations, one
+        row per (combination, rule) with the parameter values as extra columns.
+    """
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    # Indicators are built once per worker, so cover every period any combination uses
+    ma_periods = sorted(set(MA_PERIODS).union(*grid.get('ma_periods', [])))
+    breakout_periods = sorted(set(BREAKOUT_PERIODS).union(*grid.get('breakout_periods', [])))
+    volume_periods = sorted({VOLUME_PERIOD, *grid.get('volume_period', [])})
+    panel = build_panel(dfs, symbols)
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_init_worker,
+                             initargs=(panel, ma_periods, breakout_periods, volume_periods)) as executor:
+        reports = list(executor.map(_run_params, combinations, itertools.repeat(horizons)))
+    return pd.concat([report.rename_axis('rule').reset_index() for report in reports], ignore_index=True)
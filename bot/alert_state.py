@@ -0,0 +1,192 @@
+import heapq
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from config.config import ALERT_COOLDOWN, ALERT_STATE_PATH
+
+# (symbol, interval, rule)
+AlertKey = Tuple[str, str, str]
+
+
+class AlertRecord:
+    """
+    State of one (symbol, interval, rule): whether its condition held on the last
+    evaluation, when it last started to hold and when it was last alerted.
+    """
+    __slots__ = ('active', 'first_triggered', 'last_sent')
+
+    def __init__(self, active: bool, first_triggered: float, last_sent: float):
+        self.active = active
+        self.first_triggered = first_triggered
+        self.last_sent = last_sent
+
+    def __repr__(self) -> str:
+        return f"AlertRecord(active={self.active}, first_triggered={self.first_triggered}, last_sent={self.last_sent})"
+
+
+class AlertState:
+    """
+    Memory of the signals across ticks, so that only state transitions are alerted.
+
+    A rule alerts when its condition starts to hold for a symbol and interval,
+    and not again while it keeps holding. A rule that cleared and holds again
+    within `cooldown` seconds of its last alert is alerted only if it still holds
+    when the cooldown is over, so a condition flapping around its threshold does
+    not flood the chat. Records live in a dict, so every lookup is
+    O(1), and records of cleared conditions are dropped once their cooldown is
+    over, whether or not their symbol is evaluated again.
+
+    With a `path`, the records are also written to a SQLite file as they change
+    and loaded from it on creation, so the state survives restarts.
+    """
+
+    def __init__(self, cooldown: float = ALERT_COOLDOWN, path: Optional[str] = ALERT_STATE_PATH):
+        """
+        :param cooldown: float - Seconds before a rule that cleared may alert again.
+        :param path: str - SQLite file to persist the state in; kept in memory only when omitted.
+        """
+        if cooldown < 0:
+            raise ValueError("Cooldown must not be negative")
+        self.cooldown = cooldown
+        self._records: Dict[AlertKey, AlertRecord] = {}
+        # Active rules per (symbol, interval), to find the ones that cleared without scanning every record
+        self._active: Dict[Tuple[str, str], Set[str]] = {}
+        # (last_sent, key) of the cleared rules, to drop each one when its cooldown is over; entries
+        # of rules that triggered again since are stale and skipped
+        self._inactive: List[Tuple[float, AlertKey]] = []
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            # Ticks run on the event loop, but the scheduler may be created on another thread
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS alert_state (symbol TEXT NOT NULL, interval TEXT NOT NULL, "
+                "rule TEXT NOT NULL, active INTEGER NOT NULL, first_triggered REAL NOT NULL, last_sent REAL, "
+                "PRIMARY KEY (symbol, interval, rule))")
+            self._db.commit()
+            self.reload()
+
+    def reload(self) -> None:
+        """
+        Replace the records with the ones in the SQLite file, e.g. written by another replica
+        of the shard that was active until now.
+        """
+        if self._db is None:
+            return
+        with self._lock:
+            self._records.clear()
+            self._active.clear()
+            self._inactive.clear()
+            for symbol, interval, rule, active, first_triggered, last_sent in self._db.execute(
+                    "SELECT symbol, interval, rule, active, first_triggered, last_sent FROM alert_state"):
+                self._set((symbol, interval, rule), AlertRecord(bool(active), first_triggered, last_sent))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, symbol: str, interval: str, rule: str) -> Optional[AlertRecord]:
+        return self._records.get((symbol, interval, rule))
+
+    def update(self, signals: pd.DataFrame, symbols: Iterable[str], interval: str, now: float) -> pd.DataFrame:
+        """
+        Record a tick's signals and keep only those that should be alerted.
+
+        :param signals: pd.DataFrame - Output of `utils.rules.evaluate_rules`.
+        :param symbols: List[str] - Every symbol evaluated this tick; the active rules of
+            these symbols that did not trigger have cleared. Symbols that were not
+            evaluated, e.g. skipped by `data.universe.SymbolUniverse`, keep their state.
+        :param interval: str - Timeframe of the signals.
+        :param now: float - Time of the tick in seconds, e.g. the evaluated candle's open time.
+        :return: pd.DataFrame - The signals to alert, in their original order.
+        """
+        triggered: Dict[Tuple[str, str], Set[str]] = {}
+        for symbol, rule in zip(signals['Symbol'], signals['Rule']):
+            triggered.setdefault((symbol, interval), set()).add(rule)
+        with self._lock:
+            changed, removed = [], []
+            keep = []
+            for symbol, rule in zip(signals['Symbol'], signals['Rule']):
+                key = (symbol, interval, rule)
+                record = self._records.get(key)
+                if record is not None and record.active:
+                    # Still holding: alert only a start that the cooldown held back
+                    alert = record.last_sent < record.first_triggered and now - record.last_sent >= self.cooldown
+                    if alert:
+                        record.last_sent = now
+                        changed.append(key)
+                    keep.append(alert)
+                    continue
+                alert = record is None or now - record.last_sent >= self.cooldown
+                self._set(key, AlertRecord(True, now, now if alert else record.last_sent))
+                changed.append(key)
+                keep.append(alert)
+            for symbol in symbols:
+                active = self._active.get((symbol, interval))
+                if not active:
+                    continue
+                for rule in active - triggered.get((symbol, interval), set()):
+                    key = (symbol, interval, rule)
+                    record = self._records[key]
+                    if now - record.last_sent >= self.cooldown:
+                        # Nothing left to suppress once the cooldown is over
+                        self._delete(key)
+                        removed.append(key)
+                    else:
+                        self._set(key, AlertRecord(False, record.first_triggered, record.last_sent))
+                        changed.append(key)
+            removed.extend(self._expire(now))
+            self._save(changed, removed)
+        return signals[keep].reset_index(drop=True) if len(signals) else signals
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _set(self, key: AlertKey, record: AlertRecord) -> None:
+        self._records[key] = record
+        if record.active:
+            self._active.setdefault(key[:2], set()).add(key[2])
+        else:
+            self._deactivate(key)
+            heapq.heappush(self._inactive, (record.last_sent, key))
+
+    def _expire(self, now: float) -> List[AlertKey]:
+        """
+        Drop the cleared rules whose cooldown is over, cheapest first.
+
+        :return: List[AlertKey] - The keys dropped.
+        """
+        removed = []
+        while self._inactive and now - self._inactive[0][0] >= self.cooldown:
+            last_sent, key = heapq.heappop(self._inactive)
+            record = self._records.get(key)
+            if record is not None and not record.active and record.last_sent == last_sent:
+                del self._records[key]
+                removed.append(key)
+        return removed
+
+    def _delete(self, key: AlertKey) -> None:
+        del self._records[key]
+        self._deactivate(key)
+
+    def _deactivate(self, key: AlertKey) -> None:
+        active = self._active.get(key[:2])
+        if active is not None:
+            active.discard(key[2])
+            if not active:
+                del self._active[key[:2]]
+
+    def _save(self, changed: List[AlertKey], removed: List[AlertKey]) -> None:
+        if self._db is None or not (changed or removed):
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO alert_state (symbol, interval, rule, active, first_triggered, last_sent) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, int(self._records[key].active), self._records[key].first_triggered,
+                  self._records[key].last_sent) for key in changed])
+            self._db.executemany("DELETE FROM alert_state WHERE symbol = ? AND interval = ? AND rule = ?", removed)
@@ -0,0 +1,36 @@
+from typing import Callable, List, Optional, Tuple
+
+
+class CapturingBot:
+    """
+    Stand-in for `TelegramBot` that records messages instead of sending them.
+
+    Works wherever a `TelegramBot` does, including inside `TelegramDelivery`.
+    Each message is stored as (timestamp, chat_id, text) and each photo as
+    (timestamp, chat_id, caption, image bytes), with the timestamp taken from
+    `clock` (e.g. a simulated clock's `now`) when one is given.
+    """
+
+    class _Client:
+        # The lifecycle calls `TelegramDelivery` makes on `TelegramBot.bot`
+        async def initialize(self):
+            pass
+
+        async def shutdown(self):
+            pass
+
+    def __init__(self, chat_id: str = 'capture', clock: Optional[Callable[[], object]] = None):
+        self.bot = self._Client()
+        self.chat_id = chat_id
+        self.clock = clock
+        self.messages: List[Tuple[object, str, str]] = []
+        self.photos: List[Tuple[object, str, Optional[str], bytes]] = []
+
+    async def send_message(self, message, chat_id=None):
+        self.messages.append((self.clock() if self.clock else None, chat_id or self.chat_id, message))
+
+    async def send_photo(self, photo, caption=None, chat_id=None):
+        self.photos.append((self.clock() if self.clock else None, chat_id or self.chat_id, caption, photo))
+
+    def texts(self) -> List[str]:
+        return [text for _, _, text in self.messages]
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import time
+from functools import partial
+from typing import Dict, List, Optional, Set
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+
+from bot.telegram_bot import TelegramBot
+from config.config import (TELEGRAM_CHAT_IDS, TELEGRAM_CHAT_RATE, TELEGRAM_DEDUP_COOLDOWN, TELEGRAM_GLOBAL_RATE,
+                           TELEGRAM_MAX_RETRIES)
+from utils.metrics import STAGE_SECONDS, TELEGRAM_MESSAGES
+
+# Longest text Telegram accepts in one message
+MESSAGE_LIMIT = 4096
+# Longest caption Telegram accepts on a photo
+CAPTION_LIMIT = 1024
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Split a message into chunks of at most `limit` characters.
+
+    Chunks end on line boundaries, so a signal line is never cut in half;
+    only a single line longer than `limit` is split inside.
+    """
+    chunks = []
+    current = ''
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ''
+        current += line
+    if current.strip():
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+class RateLimiter:
+    """
+    Spaces out sends so at most `global_rate` messages per second go out overall
+    and `chat_rate` per second to any one chat.
+    """
+
+    def __init__(self, global_rate: float = TELEGRAM_GLOBAL_RATE, chat_rate: float = TELEGRAM_CHAT_RATE):
+        self.global_interval = 1 / global_rate
+        self.chat_interval = 1 / chat_rate
+        self._next_global = 0.0
+        self._next_chat: Dict[str, float] = {}
+
+    async def acquire(self, chat_id: str) -> None:
+        now = time.monotonic()
+        # Reserve the slot before sleeping; nothing yields in between, so concurrent callers queue up
+        start = max(now, self._next_global, self._next_chat.get(chat_id, 0.0))
+        self._next_global = start + self.global_interval
+        self._next_chat[chat_id] = start + self.chat_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class TelegramDelivery:
+    """
+    Asynchronous alert delivery to one or more Telegram chats.
+
+    `submit` queues a message (`submit_photo` an image) and returns at once; one
+    worker per chat sends the queued items in order through a shared, pooled `TelegramBot`, within
+    the Telegram rate limits. Flood-control and network errors are retried
+    with backoff, and a message with the same key as one delivered to the same chat
+    within `dedup_cooldown` seconds, or still queued for it, is dropped.
+
+    Use as `async with delivery:`; leaving the block waits for the queued
+    messages. The dedup history is kept on the object, so the same delivery
+    can be started again on a later event loop.
+    """
+
+    def __init__(self, bot: Optional[TelegramBot] = None, chat_ids: Optional[List[str]] = None,
+                 limiter: Optional[RateLimiter] = None, max_retries: int = TELEGRAM_MAX_RETRIES,
+                 dedup_cooldown: float = TELEGRAM_DEDUP_COOLDOWN):
+        self.bot = bot or TelegramBot()
+        self.chat_ids = list(chat_ids if chat_ids is not None else TELEGRAM_CHAT_IDS)
+        if not self.chat_ids:
+            raise ValueError("At least one chat ID is required (set TELEGRAM_CHAT_IDS or TELEGRAM_CHAT_ID).")
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.dedup_cooldown = dedup_cooldown
+        self._sent: Dict[tuple, float] = {}
+        # (chat, digest) of the messages queued but not delivered yet
+        self._pending: Set[tuple] = set()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        try:
+            await self.bot.bot.initialize()
+        except NetworkError as e:
+            # Sends retry on their own, so an unreachable Telegram must not hold up start-up
+            print(f"Telegram is unreachable ({e}); messages will be retried when sent")
+        self._queues = {chat_id: asyncio.Queue() for chat_id in self.chat_ids}
+        self._workers = [asyncio.create_task(self._work(chat_id, queue)) for chat_id, queue in self._queues.items()]
+
+    async def close(self) -> None:
+        """
+        Wait for the queued messages to be sent, then stop the workers and the HTTP client.
+        """
+        await self.flush()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.bot.bot.shutdown()
+
+    async def __aenter__(self) -> 'TelegramDelivery':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def submit(self, message: str, key: Optional[str] = None) -> int:
+        """
+        Queue a message for every chat.
+
+        :param key: str - Identifies the message for deduplication, e.g. `bot.messages.signals_key`
+            for an alert, whose text changes every tick; the whole text by default.
+        :return: int - Number of chats the message was queued for (0 if every chat got it recently).
+        """
+        return self._submit(hashlib.sha1((message if key is None else key).encode()),
+                            [partial(self.bot.send_message, chunk) for chunk in split_message(message)])
+
+    def submit_photo(self, photo: bytes, caption: Optional[str] = None) -> int:
+        """
+        Queue an image, e.g. a PNG chart, for every chat.
+
+        :param caption: str - Text shown under the image, cut to Telegram's caption limit.
+        :return: int - Number of chats the image was queued for (0 if every chat got it recently).
+        """
+        caption = caption[:CAPTION_LIMIT] if caption else None
+        digest = hashlib.sha1(photo)
+        digest.update((caption or '').encode())
+        return self._submit(digest, [partial(self.bot.send_photo, photo, caption)])
+
+    def _submit(self, digest, sends: list) -> int:
+        if not self._workers:
+            raise RuntimeError("TelegramDelivery is not started.")
+        now = time.monotonic()
+        digest = digest.hexdigest()
+        self._sent = {key: sent_at for key, sent_at in self._sent.items() if now - sent_at < self.dedup_cooldown}
+        queued = 0
+        for chat_id, queue in self._queues.items():
+            key = (chat_id, digest)
+            if key in self._sent or key in self._pending:
+                TELEGRAM_MESSAGES.labels(status='deduplicated').inc()
+                continue
+            self._pending.add(key)
+            queue.put_nowait((key, sends))
+            queued += 1
+        return queued
+
+    async def flush(self) -> None:
+        """
+        Wait until every queued message has been sent or given up on.
+        """
+        await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+
+    async def _work(self, chat_id: str, queue: asyncio.Queue) -> None:
+        while True:
+            key, sends = await queue.get()
+            try:
+                delivered = True
+                for send in sends:
+                    sent = await self._send(chat_id, send)
+                    TELEGRAM_MESSAGES.labels(status='sent' if sent else 'failed').inc()
+                    delivered = delivered and sent
+                if delivered:
+                    # Only a delivered message holds back repeats; a dropped one may be sent again
+                    self._sent[key] = time.monotonic()
+            finally:
+                self._pending.discard(key)
+                queue.task_done()
+
+    async def _send(self, chat_id: str, send) -> bool:
+        """
+        :param send: A `TelegramBot` send method with everything but the chat bound.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(chat_id)
+            try:
+                # Sends finish after the tick that queued them has logged its spans, so they are
+                # only timed into the histogram rather than the span log
+                start = time.perf_counter()
+                await send(chat_id=chat_id)
+                STAGE_SECONDS.labels(stage='send').observe(time.perf_counter() - start)
+                return True
+            except RetryAfter as e:
+                delay = _retry_after_seconds(e)
+            except BadRequest as e:
+                # A malformed message fails the same way every time
+                print(f"Telegram rejected a message to {chat_id}: {e}")
+                return False
+            except NetworkError as e:
+                delay = 2 ** attempt
+                print(f"Sending to {chat_id} failed ({e}), retrying in {delay}s")
+            except TelegramError as e:
+                print(f"Telegram refused a message to {chat_id}: {e}")
+                return False
+            except Exception as e:
+                # Anything else, e.g. a bug in the bot, must not kill the chat's worker and hang `flush`
+                print(f"Sending to {chat_id} failed unexpectedly: {e!r}")
+                return False
+            if attempt < self.max_retries:
+                await asyncio.sleep(delay)
+        print(f"Giving up on a message to {chat_id} after {self.max_retries + 1} attempts")
+        return False
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+import pandas as pd
+
+HORIZON = "\n---------------\n"
+# Alerts are written in Vietnam time (UTC+7)
+DISPLAY_OFFSET = timedelta(hours=7)
+
+
+def format_signal(signal, row: pd.Series) -> str:
+    """
+    Format one triggered signal as a message line.
+    :param signal: A row of `utils.rules.evaluate_rules` output.
+    :param row: The features row of the signal's symbol.
+    """
+    kind, period, value = signal.Kind, signal.Period, signal.Value
+    if kind == 'rsi':
+        return "\n- RSI is over: {}".format(value)
+    if kind == 'volume_spike':
+        average_column = f'Average_Volume_{period}'
+        return "\n- Sudden trading volume occurred. Rate: {}, Volume: {}, {}: {}".format(
+            value, row['Volume'], average_column, row[average_column])
+    if kind == 'crossed_above':
+        return "\n- Price crossed above MA{}".format(period)
+    if kind == 'crossed_below':
+        return "\n- Price crossed below MA{}".format(period)
+    if kind == 'reached_from_above':
+        return "\n- Price reached MA{} from above".format(period)
+    if kind == 'reached_from_below':
+        return "\n- Price reached MA{} from below".format(period)
+    if kind == 'breakout_below':
+        return "\n- The price breaks below the {}-candle low".format(period)
+    if kind == 'breakout_above':
+        return "\n- The price breaks above the {}-candle high".format(period)
+    if kind == 'level_break_below':
+        return "\n- The price breaks below the support at {}".format(value)
+    if kind == 'level_break_above':
+        return "\n- The price breaks above the resistance at {}".format(value)
+    return "\n- {}".format(signal.Rule)
+
+
+def signals_key(signals: pd.DataFrame, interval: str = None) -> str:
+    """
+    Identify an alert by its timeframe and triggered rules, leaving out the time and values
+    that change every tick, so `TelegramDelivery` can hold back the same alert on a later tick.
+    """
+    return "{}\n{}".format(interval or '', "\n".join(
+        "{} {}".format(symbol, rule) for symbol, rule in zip(signals['Symbol'], signals['Rule'])))
+
+
+def format_signals(signals: pd.DataFrame, features: pd.DataFrame, interval: str = None) -> str:
+    """
+    Build the alert message for a tick.
+    :param signals: pd.DataFrame - Output of `utils.rules.evaluate_rules`.
+    :param features: pd.DataFrame - The features table the signals were evaluated on.
+    :param interval: str - Timeframe shown in the header, if any.
+    :return: str - One block per symbol, or an empty string when nothing triggered.
+    """
+    if signals.empty:
+        return ""
+    # Taken from an alerting symbol, as a symbol without candles has no date
+    time_obj = pd.Timestamp(features.loc[signals['Symbol'].iloc[0], 'Date']).to_pydatetime() + DISPLAY_OFFSET
+    if interval:
+        message = "At {} [{}]: ".format(time_obj.strftime('%Y-%m-%d %H:%M:%S'), interval)
+    else:
+        message = "At {}: ".format(time_obj.strftime('%Y-%m-%d %H:%M:%S'))
+    for symbol, symbol_signals in signals.groupby('Symbol', sort=False):
+        row = features.loc[symbol]
+        message += HORIZON + "{}:".format(symbol)
+        for signal in symbol_signals.itertuples(index=False):
+            message += format_signal(signal, row)
+        message += "\n- Percentage change: {:+.2f}% to {}".format(row['Percent_Change'], row['Close'])
+    return message
@@ -1,14 +1,27 @@
 from telegram import Bot
+from telegram.request import HTTPXRequest
 
-from config.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from config.config import TELEGRAM_API_URL, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_POOL_SIZE
 
 class TelegramBot:
-    def __init__(self):
-        self.bot = Bot(TELEGRAM_BOT_TOKEN)
-        self.chat_id = TELEGRAM_CHAT_ID
+    def __init__(self, token: str = TELEGRAM_BOT_TOKEN, chat_id: str = TELEGRAM_CHAT_ID,
+                 base_url: str = TELEGRAM_API_URL, pool_size: int = TELEGRAM_POOL_SIZE):
+        """
+        :param base_url: str - Bot API URL the token is appended to, e.g. a local stub's 'http://127.0.0.1:8081/bot'.
+        :param pool_size: int - Connections kept open to the Bot API.
+        """
+        kwargs = {'base_url': base_url} if base_url else {}
+        self.bot = Bot(token, request=HTTPXRequest(connection_pool_size=pool_size), **kwargs)
+        self.chat_id = chat_id
+
+    async def send_message(self, message, chat_id=None):
+        """
+        Send a message to the given chat, or to the configured Telegram chat.
+        """
+        await self.bot.send_message(chat_id=chat_id or self.chat_id, text=message)
 
-    async def send_message(self, message):
+    async def send_photo(self, photo: bytes, caption=None, chat_id=None):
         """
-        Send a message to the configured Telegram chat.
+        Send an image, e.g. a PNG chart, to the given chat or to the configured Telegram chat.
         """
-        await self.bot.send_message(chat_id=self.chat_id, text=message)
+        await self.bot.send_photo(chat_id=chat_id or self.chat_id, photo=photo, caption=caption)
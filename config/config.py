@@ -6,12 +6,120 @@ load_dotenv()
 # Telegram bot settings
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Comma-separated chats every alert is delivered to
+TELEGRAM_CHAT_IDS = [chat_id for chat_id in os.getenv("TELEGRAM_CHAT_IDS", TELEGRAM_CHAT_ID or "").split(",") if chat_id]
+# Bot API base URL, e.g. a local Bot API server or test stub; the public API when unset
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "8"))
+# Telegram allows about 30 messages per second overall and 1 per second to the same chat
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+# Seconds during which an identical alert is not sent to the same chat again
+TELEGRAM_DEDUP_COOLDOWN = float(os.getenv("TELEGRAM_DEDUP_COOLDOWN", "900"))
 
 # Binance API settings
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
 BINANCE_API_SECRET = os.getenv("BINANCE_API_SECRET")
+# Request weight allowed per minute and the share of it we are willing to use
+BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", "6000"))
+BINANCE_WEIGHT_SAFETY = float(os.getenv("BINANCE_WEIGHT_SAFETY", "0.9"))
+
+# Candle fetching settings
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+FETCH_MAX_RETRIES = int(os.getenv("FETCH_MAX_RETRIES", "5"))
+# Number of candles kept per (symbol, interval) in the candle store
+CANDLE_HISTORY_DEPTH = int(os.getenv("CANDLE_HISTORY_DEPTH", "1000"))
+# Directory of the local kline archive; closed candles are archived every tick when set
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")
+
+# Symbol universe
+# Comma-separated symbols to scan; when empty, every liquid UNIVERSE_QUOTE_ASSET pair is scanned instead
+SYMBOLS = [symbol for symbol in os.getenv("SYMBOLS", "BTCUSDT,SOLUSDT,XRPUSDT").split(",") if symbol]
+UNIVERSE_QUOTE_ASSET = os.getenv("UNIVERSE_QUOTE_ASSET", "USDT")
+# 24h quote volume a pair needs to be scanned, and the most pairs scanned (0 for no cap)
+UNIVERSE_MIN_QUOTE_VOLUME = float(os.getenv("UNIVERSE_MIN_QUOTE_VOLUME", "10000000"))
+UNIVERSE_MAX_SYMBOLS = int(os.getenv("UNIVERSE_MAX_SYMBOLS", "0"))
+# Comma-separated pairs never scanned, such as stablecoins that barely move
+UNIVERSE_EXCLUDE = [symbol for symbol in os.getenv(
+    "UNIVERSE_EXCLUDE", "USDCUSDT,FDUSDUSDT,TUSDUSDT,USDPUSDT,DAIUSDT").split(",") if symbol]
+# Seconds between refreshes of the liquid pairs
+UNIVERSE_REFRESH_SECONDS = float(os.getenv("UNIVERSE_REFRESH_SECONDS", "3600"))
+# Skip fetching symbols whose price, per the bulk ticker, could not have triggered a rule since they were
+# last fetched; see `data.universe.SymbolUniverse`
+UNIVERSE_PREFILTER = os.getenv("UNIVERSE_PREFILTER", "false").lower() == "true"
+# Percentage the price range is widened by before it is compared with the rule levels, and RSI points
+# from a threshold within which a symbol is always fetched
+UNIVERSE_LEVEL_MARGIN = float(os.getenv("UNIVERSE_LEVEL_MARGIN", "0.5"))
+UNIVERSE_RSI_MARGIN = float(os.getenv("UNIVERSE_RSI_MARGIN", "5"))
+
+# Ingestion mode: "poll" runs the REST cron scheduler, "stream" listens to Binance kline WebSockets
+INGEST_MODE = os.getenv("INGEST_MODE", "poll")
+# Seconds to wait for the other symbols after the first candle close before evaluating
+STREAM_BATCH_WINDOW = float(os.getenv("STREAM_BATCH_WINDOW", "1.0"))
+STREAM_MAX_RECONNECT_DELAY = float(os.getenv("STREAM_MAX_RECONNECT_DELAY", "60"))
+
+# Worker processes that evaluate the symbols of each tick; 0 evaluates them in the scheduler process
+EVAL_PROCESSES = int(os.getenv("EVAL_PROCESSES", "0"))
+
+# Sharding: instance SHARD_ID of SHARD_COUNT scans only its share of the symbols
+SHARD_ID = int(os.getenv("SHARD_ID", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_VIRTUAL_NODES = int(os.getenv("SHARD_VIRTUAL_NODES", "256"))
+# Elects one active instance per shard when replicas run it: "file:<lock directory>" or
+# "sqlite:<database path>"; without it every instance of a shard scans and alerts
+SHARD_COORDINATION = os.getenv("SHARD_COORDINATION", "")
+# Seconds a SQLite lease lasts without renewal; the active instance renews it every third of that
+SHARD_LEASE_SECONDS = float(os.getenv("SHARD_LEASE_SECONDS", "1200"))
+
+# Signal rules
+RSI_LOWER = float(os.getenv("RSI_LOWER", "35"))
+RSI_UPPER = float(os.getenv("RSI_UPPER", "65"))
+VOLUME_SPIKE_RATE = float(os.getenv("VOLUME_SPIKE_RATE", "1.5"))
+VOLUME_PERIOD = 20
+MA_PERIODS = (20, 50, 200)
+BREAKOUT_PERIODS = (20, 50, 200)
+# Support/resistance breaks: swing points of the last LEVEL_LOOKBACK candles, standing out from
+# LEVEL_SWING_ORDER candles on each side, merged into one level when less than LEVEL_TOLERANCE
+# (relative) apart; a LEVEL_LOOKBACK of 0 turns the level-break alerts off
+LEVEL_LOOKBACK = int(os.getenv("LEVEL_LOOKBACK", "200"))
+LEVEL_SWING_ORDER = int(os.getenv("LEVEL_SWING_ORDER", "3"))
+LEVEL_TOLERANCE = float(os.getenv("LEVEL_TOLERANCE", "0.005"))
+# Pivot levels of the previous LEVEL_PIVOT_INTERVAL period, "classic", "fibonacci" or "camarilla",
+# are levels as well; empty leaves them out
+LEVEL_PIVOTS = os.getenv("LEVEL_PIVOTS", "classic")
+LEVEL_PIVOT_INTERVAL = os.getenv("LEVEL_PIVOT_INTERVAL", "1d")
+
+# Alert state
+# A signal alerts when its condition starts to hold, not again while it keeps holding; once cleared,
+# it alerts again only ALERT_COOLDOWN seconds after its last alert
+ALERT_COOLDOWN = float(os.getenv("ALERT_COOLDOWN", "3600"))
+# SQLite file the alert state is kept in across restarts; kept in memory only when unset. Required with
+# SHARD_COORDINATION, on storage the replicas share, so a takeover does not alert active conditions again
+ALERT_STATE_PATH = os.getenv("ALERT_STATE_PATH")
+
+# Alert charts
+# Attach a candlestick chart of every alerting symbol to the alerts
+ALERT_CHARTS = os.getenv("ALERT_CHARTS", "false").lower() == "true"
+# Comma-separated chart overlays: "ma", "rsi" (its own panel) and "pivots"
+CHART_OVERLAYS = [overlay for overlay in os.getenv("CHART_OVERLAYS", "ma,rsi").split(",") if overlay]
+# Candles shown per chart
+CHART_CANDLES = int(os.getenv("CHART_CANDLES", "100"))
+# Worker processes that render charts
+CHART_PROCESSES = int(os.getenv("CHART_PROCESSES", "1"))
+# Rendered charts kept in memory; the least recently used are dropped first
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+
+# Monitoring
+# /health fails once the last successful tick is older than this many seconds
+HEALTH_MAX_TICK_AGE = float(os.getenv("HEALTH_MAX_TICK_AGE", "1200"))
+# Comma-separated pipeline stages to run under cProfile, e.g. "indicators,indicator.rsi"
+PROFILE_STAGES = [stage for stage in os.getenv("PROFILE_STAGES", "").split(",") if stage]
+# Directory the accumulated <stage>.prof files are written to
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
 
 # Other settings
 SYMBOL = "BTCUSDT"
 INTERVAL = "15m"
-
+# Timeframes to evaluate; everything above INTERVAL is resampled from the INTERVAL candles
+TIMEFRAMES = os.getenv("TIMEFRAMES", INTERVAL).split(",")
@@ -0,0 +1,278 @@
+import io
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import ARCHIVE_DIR, INTERVAL
+from data.candle_buffer import CandleBuffer
+from data.timeframes import interval_to_milliseconds
+
+ARCHIVE_COLUMNS = ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')
+# Maximum klines Binance returns per request
+PAGE_LIMIT = 1000
+
+
+class KlineArchive:
+    """
+    Local kline history stored as raw NumPy columns.
+
+    Candles are partitioned as `<root>/<symbol>/<interval>/<YYYY-MM>/<column>.npy`,
+    with 'Date' as int64 open time in milliseconds and OHLCV as float64. Reads
+    memory-map the column files, so loading a month touches no more than the
+    pages actually used, and newer candles are appended to the column files in
+    place rather than rewriting the month.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        if not root:
+            raise ValueError("An archive directory is required (set ARCHIVE_DIR).")
+        self.root = root
+
+    def _interval_dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol, interval)
+
+    def months(self, symbol: str, interval: str) -> List[str]:
+        """
+        Return the stored months ('YYYY-MM') of a symbol and interval, oldest first.
+        """
+        path = self._interval_dir(symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+    def read_month(self, symbol: str, interval: str, month: str) -> Dict[str, np.ndarray]:
+        """
+        Memory-map the columns of one month.
+
+        Columns are appended one after the other, so a read during an append (or
+        after one was interrupted) may find some columns longer; only the rows
+        every column holds are returned.
+        """
+        path = os.path.join(self._interval_dir(symbol, interval), month)
+        columns = {column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r') for column in ARCHIVE_COLUMNS}
+        rows = min(len(values) for values in columns.values())
+        return {column: values[:rows] for column, values in columns.items()}
+
+    def read_arrays(self, symbol: str, interval: str, start_time: Optional[int] = None,
+                    limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Read candles as one array per column.
+
+        A single month comes back as read-only memory-mapped views; several months
+        are concatenated. With `limit`, only the months needed for the newest
+        `limit` candles are opened.
+
+        :param symbol: str - Symbol to read.
+        :param interval: str - Kline interval.
+        :param start_time: int - Only candles opening at or after this time (ms).
+        :param limit: int - At most `limit` candles: the first ones from `start_time`
+            when it is given, like the Binance klines endpoint, else the newest ones.
+        :return: dict - One array per column of `ARCHIVE_COLUMNS`.
+        """
+        months = self.months(symbol, interval)
+        if start_time is not None:
+            first_month = str(np.datetime64(start_time, 'ms').astype('datetime64[M]'))
+            months = [month for month in months if month >= first_month]
+        parts = []
+        rows = 0
+        for month in reversed(months):
+            part = self.read_month(symbol, interval, month)
+            parts.append(part)
+            rows += len(part['Date'])
+            if limit is not None and start_time is None and rows >= limit:
+                break
+        parts.reverse()
+        if not parts:
+            return {column: np.empty(0, dtype=np.int64 if column == 'Date' else float) for column in ARCHIVE_COLUMNS}
+        if len(parts) == 1:
+            columns = parts[0]
+        else:
+            columns = {column: np.concatenate([part[column] for part in parts]) for column in ARCHIVE_COLUMNS}
+        if start_time is not None:
+            first = np.searchsorted(columns['Date'], start_time)
+            columns = {column: values[first:] for column, values in columns.items()}
+        if limit is not None:
+            if start_time is not None:
+                columns = {column: values[:limit] for column, values in columns.items()}
+            else:
+                columns = {column: values[len(values) - limit:] if limit else values[:0] for column, values in columns.items()}
+        return columns
+
+    def read(self, symbol: str, interval: str, start_time: Optional[int] = None,
+             limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Read candles in the `PriceChecker.fetch_candles` layout.
+        """
+        columns = self.read_arrays(symbol, interval, start_time, limit)
+        data = {'Date': np.asarray(columns['Date']).astype('datetime64[ms]')}
+        for column in ARCHIVE_COLUMNS[1:]:
+            data[column] = np.asarray(columns[column])
+        return pd.DataFrame(data)
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """
+        Return the open time in milliseconds of the newest archived candle, or None.
+        """
+        months = self.months(symbol, interval)
+        if not months:
+            return None
+        dates = self.read_month(symbol, interval, months[-1])['Date']
+        return int(dates[-1]) if len(dates) else None
+
+    def append(self, symbol: str, interval: str, candles: pd.DataFrame) -> int:
+        """
+        Add closed candles to the archive.
+
+        Candles newer than the archived ones are appended in place; candles
+        already archived are replaced by the new values, which rewrites the
+        months they fall in.
+
+        :param candles: pd.DataFrame - Closed candles in the `PriceChecker.fetch_candles` layout.
+        :return: int - Number of candles written.
+        """
+        if candles.empty:
+            return 0
+        new = {'Date': candles['Date'].to_numpy(dtype='datetime64[ms]').astype(np.int64)}
+        for column in ARCHIVE_COLUMNS[1:]:
+            new[column] = candles[column].to_numpy(dtype=float)
+        months = new['Date'].astype('datetime64[ms]').astype('datetime64[M]').astype(str)
+        for month in np.unique(months):
+            in_month = months == month
+            self._write_month(symbol, interval, month, {column: values[in_month] for column, values in new.items()})
+        return len(candles)
+
+    def append_new(self, symbol: str, interval: str, candles: pd.DataFrame) -> int:
+        """
+        Add only the candles newer than the newest archived one.
+        """
+        last_open_time = self.last_open_time(symbol, interval)
+        if last_open_time is not None:
+            candles = candles[candles['Date'] > pd.Timestamp(last_open_time, unit='ms')]
+        return self.append(symbol, interval, candles)
+
+    def _write_month(self, symbol: str, interval: str, month: str, new: Dict[str, np.ndarray]) -> None:
+        path = os.path.join(self._interval_dir(symbol, interval), month)
+        if os.path.isdir(path) and self._append_month(path, new):
+            return
+        if os.path.isdir(path):
+            stored = {column: np.array(values) for column, values in self.read_month(symbol, interval, month).items()}
+            dates = np.concatenate([stored['Date'], new['Date']])
+            # Keep the last occurrence of each open time, so new values win
+            order = np.argsort(dates, kind='stable')
+            last = np.r_[dates[order][1:] != dates[order][:-1], True]
+            keep = order[last]
+            merged = {column: np.concatenate([stored[column], new[column]])[keep] for column in ARCHIVE_COLUMNS}
+        else:
+            os.makedirs(path, exist_ok=True)
+            order = np.argsort(new['Date'], kind='stable')
+            merged = {column: values[order] for column, values in new.items()}
+        # Write every column first, then swap them in, so readers only ever see complete column files
+        for column in ARCHIVE_COLUMNS:
+            with open(os.path.join(path, f"{column}.npy.tmp"), 'wb') as f:
+                np.save(f, merged[column])
+        for column in ARCHIVE_COLUMNS:
+            os.replace(os.path.join(path, f"{column}.npy.tmp"), os.path.join(path, f"{column}.npy"))
+
+    def _append_month(self, path: str, new: Dict[str, np.ndarray]) -> bool:
+        """
+        Append rows newer than every stored one to the column files in place.
+
+        The rows go in first and the headers holding the lengths are updated last,
+        so a reader sees either the old or the new rows of a column.
+
+        :return: bool - False, with nothing written, when the rows are not all newer,
+            the stored columns differ in length or a header cannot grow in place.
+        """
+        dates = new['Date']
+        if np.any(np.diff(dates) <= 0):
+            return False
+        headers = {}
+        for column in ARCHIVE_COLUMNS:
+            with open(os.path.join(path, f"{column}.npy"), 'rb') as f:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                elif version == (2, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                else:
+                    return False
+                headers[column] = (version, f.tell(), shape, dtype)
+        if len({shape for _, _, shape, _ in headers.values()}) != 1:
+            return False
+        rows = headers['Date'][2][0]
+        if rows and int(np.load(os.path.join(path, "Date.npy"), mmap_mode='r')[rows - 1]) >= dates[0]:
+            return False
+        updated = {}
+        for column, (version, header_size, shape, dtype) in headers.items():
+            header = io.BytesIO()
+            write_header = (np.lib.format.write_array_header_1_0 if version == (1, 0)
+                            else np.lib.format.write_array_header_2_0)
+            write_header(header, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                                  'shape': (rows + len(dates),)})
+            # numpy leaves room in the header for the length to grow, so this rarely fails
+            if len(header.getvalue()) != header_size:
+                return False
+            updated[column] = header.getvalue()
+        for column in ARCHIVE_COLUMNS:
+            with open(os.path.join(path, f"{column}.npy"), 'r+b') as f:
+                # Past the stored rows, dropping any left by an interrupted append
+                f.seek(headers[column][1] + rows * headers[column][3].itemsize)
+                f.write(np.ascontiguousarray(new[column], dtype=headers[column][3]).tobytes())
+                f.truncate()
+        for column in ARCHIVE_COLUMNS:
+            with open(os.path.join(path, f"{column}.npy"), 'r+b') as f:
+                f.write(updated[column])
+        return True
+
+
+class ArchiveSource:
+    """
+    Offline stand-in for `PriceChecker` that serves candles from a `KlineArchive`.
+    """
+
+    def __init__(self, archive: KlineArchive):
+        self.archive = archive
+        self.store = None
+
+    def fetch_candles(self, limit: int, symbol: str, interval: str = INTERVAL,
+                      start_time: Optional[int] = None) -> pd.DataFrame:
+        return self.archive.read(symbol, interval, start_time=start_time, limit=limit)
+
+    def fetch_latest(self, limit: int, symbol: str, interval: str = INTERVAL) -> pd.DataFrame:
+        return self.fetch_candles(limit, symbol, interval)
+
+    def fetch_many(self, limit: int, symbols: List[str], interval: str = INTERVAL) -> List[pd.DataFrame]:
+        return [self.fetch_candles(limit, symbol, interval) for symbol in symbols]
+
+    def fetch_buffers(self, limit: int, symbols: List[str], interval: str = INTERVAL) -> List[CandleBuffer]:
+        return [CandleBuffer.from_columns(self.archive.read_arrays(symbol, interval, limit=limit)) for symbol in symbols]
+
+
+def download_history(checker, archive: KlineArchive, symbol: str, interval: str, start_time: int,
+                     now: Optional[int] = None) -> int:
+    """
+    Download closed candles from `start_time` (or the newest archived candle, if later) into the archive.
+
+    :param checker: PriceChecker - Source of the candles.
+    :param now: int - Current time in milliseconds; candles closing after it are still open
+        and left out. The system time by default.
+    :return: int - Number of candles written.
+    """
+    now = int(time.time() * 1000) if now is None else now
+    interval_ms = interval_to_milliseconds(interval)
+    last_open_time = archive.last_open_time(symbol, interval)
+    if last_open_time is not None:
+        start_time = max(start_time, last_open_time + 1)
+    written = 0
+    while True:
+        candles = checker.fetch_candles(PAGE_LIMIT, symbol, interval, start_time=start_time)
+        open_times = candles['Date'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        # The newest candle is still open, whether it ends the page or not
+        closed = candles[open_times + interval_ms <= now]
+        written += archive.append(symbol, interval, closed)
+        if len(candles) < PAGE_LIMIT or len(closed) < len(candles):
+            return written
+        start_time = int(open_times[-1]) + 1
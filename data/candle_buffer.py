@@ -0,0 +1,162 @@
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+CANDLE_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+# Spare rows allocated past the capacity, as a fraction of it; appends only move
+# the kept rows to new storage once the spare rows are used up
+SPARE_ROWS = 0.25
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity candle history in contiguous NumPy arrays.
+
+    Open times are int64 milliseconds and OHLCV a (5 x rows) float64 block, so
+    every column is a contiguous slice the indicators can read without a copy.
+    Appending beyond `capacity` evicts the oldest candles.
+
+    Indexing follows the `PriceChecker.fetch_candles` layout: `buffer['Close']`
+    is a read-only view of a column ('Date' as datetime64[ms]) and `buffer[:-1]`
+    a buffer over a range of rows, sharing memory with this one. Views see later
+    in-place updates of the rows they cover (the still-open candle being replaced
+    by its final values); rows appended afterwards never show up in them.
+    """
+
+    __slots__ = ('capacity', '_times', '_values', '_start', '_stop')
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than 0")
+        self.capacity = capacity
+        self._times, self._values = self._allocate(capacity)
+        self._start = self._stop = 0
+
+    @staticmethod
+    def _allocate(capacity: int):
+        rows = capacity + max(1, int(capacity * SPARE_ROWS))
+        return np.empty(rows, dtype=np.int64), np.empty((len(CANDLE_FIELDS), rows))
+
+    @classmethod
+    def _wrap(cls, times: np.ndarray, values: np.ndarray) -> 'CandleBuffer':
+        """
+        A full buffer over existing arrays, which are made read-only rather than copied.
+        """
+        buffer = cls.__new__(cls)
+        buffer.capacity = max(1, len(times))
+        buffer._times = times.view()
+        buffer._values = values.view()
+        buffer._times.flags.writeable = False
+        buffer._values.flags.writeable = False
+        buffer._start, buffer._stop = 0, len(times)
+        return buffer
+
+    @classmethod
+    def from_klines(cls, klines: list) -> 'CandleBuffer':
+        """
+        Parse a `Client.get_klines` response, whose prices are strings, straight into arrays.
+        """
+        if not klines:
+            return cls._wrap(np.empty(0, dtype=np.int64), np.empty((len(CANDLE_FIELDS), 0)))
+        # Open times are below 2**53 ms, so they survive the round trip through float64
+        rows = np.array([kline[:6] for kline in klines], dtype=float)
+        return cls._wrap(rows[:, 0].astype(np.int64), np.ascontiguousarray(rows[:, 1:].T))
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> 'CandleBuffer':
+        """
+        Build a buffer from 'Date' (int64 ms) and OHLCV arrays, e.g. `KlineArchive.read_arrays`.
+        """
+        times = np.asarray(columns['Date'], dtype=np.int64)
+        return cls._wrap(times, np.array([np.asarray(columns[field], dtype=float) for field in CANDLE_FIELDS]))
+
+    @classmethod
+    def from_frame(cls, candles: pd.DataFrame) -> 'CandleBuffer':
+        """
+        Build a buffer from candles in the `PriceChecker.fetch_candles` layout.
+        """
+        columns = {field: candles[field].to_numpy(dtype=float) for field in CANDLE_FIELDS}
+        columns['Date'] = candles['Date'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        return cls.from_columns(columns)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, key: Union[str, slice]) -> Union[np.ndarray, 'CandleBuffer']:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Candle buffers can only be sliced with a step of 1")
+            stop = max(start, stop)
+            return self._wrap(self._times[self._start + start:self._start + stop],
+                              self._values[:, self._start + start:self._start + stop])
+        if key == 'Date':
+            column = self.times.view('datetime64[ms]')
+        else:
+            column = self._values[CANDLE_FIELDS.index(key), self._start:self._stop]
+        column.flags.writeable = False
+        return column
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        Open times in milliseconds, as a read-only view.
+        """
+        times = self._times[self._start:self._stop]
+        times.flags.writeable = False
+        return times
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        OHLCV as a read-only (5 x rows) view, in `CANDLE_FIELDS` order.
+        """
+        values = self._values[:, self._start:self._stop]
+        values.flags.writeable = False
+        return values
+
+    def last_open_time(self) -> Optional[int]:
+        """
+        Return the open time in milliseconds of the newest candle, or None when empty.
+        """
+        return int(self._times[self._stop - 1]) if len(self) else None
+
+    def extend(self, candles: 'CandleBuffer') -> None:
+        """
+        Merge newer candles into the buffer.
+
+        Stored candles opening at or after the first new one are replaced, so the
+        candle that was still open on the previous fetch gets its final values, and
+        the oldest candles are evicted beyond `capacity`.
+
+        :param candles: CandleBuffer - Candles sorted by open time.
+        """
+        times, values = candles.times, candles.values
+        if len(times) > self.capacity:
+            times, values = times[-self.capacity:], values[:, -self.capacity:]
+        rows = len(times)
+        if rows == 0:
+            return
+        keep_stop = self._start + int(np.searchsorted(self._times[self._start:self._stop], times[0]))
+        kept = min(keep_stop - self._start, self.capacity - rows)
+        start = keep_stop - kept
+        if not self._times.flags.writeable or keep_stop + rows > len(self._times):
+            # Move to new storage rather than in place, so views handed out earlier keep their rows
+            new_times, new_values = self._allocate(self.capacity)
+            new_times[:kept] = self._times[start:keep_stop]
+            new_values[:, :kept] = self._values[:, start:keep_stop]
+            self._times, self._values = new_times, new_values
+            start, keep_stop = 0, kept
+        self._times[keep_stop:keep_stop + rows] = times
+        self._values[:, keep_stop:keep_stop + rows] = values
+        self._start, self._stop = start, keep_stop + rows
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Copy the candles into a DataFrame in the `PriceChecker.fetch_candles` layout.
+        """
+        columns = {'Date': self['Date']}
+        for field in CANDLE_FIELDS:
+            columns[field] = self[field]
+        return pd.DataFrame(columns, copy=True)
@@ -0,0 +1,69 @@
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import pandas as pd
+from config.config import CANDLE_HISTORY_DEPTH
+from data.candle_buffer import CandleBuffer
+
+
+class CandleStore:
+    """
+    In-memory cache of candles keyed by (symbol, interval).
+
+    Each entry is a `CandleBuffer` sorted by open time and capped at
+    `history_depth` candles, so merging a tick's candles only writes the new
+    rows instead of rebuilding a DataFrame.
+    """
+
+    def __init__(self, history_depth: int = CANDLE_HISTORY_DEPTH):
+        if history_depth <= 0:
+            raise ValueError("History depth must be greater than 0")
+        self.history_depth = history_depth
+        self._buffers: Dict[Tuple[str, str], CandleBuffer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, interval: str) -> Optional[CandleBuffer]:
+        """
+        Return the cached candles for a symbol and interval, or None if nothing is stored.
+        """
+        with self._lock:
+            return self._buffers.get((symbol, interval))
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """
+        Return the open time in milliseconds of the newest stored candle, or None.
+        """
+        buffer = self.get(symbol, interval)
+        return buffer.last_open_time() if buffer is not None else None
+
+    def merge(self, symbol: str, interval: str, candles: Union[CandleBuffer, pd.DataFrame]) -> CandleBuffer:
+        """
+        Merge freshly fetched candles into the cache.
+
+        Candles with the same 'Date' replace the stored ones, so the candle that
+        was still open on the previous fetch is updated with its final values.
+        Rows beyond `history_depth` are evicted from the front.
+
+        :param symbol: str - Symbol of the candles.
+        :param interval: str - Kline interval of the candles.
+        :param candles: CandleBuffer - Candles sorted by open time, or a DataFrame in the `fetch_candles` layout.
+        :return: CandleBuffer - The merged candles now held in the cache.
+        """
+        if isinstance(candles, pd.DataFrame):
+            candles = CandleBuffer.from_frame(candles)
+        key = (symbol, interval)
+        with self._lock:
+            stored = self._buffers.get(key)
+            if stored is None:
+                stored = self._buffers[key] = CandleBuffer(self.history_depth)
+            stored.extend(candles)
+            return stored
+
+    def clear(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        """
+        Drop cached candles matching the given symbol and/or interval, or everything when neither is given.
+        """
+        with self._lock:
+            for key in list(self._buffers):
+                if (symbol is None or key[0] == symbol) and (interval is None or key[1] == interval):
+                    del self._buffers[key]
@@ -1,26 +1,176 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
 import pandas as pd
 # import yfinance as yf
-from binance.client import Client
-from config.config import BINANCE_API_KEY, BINANCE_API_SECRET, INTERVAL, SYMBOL
+from config.config import (
+    BINANCE_API_KEY, BINANCE_API_SECRET, BINANCE_WEIGHT_LIMIT, BINANCE_WEIGHT_SAFETY,
+    FETCH_MAX_RETRIES, FETCH_MAX_WORKERS, INTERVAL, SYMBOL
+)
+from data.candle_buffer import CandleBuffer
+from data.candle_store import CandleStore
+from utils.metrics import CANDLES_PROCESSED, FETCH_SECONDS, USED_WEIGHT
+
+# HTTP statuses Binance uses when the request weight limit is hit (429) or the IP is banned (418)
+RATE_LIMIT_STATUSES = (418, 429)
+# Candles requested per incremental fetch; a full batch means the gap is too large to patch
+INCREMENTAL_FETCH_LIMIT = 100
 
 
 class PriceChecker:
-    def __init__(self):
-        self.client = Client(api_key=BINANCE_API_KEY, api_secret=BINANCE_API_SECRET)
-        
-    def fetch_candles(self, limit: int, symbol: str, interval=Client.KLINE_INTERVAL_15MINUTE) -> pd.DataFrame:
-        candles = self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
-        df = pd.DataFrame(candles, columns=[
-            'Date', 'Open', 'High', 'Low', 'Close', 'Volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
-        result = df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']].copy()
-        result['Date'] = pd.to_datetime(df['Date'], unit='ms')
-        float_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        result[float_columns] = df[float_columns].apply(pd.to_numeric)
-        return result
-    
+    def __init__(self, max_workers: int = FETCH_MAX_WORKERS, store: Optional[CandleStore] = None, client=None):
+        """
+        :param client: Client - Kline source with the `Client.get_klines` signature, such as
+            `data.replay.ReplayClient`; a Binance client is created when omitted.
+        """
+        if client is None:
+            # python-binance is slow to import, so it is only loaded when a live client is needed
+            from binance.client import Client
+            # Skip the constructor's blocking ping; the first request opens the connection
+            client = Client(api_key=BINANCE_API_KEY, api_secret=BINANCE_API_SECRET, ping=False)
+        self.client = client
+        self.max_workers = max_workers
+        self.store = store
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def fetch_buffer(self, limit: int, symbol: str, interval: str = INTERVAL,
+                     start_time: Optional[int] = None) -> CandleBuffer:
+        """
+        Download candles, parsing the klines straight into a `CandleBuffer`.
+        """
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        candles = CandleBuffer.from_klines(self._get_klines(**params))
+        CANDLES_PROCESSED.inc(len(candles))
+        return candles
+
+    def fetch_candles(self, limit: int, symbol: str, interval: str = INTERVAL,
+                      start_time: Optional[int] = None) -> pd.DataFrame:
+        return self.fetch_buffer(limit, symbol, interval, start_time).to_frame()
+
+    def fetch_latest(self, limit: int, symbol: str, interval: str = INTERVAL) -> pd.DataFrame:
+        """
+        Return the latest `limit` candles as a DataFrame in the `fetch_candles` layout.
+        """
+        return self.latest_buffer(limit, symbol, interval).to_frame()
+
+    def latest_buffer(self, limit: int, symbol: str, interval: str = INTERVAL) -> CandleBuffer:
+        """
+        Return the latest `limit` candles, downloading only what the store is missing.
+
+        Without a store this is the same as `fetch_buffer`. With a store, only the
+        candles from the newest stored open time onwards are requested and merged
+        in; the full history is downloaded again only on the first call or when the
+        gap since the last fetch is too large to patch.
+
+        :param limit: int - Number of candles to return.
+        :param symbol: str - Symbol to fetch.
+        :param interval: str - Kline interval.
+        :return: CandleBuffer - The latest candles; with a store, a view of the stored ones.
+        """
+        start = time.perf_counter()
+        try:
+            return self._latest_buffer(limit, symbol, interval)
+        finally:
+            FETCH_SECONDS.observe(time.perf_counter() - start)
+
+    def _latest_buffer(self, limit: int, symbol: str, interval: str) -> CandleBuffer:
+        if self.store is None:
+            return self.fetch_buffer(limit, symbol, interval)
+        stored = self.store.get(symbol, interval)
+        if stored is None or len(stored) < limit:
+            candles = self.fetch_buffer(limit, symbol, interval)
+        else:
+            candles = self.fetch_buffer(INCREMENTAL_FETCH_LIMIT, symbol, interval, start_time=stored.last_open_time())
+            if len(candles) >= INCREMENTAL_FETCH_LIMIT:
+                self.store.clear(symbol, interval)
+                candles = self.fetch_buffer(limit, symbol, interval)
+        merged = self.store.merge(symbol, interval, candles)
+        return merged[-limit:]
+
+    def fetch_many(self, limit: int, symbols: List[str], interval: str = INTERVAL) -> List[pd.DataFrame]:
+        """
+        Same as `fetch_buffers`, with one DataFrame per symbol in the `fetch_candles` layout.
+        """
+        return [candles.to_frame() for candles in self.fetch_buffers(limit, symbols, interval)]
+
+    def fetch_buffers(self, limit: int, symbols: List[str], interval: str = INTERVAL) -> List[CandleBuffer]:
+        """
+        Fetch candles for several symbols concurrently, through the store if one is set.
+
+        At most `max_workers` requests are in flight at once, and every request
+        goes through the same weight limiter, so a large symbol list cannot push
+        the IP over the Binance request-weight limit.
+
+        :param limit: int - Number of candles per symbol.
+        :param symbols: List[str] - Symbols to fetch.
+        :param interval: str - Kline interval.
+        :return: List[CandleBuffer] - One buffer per symbol, in the order of `symbols`.
+        """
+        if not symbols:
+            return []
+        workers = max(1, min(self.max_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda symbol: self.latest_buffer(limit, symbol, interval), symbols))
+
+    def fetch_tickers(self) -> List[dict]:
+        """
+        Download the 24hr ticker statistics of every symbol in one request.
+
+        :return: List[dict] - One `Client.get_ticker` entry per symbol, with 'symbol',
+            'lastPrice', 'priceChangePercent', 'quoteVolume' and so on as strings.
+        """
+        return self._request('get_ticker')
+
+    def _get_klines(self, **params) -> list:
+        return self._request('get_klines', **params)
+
+    def _request(self, method: str, **params):
+        """
+        Call a client method, backing off when Binance reports the weight limit is hit.
+        """
+        from binance.exceptions import BinanceAPIException
+        for attempt in range(FETCH_MAX_RETRIES + 1):
+            self._wait_for_capacity()
+            try:
+                result = getattr(self.client, method)(**params)
+            except BinanceAPIException as e:
+                if e.status_code not in RATE_LIMIT_STATUSES or attempt == FETCH_MAX_RETRIES:
+                    raise
+                retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+                delay = float(retry_after) if retry_after else 2 ** attempt
+                print(f"Rate limited fetching {params.get('symbol', method)}, retrying in {delay}s")
+                self._pause(delay)
+                continue
+            self._track_weight()
+            return result
+
+    def _track_weight(self) -> None:
+        """
+        Pause all workers until the next minute once the used weight nears the limit.
+        """
+        response = getattr(self.client, 'response', None)
+        if response is None:
+            return
+        used_weight = response.headers.get('x-mbx-used-weight-1m')
+        if used_weight is not None:
+            USED_WEIGHT.set(int(used_weight))
+        if used_weight is not None and int(used_weight) >= BINANCE_WEIGHT_LIMIT * BINANCE_WEIGHT_SAFETY:
+            self._pause(60 - time.time() % 60)
+
+    def _pause(self, delay: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.time() + delay)
+
+    def _wait_for_capacity(self) -> None:
+        delay = self._resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
     # def fetch_yahoo_data(self, symbol=SYMBOL, limit: int) -> pd.DataFrame:
     #     btc_data = yf.download(SYMBOL, interval="15m", period="1d")
     #     # Display the data
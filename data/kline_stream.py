@@ -0,0 +1,183 @@
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import websockets
+
+from config.config import STREAM_BATCH_WINDOW, STREAM_MAX_RECONNECT_DELAY
+from data.candle_store import CandleStore
+from data.data_fetcher import PriceChecker
+
+STREAM_URL = "wss://stream.binance.com:9443/stream?streams="
+
+# Called once per (interval, candle open time) with the closed candles of every symbol that closed
+OnClose = Callable[[str, Dict[str, pd.DataFrame]], Awaitable[None]]
+
+
+class WebSocketTransport:
+    """
+    Live transport: subscribes to a Binance combined stream.
+
+    Point `base_url` at a local server to drive the stream from a fake
+    exchange, and set `record_path` to save every raw message for replay.
+    """
+
+    def __init__(self, base_url: str = STREAM_URL, record_path: Optional[str] = None):
+        self.base_url = base_url
+        self.record_path = record_path
+
+    async def connect(self, streams: List[str]) -> AsyncIterator[str]:
+        record = open(self.record_path, 'a') if self.record_path else None
+        try:
+            async with websockets.connect(self.base_url + "/".join(streams)) as ws:
+                async for message in ws:
+                    if record is not None:
+                        record.write(message + "\n")
+                    yield message
+        finally:
+            if record is not None:
+                record.close()
+
+
+class ReplayTransport:
+    """
+    Offline transport: replays a recorded file holding one combined-stream message per line.
+    """
+    # The stream ends with the file instead of reconnecting
+    finite = True
+
+    def __init__(self, path: str, delay: float = 0.0):
+        self.path = path
+        self.delay = delay
+
+    async def connect(self, streams: List[str]) -> AsyncIterator[str]:
+        wanted = set(streams)
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or json.loads(line).get('stream') not in wanted:
+                    continue
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                yield line
+
+
+class KlineStream:
+    """
+    Kline ingestion from Binance WebSocket streams.
+
+    Keeps the `PriceChecker` candle store up to date from kline events and calls
+    `on_close` as soon as a candle closes (`x` is true). Closes that arrive
+    together are batched for up to `batch_window` seconds, so one evaluation
+    covers every symbol of a tick. After a dropped connection, including one the
+    server closed cleanly, the stream reconnects with exponential backoff and
+    backfills the gap through REST; only a transport marked `finite` ends it.
+    """
+
+    def __init__(self, symbols: List[str], intervals: List[str], on_close: OnClose, checker: PriceChecker,
+                 transport=None, history: int = 300, batch_window: float = STREAM_BATCH_WINDOW,
+                 max_reconnect_delay: float = STREAM_MAX_RECONNECT_DELAY):
+        self.symbols = symbols
+        self.intervals = intervals
+        self.on_close = on_close
+        self.checker = checker
+        if self.checker.store is None:
+            self.checker.store = CandleStore()
+        self.transport = transport or WebSocketTransport()
+        self.history = history
+        self.batch_window = batch_window
+        self.max_reconnect_delay = max_reconnect_delay
+        self._pending: Dict[Tuple[str, pd.Timestamp], Dict[str, pd.DataFrame]] = {}
+        self._flushes: Dict[Tuple[str, pd.Timestamp], asyncio.Task] = {}
+        self._last_closed: Dict[Tuple[str, str], pd.Timestamp] = {}
+
+    @property
+    def streams(self) -> List[str]:
+        return [f"{symbol.lower()}@kline_{interval}" for symbol in self.symbols for interval in self.intervals]
+
+    async def run(self) -> None:
+        """
+        Consume the transport, reconnecting whenever the connection drops or is closed.
+        Returns only when a `finite` transport, such as a replay, runs out of messages.
+        """
+        delay = 1.0
+        await self.backfill()
+        while True:
+            try:
+                async for message in self.transport.connect(self.streams):
+                    delay = 1.0
+                    await self.handle_message(message)
+                if getattr(self.transport, 'finite', False):
+                    break
+                # e.g. Binance closes every connection after 24 hours
+                reason = "closed by the server"
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                reason = f"disconnected ({e})"
+            print(f"Kline stream {reason}, reconnecting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+            await self.backfill()
+        for task in list(self._flushes.values()):
+            await task
+
+    async def backfill(self) -> None:
+        """
+        Fetch missing candles through REST and evaluate any candle that closed while disconnected.
+        """
+        loop = asyncio.get_running_loop()
+        for interval in self.intervals:
+            frames = await loop.run_in_executor(None, self.checker.fetch_many, self.history, self.symbols, interval)
+            closed = {}
+            for symbol, frame in zip(self.symbols, frames):
+                # The last REST candle is still open
+                frame = frame.iloc[:-1]
+                if frame.empty:
+                    continue
+                last = frame['Date'].iloc[-1]
+                previous = self._last_closed.get((symbol, interval))
+                self._last_closed[(symbol, interval)] = last
+                if previous is not None and last > previous:
+                    closed[symbol] = frame
+            if closed:
+                await self.on_close(interval, closed)
+
+    async def handle_message(self, message: str) -> None:
+        """
+        Apply one combined-stream kline message to the store, batching the candle if it closed.
+        """
+        data = json.loads(message).get('data', {})
+        kline = data.get('k')
+        if data.get('e') != 'kline' or kline is None or not kline['x']:
+            return
+        symbol, interval = kline['s'], kline['i']
+        candle = pd.DataFrame({
+            'Date': [pd.to_datetime(kline['t'], unit='ms')],
+            'Open': [float(kline['o'])],
+            'High': [float(kline['h'])],
+            'Low': [float(kline['l'])],
+            'Close': [float(kline['c'])],
+            'Volume': [float(kline['v'])],
+        })
+        frame = self.checker.store.merge(symbol, interval, candle)[-self.history:].to_frame()
+        open_time = candle['Date'].iloc[0]
+        self._last_closed[(symbol, interval)] = open_time
+        key = (interval, open_time)
+        self._pending.setdefault(key, {})[symbol] = frame
+        if len(self._pending[key]) == len(self.symbols):
+            flush = self._flushes.pop(key, None)
+            if flush is not None:
+                flush.cancel()
+            await self._flush(key)
+        elif key not in self._flushes:
+            self._flushes[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: Tuple[str, pd.Timestamp]) -> None:
+        await asyncio.sleep(self.batch_window)
+        self._flushes.pop(key, None)
+        await self._flush(key)
+
+    async def _flush(self, key: Tuple[str, pd.Timestamp]) -> None:
+        closed = self._pending.pop(key, None)
+        if closed:
+            await self.on_close(key[0], closed)
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from binance.helpers import interval_to_milliseconds
+
+from data.archive import ARCHIVE_COLUMNS, KlineArchive
+from data.synthetic import synthetic_candles
+from data.timeframes import DAY_MS, resample_candles
+
+
+class SimulatedClock:
+    """
+    A clock that only moves when told to, for replaying ticks faster than real time.
+    """
+
+    def __init__(self, start: pd.Timestamp):
+        self.now = pd.Timestamp(start)
+
+    def now_ms(self) -> int:
+        return self.now.value // 1_000_000
+
+    def advance_to(self, moment: pd.Timestamp) -> None:
+        moment = pd.Timestamp(moment)
+        if moment < self.now:
+            raise ValueError(f"The clock cannot go back from {self.now} to {moment}")
+        self.now = moment
+
+
+class ReplayClient:
+    """
+    Stand-in for `binance.client.Client` that serves stored candles up to a simulated time.
+
+    Pass it to `PriceChecker(client=...)`: the checker then runs exactly as it does
+    live, candle store and incremental fetches included, but `get_klines` only
+    returns candles that had opened by `clock.now`. The newest of those plays the
+    still-open candle; it is served with its final values, which the scheduler
+    never reads because it drops the open candle.
+
+    Candles of intervals that were not loaded are resampled from the base interval.
+    """
+
+    def __init__(self, clock: SimulatedClock, base_interval: str = "15m"):
+        self.clock = clock
+        self.base_interval = base_interval
+        self.response = None
+        self._series: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+    def load(self, symbol: str, candles: pd.DataFrame, interval: Optional[str] = None) -> None:
+        """
+        Add the candles of a symbol, in the `PriceChecker.fetch_candles` layout.
+        """
+        columns = {'Date': candles['Date'].to_numpy(dtype='datetime64[ms]').astype(np.int64)}
+        for column in ARCHIVE_COLUMNS[1:]:
+            columns[column] = candles[column].to_numpy(dtype=float)
+        self._series[(symbol, interval or self.base_interval)] = columns
+
+    @classmethod
+    def from_frames(cls, clock: SimulatedClock, frames: Dict[str, pd.DataFrame],
+                    base_interval: str = "15m") -> 'ReplayClient':
+        client = cls(clock, base_interval)
+        for symbol, candles in frames.items():
+            client.load(symbol, candles)
+        return client
+
+    @classmethod
+    def from_archive(cls, clock: SimulatedClock, archive: KlineArchive, symbols: List[str],
+                     base_interval: str = "15m", start_time: Optional[int] = None) -> 'ReplayClient':
+        """
+        Replay candles recorded with `data.archive.download_history` or the scheduler's ARCHIVE_DIR.
+        """
+        return cls.from_frames(clock, {symbol: archive.read(symbol, base_interval, start_time=start_time)
+                                       for symbol in symbols}, base_interval)
+
+    @classmethod
+    def synthetic(cls, clock: SimulatedClock, symbols: List[str], length: int, seed: int = 0,
+                  base_interval: str = "15m") -> 'ReplayClient':
+        """
+        Replay `length` synthetic candles per symbol, starting at the clock's current time.
+        """
+        start_time = clock.now_ms()
+        return cls.from_frames(clock, {symbol: synthetic_candles(length, seed + i, base_interval, start_time)
+                                       for i, symbol in enumerate(symbols)}, base_interval)
+
+    def _columns(self, symbol: str, interval: str) -> Dict[str, np.ndarray]:
+        key = (symbol, interval)
+        if key not in self._series:
+            base = self._series.get((symbol, self.base_interval))
+            if base is None:
+                raise ValueError(f"No replay candles for {symbol}")
+            candles = pd.DataFrame({column: base[column] for column in ARCHIVE_COLUMNS[1:]})
+            candles.insert(0, 'Date', pd.to_datetime(base['Date'], unit='ms'))
+            self.load(symbol, resample_candles(candles, interval), interval)
+        return self._series[key]
+
+    def get_ticker(self, symbol: Optional[str] = None, **kwargs):
+        """
+        24hr ticker statistics at the simulated time, computed from the base-interval candles.
+
+        Only the fields the scanner reads are filled in; like Binance, every symbol is
+        returned when `symbol` is omitted.
+        """
+        if symbol is not None:
+            return self._ticker(symbol)
+        symbols = [key[0] for key in self._series if key[1] == self.base_interval]
+        return [ticker for ticker in map(self._ticker, symbols) if ticker is not None]
+
+    def _ticker(self, symbol: str) -> Optional[dict]:
+        columns = self._columns(symbol, self.base_interval)
+        # Only the candles closed by now: the open candle is served with its final values, which
+        # would make the ticker run ahead of the market
+        now = self.clock.now_ms() - interval_to_milliseconds(self.base_interval)
+        first = int(np.searchsorted(columns['Date'], now - DAY_MS, side='right'))
+        last = int(np.searchsorted(columns['Date'], now, side='right'))
+        if last == 0:
+            return None
+        first = min(first, last - 1)
+        open_price, last_price = columns['Open'][first], columns['Close'][last - 1]
+        quote_volume = float(np.dot(columns['Close'][first:last], columns['Volume'][first:last]))
+        return {
+            'symbol': symbol,
+            'lastPrice': repr(float(last_price)),
+            'openPrice': repr(float(open_price)),
+            'priceChangePercent': repr(float((last_price - open_price) / open_price * 100)),
+            'highPrice': repr(float(columns['High'][first:last].max())),
+            'lowPrice': repr(float(columns['Low'][first:last].min())),
+            'volume': repr(float(columns['Volume'][first:last].sum())),
+            'quoteVolume': repr(quote_volume),
+        }
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500, startTime: Optional[int] = None,
+                   **kwargs) -> list:
+        columns = self._columns(symbol, interval)
+        dates = columns['Date']
+        visible = int(np.searchsorted(dates, self.clock.now_ms(), side='right'))
+        if startTime is not None:
+            first = int(np.searchsorted(dates, startTime))
+            last = max(first, min(visible, first + limit))
+        else:
+            last = visible
+            first = max(0, last - limit)
+        close_offset = interval_to_milliseconds(interval) - 1
+        rows = zip(*(columns[column][first:last].tolist() for column in ARCHIVE_COLUMNS))
+        return [[open_time, o, h, l, c, v, open_time + close_offset, 0.0, 0, 0.0, 0.0, '0']
+                for open_time, o, h, l, c, v in rows]
@@ -0,0 +1,103 @@
+from bisect import bisect_left
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from binance.helpers import interval_to_milliseconds
+
+# Open time of the first synthetic candle, 2024-01-01 00:00 UTC in milliseconds
+DEFAULT_START = 1704067200000
+
+
+def synthetic_candles(length: int, seed: int = 0, interval: str = "15m", start_time: int = DEFAULT_START,
+                      price: float = 100.0, volatility: float = 0.01) -> pd.DataFrame:
+    """
+    Generate a random-walk OHLCV series in the `PriceChecker.fetch_candles` layout.
+
+    The same seed always gives the same candles, so benchmark and simulation
+    runs are reproducible.
+
+    :param length: int - Number of candles.
+    :param seed: int - Random seed; use a different one per symbol.
+    :param interval: str - Kline interval between open times.
+    :param start_time: int - Open time of the first candle in milliseconds.
+    :param price: float - Price the walk starts from.
+    :param volatility: float - Standard deviation of the log return per candle.
+    :return: pd.DataFrame - Columns 'Date', 'Open', 'High', 'Low', 'Close' and 'Volume'.
+    """
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, volatility, length)))
+    open_ = np.r_[price, close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, volatility, length))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, volatility, length))
+    dates = start_time + np.arange(length, dtype=np.int64) * interval_to_milliseconds(interval)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(dates, unit='ms'),
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': rng.lognormal(5, 1, length),
+    })
+
+
+def synthetic_symbols(count: int) -> List[str]:
+    return [f"SYN{i}USDT" for i in range(count)]
+
+
+def synthetic_universe(symbols: List[str], length: int, seed: int = 0, interval: str = "15m") -> List[pd.DataFrame]:
+    """
+    Generate independent candles for each symbol, seeded from `seed` and the symbol's position.
+    """
+    return [synthetic_candles(length, seed + i, interval) for i, symbol in enumerate(symbols)]
+
+
+def to_klines(candles: pd.DataFrame, interval: str = "15m") -> list:
+    """
+    Convert candles back into raw Binance kline lists, as returned by `Client.get_klines`.
+    """
+    open_times = candles['Date'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    close_offset = interval_to_milliseconds(interval) - 1
+    return [
+        [int(open_time), repr(o), repr(h), repr(l), repr(c), repr(v), int(open_time) + close_offset,
+         '0', 0, '0', '0', '0']
+        for open_time, o, h, l, c, v in zip(open_times, candles['Open'], candles['High'], candles['Low'],
+                                            candles['Close'], candles['Volume'])
+    ]
+
+
+class SyntheticClient:
+    """
+    Offline stand-in for `binance.client.Client` that serves synthetic klines.
+
+    Each (symbol, interval) gets its own seeded random walk of `length` candles,
+    ending at `end_time` if given. Pass it as `PriceChecker(client=...)` to run
+    without network access.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None, length: int = 1000,
+                 seed: int = 0, end_time: Optional[int] = None, **kwargs):
+        self.length = length
+        self.seed = seed
+        self.end_time = end_time
+        self.response = None
+        self._klines = {}
+
+    def _series(self, symbol: str, interval: str) -> list:
+        key = (symbol, interval)
+        if key not in self._klines:
+            start_time = DEFAULT_START
+            if self.end_time is not None:
+                start_time = self.end_time - (self.length - 1) * interval_to_milliseconds(interval)
+            # Seed from the symbol name so the same symbol gets the same walk in every run
+            seed = self.seed + sum(ord(char) * 31 ** i for i, char in enumerate(symbol)) % 2 ** 31
+            candles = synthetic_candles(self.length, seed, interval, start_time)
+            self._klines[key] = to_klines(candles, interval)
+        return self._klines[key]
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500, startTime: Optional[int] = None, **kwargs) -> list:
+        klines = self._series(symbol, interval)
+        if startTime is not None:
+            first = bisect_left(klines, startTime, key=lambda kline: kline[0])
+            return klines[first:first + limit]
+        return klines[-limit:]
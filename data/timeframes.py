@@ -0,0 +1,120 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from data.candle_buffer import CandleBuffer
+from data.data_fetcher import PriceChecker
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def interval_to_milliseconds(interval: str):
+    # Imported on first use; importing python-binance takes most of a second
+    from binance.helpers import interval_to_milliseconds
+    return interval_to_milliseconds(interval)
+
+
+def resample_buffer(candles: CandleBuffer, interval: str) -> CandleBuffer:
+    """
+    Aggregate candles into a higher timeframe with array reductions.
+
+    Buckets are aligned to UTC like Binance klines. The last bucket may be
+    incomplete, just like the still-open candle at the end of a REST response.
+
+    :param candles: CandleBuffer - Candles sorted by open time.
+    :param interval: str - Target interval, e.g. '1h', '4h' or '1d'.
+    :return: CandleBuffer - Resampled candles, one per bucket.
+    """
+    interval_ms = interval_to_milliseconds(interval)
+    times, values = candles.times, candles.values
+    if not len(times):
+        return candles
+    bucket = times // interval_ms * interval_ms
+    # Sorted open times put each bucket in one run of rows; find where each run starts and ends
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.append(starts[1:], len(times)) - 1
+    return CandleBuffer._wrap(bucket[starts], np.array([
+        values[0, starts],
+        np.maximum.reduceat(values[1], starts),
+        np.minimum.reduceat(values[2], starts),
+        values[3, ends],
+        np.add.reduceat(values[4], starts),
+    ]))
+
+
+def resample_candles(candles: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Aggregate candles into a higher timeframe, see `resample_buffer`.
+
+    :param candles: pd.DataFrame - Candles in the `PriceChecker.fetch_candles` layout.
+    :param interval: str - Target interval, e.g. '1h', '4h' or '1d'.
+    :return: pd.DataFrame - Resampled candles in the same layout.
+    """
+    result = resample_buffer(CandleBuffer.from_frame(candles), interval).to_frame()
+    result['Date'] = result['Date'].astype(candles['Date'].dtype)
+    return result
+
+
+def closed_timeframes(open_time: pd.Timestamp, intervals: List[str]) -> List[str]:
+    """
+    Return the intervals whose candle closed when the base candle opening at `open_time` started.
+    """
+    open_time_ms = pd.Timestamp(open_time).value // 1_000_000
+    return [interval for interval in intervals if open_time_ms % interval_to_milliseconds(interval) == 0]
+
+
+class TimeframeResampler:
+    """
+    Derives higher-timeframe candles from the base-interval candle store.
+
+    Each higher timeframe is downloaded once to seed its history; after that it
+    is kept up to date by resampling only the newest base candles, so extra
+    timeframes cost no API weight per tick.
+    """
+
+    def __init__(self, checker: PriceChecker, base_interval: str, intervals: List[str], history: int = 300):
+        base_ms = interval_to_milliseconds(base_interval)
+        for interval in intervals:
+            interval_ms = interval_to_milliseconds(interval)
+            if interval_ms is None or interval_ms % base_ms != 0 or DAY_MS % interval_ms != 0:
+                raise ValueError(f"Interval {interval} must be a multiple of {base_interval} that divides a day.")
+        if checker.store is None:
+            raise ValueError("The PriceChecker needs a candle store to derive timeframes from.")
+        self.checker = checker
+        self.base_interval = base_interval
+        self.intervals = [interval for interval in intervals if interval != base_interval]
+        self.history = history
+
+    def seed(self, symbols: List[str]) -> None:
+        """
+        Download the history of every higher timeframe not stored yet for the given symbols.
+        """
+        for interval in self.intervals:
+            missing = [symbol for symbol in symbols if self.checker.store.get(symbol, interval) is None]
+            if missing:
+                self.checker.fetch_buffers(self.history, missing, interval)
+
+    def update(self, symbol: str, base_candles: CandleBuffer) -> Dict[str, CandleBuffer]:
+        """
+        Fold the newest base candles of a symbol into every higher timeframe.
+
+        :param symbol: str - Symbol of the candles.
+        :param base_candles: CandleBuffer - Latest base-interval candles, the last one possibly still open.
+        :return: dict - The latest `history` candles per higher interval, as views of the store.
+        """
+        buffers = {}
+        times = base_candles.times
+        for interval in self.intervals:
+            last_open_time = self.checker.store.last_open_time(symbol, interval)
+            if last_open_time is None or not len(times) or times[0] > last_open_time:
+                # The base candles do not reach back to the start of the bucket to continue, so
+                # resampling them would store a partial bucket; download the interval instead
+                buffers[interval] = self.checker.latest_buffer(self.history, symbol, interval)
+                continue
+            # Rebuild only the newest stored bucket, which may still be filling up, and any after it
+            candles = base_candles[int(np.searchsorted(times, last_open_time)):]
+            if len(candles):
+                self.checker.store.merge(symbol, interval, resample_buffer(candles, interval))
+            buffers[interval] = self.checker.store.get(symbol, interval)[-self.history:]
+        return buffers
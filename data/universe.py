@@ -0,0 +1,234 @@
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.config import (RSI_LOWER, RSI_UPPER, UNIVERSE_EXCLUDE, UNIVERSE_LEVEL_MARGIN, UNIVERSE_MAX_SYMBOLS,
+                           UNIVERSE_MIN_QUOTE_VOLUME, UNIVERSE_PREFILTER, UNIVERSE_QUOTE_ASSET,
+                           UNIVERSE_REFRESH_SECONDS, UNIVERSE_RSI_MARGIN, VOLUME_PERIOD, VOLUME_SPIKE_RATE)
+from data.data_fetcher import PriceChecker
+from utils.rules import Rule, compile_rules
+
+# Kinds of the rules that compare the price with a level, whose levels the prefilter watches
+PRICE_LEVEL_KINDS = ('crossed_above', 'crossed_below', 'reached_from_above', 'reached_from_below',
+                     'breakout_below', 'breakout_above', 'level_break_below', 'level_break_above')
+
+
+class UniverseChange(NamedTuple):
+    added: List[str]
+    removed: List[str]
+
+
+class TickerPrices(NamedTuple):
+    last: float
+    high: float
+    low: float
+    volume: float
+
+    @classmethod
+    def parse(cls, ticker: dict) -> 'TickerPrices':
+        return cls(float(ticker['lastPrice']), float(ticker['highPrice']), float(ticker['lowPrice']),
+                   float(ticker['volume']))
+
+
+def liquid_symbols(tickers: Iterable[dict], quote_asset: str = UNIVERSE_QUOTE_ASSET,
+                   min_quote_volume: float = UNIVERSE_MIN_QUOTE_VOLUME, max_symbols: int = UNIVERSE_MAX_SYMBOLS,
+                   exclude: Sequence[str] = UNIVERSE_EXCLUDE) -> List[str]:
+    """
+    Pick the pairs worth scanning from the 24hr ticker statistics.
+
+    :param tickers: List[dict] - `PriceChecker.fetch_tickers` output.
+    :param quote_asset: str - Only pairs quoted in this asset are kept, e.g. 'USDT'.
+    :param min_quote_volume: float - Minimum 24h volume in the quote asset.
+    :param max_symbols: int - Keep at most this many of the most traded pairs; 0 keeps all.
+    :param exclude: List[str] - Pairs never kept.
+    :return: List[str] - The pairs, most traded first.
+    """
+    excluded = set(exclude)
+    volumes = {}
+    for ticker in tickers:
+        symbol = ticker['symbol']
+        # Binance delisted its leveraged tokens (BTCUPUSDT and the like); any left can go in `exclude`
+        if not symbol.endswith(quote_asset) or symbol == quote_asset or symbol in excluded:
+            continue
+        volume = float(ticker['quoteVolume'])
+        if volume >= min_quote_volume:
+            volumes[symbol] = volume
+    symbols = sorted(volumes, key=lambda symbol: (-volumes[symbol], symbol))
+    return symbols[:max_symbols] if max_symbols > 0 else symbols
+
+
+class SymbolUniverse:
+    """
+    The symbols the scheduler scans, kept up to date from the bulk 24hr ticker.
+
+    With fixed `symbols` the universe never changes; otherwise it is rebuilt with
+    `liquid_symbols` every `refresh_seconds`, and each refresh reports only the
+    added and removed symbols, so the state of the others is kept.
+
+    With `prefilter`, the same ticker request also skips the symbols whose price
+    since they were last fetched could not have triggered a rule. `watch` keeps,
+    per symbol, the levels the price rules compared the price with on the last
+    evaluation (MAs, breakout lows and highs, support and resistance), its RSI and
+    its average volume. A symbol is fetched when:
+
+    - a rule triggered on its last evaluation, so the alert state sees it clear;
+    - a level lies in the price range since its last fetch, that is between the
+      last price then and now, stretched to the 24h high or low when either was
+      exceeded in between, and widened by `level_margin` percent for how far the
+      levels move with a new candle and for wicks inside the range;
+    - its RSI is within `rsi_margin` points of a threshold, or beyond one;
+    - the 24h volume grew by more than a volume spike since its last fetch;
+    - or nothing is known about it yet.
+
+    A wick beyond the range and back that set no new 24h extreme, or a volume
+    spike hidden by older volume leaving the 24h window, can still be missed;
+    `level_margin` trades the former off against the symbols fetched. A skipped
+    symbol's candles are caught up by the next incremental fetch.
+    """
+
+    def __init__(self, checker: PriceChecker, symbols: Optional[Sequence[str]] = None,
+                 quote_asset: str = UNIVERSE_QUOTE_ASSET, min_quote_volume: float = UNIVERSE_MIN_QUOTE_VOLUME,
+                 max_symbols: int = UNIVERSE_MAX_SYMBOLS, exclude: Sequence[str] = UNIVERSE_EXCLUDE,
+                 refresh_seconds: float = UNIVERSE_REFRESH_SECONDS, prefilter: bool = UNIVERSE_PREFILTER,
+                 level_margin: float = UNIVERSE_LEVEL_MARGIN, rsi_margin: float = UNIVERSE_RSI_MARGIN,
+                 rules: Optional[List[Rule]] = None, clock: Callable[[], float] = time.time):
+        """
+        :param checker: PriceChecker - Makes the ticker requests, within its weight limit.
+        :param symbols: List[str] - Fixed symbols; the liquid pairs are selected when omitted.
+        :param prefilter: bool - Skip the symbols that could not have triggered a rule.
+        :param level_margin: float - Percentage the price range is widened by before it is compared with the levels.
+        :param rsi_margin: float - RSI points from a threshold within which a symbol is always fetched.
+        :param rules: List[Rule] - Rules whose price levels are watched, `compile_rules()` by default.
+        :param clock: Callable - Current time in seconds, e.g. a simulated clock's.
+        """
+        self.checker = checker
+        self.fixed = symbols is not None
+        self.symbols: List[str] = list(symbols) if symbols is not None else []
+        self.quote_asset = quote_asset
+        self.min_quote_volume = min_quote_volume
+        self.max_symbols = max_symbols
+        self.exclude = list(exclude)
+        self.refresh_seconds = refresh_seconds
+        self.prefilter = prefilter
+        self.level_margin = level_margin
+        self.rsi_margin = rsi_margin
+        self.rules = [rule for rule in (rules if rules is not None else compile_rules())
+                      if rule.kind in PRICE_LEVEL_KINDS]
+        self.clock = clock
+        self._refreshed_at: Optional[float] = None
+        # Ticker prices of each symbol when it was last fetched
+        self._reference: Dict[str, TickerPrices] = {}
+        # (levels, RSI, average volume, whether a rule triggered) of each symbol's last evaluation, per interval
+        self._watched: Dict[str, Dict[str, Tuple[np.ndarray, float, float, bool]]] = {}
+
+    def refresh_due(self) -> bool:
+        return not self.fixed and (self._refreshed_at is None
+                                   or self.clock() - self._refreshed_at >= self.refresh_seconds)
+
+    def refresh(self, tickers: Optional[List[dict]] = None) -> UniverseChange:
+        """
+        Rebuild the liquid pairs and return what changed; fixed universes never change.
+
+        :param tickers: List[dict] - Ticker statistics already fetched this tick, if any.
+        """
+        if self.fixed:
+            return UniverseChange([], [])
+        if tickers is None:
+            tickers = self.checker.fetch_tickers()
+        symbols = liquid_symbols(tickers, self.quote_asset, self.min_quote_volume, self.max_symbols, self.exclude)
+        current, selected = set(self.symbols), set(symbols)
+        change = UniverseChange([symbol for symbol in symbols if symbol not in current],
+                                [symbol for symbol in self.symbols if symbol not in selected])
+        for symbol in change.removed:
+            self._reference.pop(symbol, None)
+            self._watched.pop(symbol, None)
+        self.symbols = symbols
+        self._refreshed_at = self.clock()
+        return change
+
+    def watch(self, interval: str, rows: pd.DataFrame, signals: pd.DataFrame) -> None:
+        """
+        Remember what may trigger the evaluated symbols' rules next, for the prefilter.
+
+        :param interval: str - Timeframe the rows were evaluated on.
+        :param rows: pd.DataFrame - Latest features per symbol, indexed by symbol, e.g. `evaluate_candles` rows.
+        :param signals: pd.DataFrame - The signals triggered on the rows, before any alert state filtering.
+        """
+        if not self.prefilter or rows.empty:
+            return
+        levels = [rule.value(rows) for rule in self.rules]
+        levels = np.column_stack(levels) if levels else np.empty((len(rows), 0))
+        rsi = rows['RSI'].to_numpy(dtype=float)
+        average_volume = rows[f'Average_Volume_{VOLUME_PERIOD}'].to_numpy(dtype=float)
+        triggered = set(signals['Symbol'])
+        for symbol, symbol_levels, symbol_rsi, symbol_volume in zip(rows.index, levels, rsi, average_volume):
+            self._watched.setdefault(symbol, {})[interval] = (
+                symbol_levels[~np.isnan(symbol_levels)], symbol_rsi, symbol_volume, symbol in triggered)
+
+    def may_trigger(self, symbol: str, prices: TickerPrices) -> bool:
+        """
+        Whether the symbol's rules may trigger, given its ticker prices now; see the class docstring.
+        """
+        reference = self._reference.get(symbol)
+        watched = self._watched.get(symbol)
+        if reference is None or not watched:
+            return True
+        top, bottom = max(prices.last, reference.last), min(prices.last, reference.last)
+        # A new 24h extreme since the last fetch was reached in between
+        if prices.high > reference.high:
+            top = prices.high
+        if prices.low < reference.low:
+            bottom = prices.low
+        top *= 1 + self.level_margin / 100
+        bottom *= 1 - self.level_margin / 100
+        # Volume leaving the 24h window only lowers the growth, so this much at least was traded
+        traded = prices.volume - reference.volume
+        for levels, rsi, average_volume, triggered in watched.values():
+            if triggered or np.any((levels >= bottom) & (levels <= top)):
+                return True
+            # NaN, e.g. too little history, fails the comparisons and fetches the symbol
+            if not RSI_LOWER + self.rsi_margin < rsi < RSI_UPPER - self.rsi_margin:
+                return True
+            if traded > VOLUME_SPIKE_RATE * average_volume:
+                return True
+        return False
+
+    def movers(self, tickers: Optional[List[dict]] = None) -> List[str]:
+        """
+        Return the symbols to fetch this tick and remember their ticker prices.
+
+        Symbols never fetched or evaluated before, or missing from the tickers, are always returned.
+
+        :param tickers: List[dict] - Ticker statistics already fetched this tick, if any.
+        """
+        if not self.prefilter:
+            return list(self.symbols)
+        if tickers is None:
+            tickers = self.checker.fetch_tickers()
+        prices = {ticker['symbol']: ticker for ticker in tickers}
+        movers = []
+        for symbol in self.symbols:
+            ticker = prices.get(symbol)
+            if ticker is None:
+                movers.append(symbol)
+                continue
+            ticker = TickerPrices.parse(ticker)
+            if self.may_trigger(symbol, ticker):
+                movers.append(symbol)
+                self._reference[symbol] = ticker
+        return movers
+
+    def tick(self) -> Tuple[List[str], UniverseChange]:
+        """
+        Refresh the universe when due and pick the symbols to fetch, with at most one ticker request.
+
+        :return: tuple - The symbols to fetch this tick and the change of the universe.
+        """
+        tickers = None
+        change = UniverseChange([], [])
+        if self.refresh_due():
+            tickers = self.checker.fetch_tickers()
+            change = self.refresh(tickers)
+        return self.movers(tickers), change
@@ -1,22 +1,50 @@
+from prometheus_client import generate_latest
+
+from utils.metrics import CONTENT_TYPE, REGISTRY, mark_startup, tick_age
 from flask import Flask
-from scheduler.job_scheduler import run_scheduler
+from werkzeug.serving import make_server
+from config.config import HEALTH_MAX_TICK_AGE, INGEST_MODE, SYMBOLS
 import threading
 from typing import List
 
 app = Flask(__name__)
+# Thread running the scheduler (or the kline stream)
+worker = None
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
+    if worker is None or not worker.is_alive():
+        return "Scheduler is not running", 503
+    age = tick_age()
+    if age > HEALTH_MAX_TICK_AGE:
+        return f"No successful tick for {age:.0f}s", 503
     return "OK", 200
 
+# Prometheus scrape endpoint
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return generate_latest(REGISTRY), 200, {'Content-Type': CONTENT_TYPE}
+
 def start_scheduler(tokens: List[str]):
-    run_scheduler(tokens)  # Or asyncio.run(run_scheduler()) if it's an async function
+    # The scheduler pulls in pandas, scipy, python-binance and telegram; importing it
+    # here, on the worker thread, lets the HTTP server bind without waiting for them
+    from scheduler.job_scheduler import run_scheduler, run_stream
+    mark_startup('imports')
+    if INGEST_MODE == "stream":
+        run_stream(tokens)
+    else:
+        run_scheduler(tokens)
 
 if __name__ == "__main__":
-    tokens = ["BTCUSDT", "SOLUSDT", "XRPUSDT"]
-    # Run the scheduler in a separate thread
-    threading.Thread(target=run_scheduler, args=(tokens, ), daemon=True).start()
+    # An empty SYMBOLS scans every liquid pair of UNIVERSE_QUOTE_ASSET instead
+    tokens = SYMBOLS
+    # Run the scheduler (or the kline stream) in a separate thread
+    worker = threading.Thread(target=start_scheduler, args=(tokens, ), daemon=True)
+    worker.start()
 
-    # Start the Flask app
-    app.run(host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Start the Flask app; the server binds its socket on creation, so 'http' marks when
+    # the health endpoint can accept connections
+    server = make_server("0.0.0.0", 8000, app, threaded=True)
+    mark_startup('http')
+    server.serve_forever()
@@ -1,98 +1,391 @@
-from apscheduler.schedulers.blocking import BlockingScheduler
-from datetime import timedelta
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 
 import asyncio
+import time
 import pandas as pd
+from data.archive import KlineArchive
+from data.candle_buffer import CandleBuffer
+from data.candle_store import CandleStore
 from data.data_fetcher import PriceChecker
-from utils.ma import calculate_moving_average, notify_cross, calculate_min_max_scalar
+from data.timeframes import TimeframeResampler, closed_timeframes
+from data.universe import SymbolUniverse
+from config.config import (ALERT_CHARTS, ALERT_STATE_PATH, ARCHIVE_DIR, EVAL_PROCESSES, INTERVAL, LEVEL_LOOKBACK,
+                           SHARD_LEASE_SECONDS, TIMEFRAMES)
+from scheduler.parallel import ParallelEvaluator
+from scheduler.sharding import Shard, make_coordinator
+from utils.analyze import break_levels
+from utils.ma import calculate_moving_average, calculate_min_max_scalar
 from utils.rsi import calculate_rsi_wilders
-from utils.rsi_divergence import find_rsi_divergences
-from bot.telegram_bot import TelegramBot
-from typing import List
-
-async def notify_signal(dfs: List[pd.DataFrame], symbols=List[str]):
-    bot = TelegramBot()
-    horizon = "\n---------------\n"
-    time_obj = dfs[0].iloc[-1]['Date'].to_pydatetime()
-    new_time = time_obj + timedelta(hours=7)
-    allMessages = "At {}: ".format(new_time.strftime('%Y-%m-%d %H:%M:%S'))
-    isMessage = False
-    for (df, symbol) in zip(dfs, symbols):
-        last_row = df.iloc[-1]
-        # Convert the string to a datetime object
-        is_signal = False
-        message = horizon
-        message += "{}:".format(symbol) 
-    
-        if last_row['RSI'] < 35 or last_row['RSI'] > 65:
-            is_signal = True
-            message += "\n- RSI is over: {}".format(last_row['RSI'])
-        if last_row['Volume'] > last_row['Average_Volume_20']:
-            rate = last_row['Volume'] / last_row['Average_Volume_20']
-            if rate > 1.5:
-                is_signal = True
-                message += "\n- Sudden trading volume occurred. Rate: {}, Volume: {}, Average_Volume_20: {}".format(rate, last_row['Volume'], last_row['Average_Volume_20'])
-        cross = notify_cross(last_row, 'MA20')
-        if cross != "":
-            is_signal = True
-            message += cross
-        cross = notify_cross(last_row, 'MA50')
-        if cross != "":
-            is_signal = True
-            message += cross
-        cross = notify_cross(last_row, 'MA200')
-        if cross != "":
-            is_signal = True
-            message += cross
-        periods = [20, 50, 200]
-        min_max_scalar = calculate_min_max_scalar(df, periods)
-        for p in periods:
-            if last_row['Close'] < min_max_scalar[f'MinLow{p}']:
-                is_signal = True
-                message += "\n- The price breaks below the {}-candle low".format(p)
-            if last_row['Close'] > min_max_scalar[f'MaxHigh{p}']:
-                is_signal = True
-                message += "\n- The price breaks above the {}-candle high".format(p)
-        if is_signal:
-            message += "\n- Percentage change: {} to {}".format(last_row['Percent_Change_Display'], last_row['Close'])
-            allMessages += message
-            isMessage = True
-    if isMessage:
-        await bot.send_message(allMessages)
+from utils.panel import build_panel, compute_indicators, latest_rows
+from utils.pivot import previous_pivot_levels
+from utils.streaming import IndicatorEngine
+from utils.rules import Rule, compile_rules, evaluate_rules
+from bot.alert_state import AlertState
+from bot.messages import format_signals, signals_key
+from bot.delivery import TelegramDelivery
+from visualizer.render import ChartRenderer
+from utils.metrics import ALERTS_SENT, log_spans, mark_startup, mark_tick, span
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_RULES = compile_rules()
+
+def tick_trigger() -> CronTrigger:
+    """
+    When ticks run: 20 seconds after each 15-minute candle opens, giving Binance time to close the previous one.
+    """
+    return CronTrigger(second=20, minute='0,15,30,45', timezone='UTC')
+
+async def notify_signal(rows: pd.DataFrame, rules: List[Rule] = None, interval: str = None,
+                        delivery: TelegramDelivery = None, alerts: AlertState = None):
+    """
+    Send one Telegram message with every symbol whose latest candle triggers a signal.
+    :param rows: pd.DataFrame indexed by symbol, one row per symbol holding the latest
+        candle, its indicators and the MinLow{p}/MaxHigh{p} breakout levels.
+    :param rules: The rules to evaluate, compiled from the config by default.
+    :param interval: The timeframe of the rows, shown in the message when given.
+    :param delivery: A started delivery queue; without one the message is sent right away.
+    :param alerts: Alert state of the earlier ticks; only the signals it lets through are sent.
+    """
+    signals = evaluate_rules(rows, rules if rules is not None else DEFAULT_RULES)
+    if alerts is not None and not rows.empty:
+        signals = alerts.update(signals, rows.index, interval or INTERVAL, pd.Timestamp(rows['Date'].iloc[0]).timestamp())
+    await send_signals(signals, rows, interval, delivery)
+
+async def send_signals(signals: pd.DataFrame, rows: pd.DataFrame, interval: str = None,
+                       delivery: TelegramDelivery = None):
+    """
+    Send the already evaluated signals as one Telegram message, if there are any.
+    :param rows: pd.DataFrame indexed by symbol, holding at least the symbols of the signals.
+    :param delivery: A started delivery queue; the message is queued on it without waiting for the send.
+    """
+    if signals.empty:
+        return
+    for rule, count in signals['Rule'].value_counts().items():
+        ALERTS_SENT.labels(rule=rule).inc(count)
+    message = format_signals(signals, rows, interval)
+    key = signals_key(signals, interval)
+    if delivery is not None:
+        delivery.submit(message, key=key)
+        return
+    async with TelegramDelivery() as delivery:
+        delivery.submit(message, key=key)
+
+async def send_charts(renderer: ChartRenderer, signals: pd.DataFrame, candles: List[CandleBuffer],
+                      tokens: List[str], interval: str, delivery: TelegramDelivery = None):
+    """
+    Send a chart of every symbol with a signal; the charts render in the renderer's worker processes.
+    :param candles: Per-symbol candles in the order of `tokens`, the last one still open.
+    :param delivery: A started delivery queue; without one the charts are sent right away.
+    """
+    if signals.empty:
+        return
+    symbols = list(signals['Symbol'].unique())
+    positions = {token: i for i, token in enumerate(tokens)}
+    with span('render'):
+        charts = await asyncio.gather(*(renderer.render(symbol, interval, candles[positions[symbol]][:-1])
+                                        for symbol in symbols), return_exceptions=True)
+    rendered = []
+    for symbol, chart in zip(symbols, charts):
+        if isinstance(chart, Exception):
+            print(f"Rendering the {symbol} {interval} chart failed: {chart}")
+        else:
+            rendered.append((chart, f"{symbol} {interval}"))
+    if delivery is not None:
+        for chart, caption in rendered:
+            delivery.submit_photo(chart, caption=caption)
+        return
+    async with TelegramDelivery() as delivery:
+        for chart, caption in rendered:
+            delivery.submit_photo(chart, caption=caption)
         
 def get_price(data: pd.DataFrame) -> pd.DataFrame:
-    price = data.iloc[:-1].copy()
-    price['MA20'] = calculate_moving_average(price['Close'], 20)
-    price['MA50'] = calculate_moving_average(price['Close'], 50)
-    price['MA200'] = calculate_moving_average(price['Close'], 200)
-    price['RSI'] = calculate_rsi_wilders(price['Close'])
-    price['Average_Volume_20'] = calculate_moving_average(price['Volume'], 20)
-    price["Percent_Change"] = ((price["Close"] - price["Open"]) / price["Open"]) * 100
-    price["Percent_Change_Display"] = price["Percent_Change"].apply(lambda x: f"{x:+.2f}%")
+    with span('indicators'):
+        price = data.iloc[:-1].copy()
+        price['MA20'] = calculate_moving_average(price['Close'], 20)
+        price['MA50'] = calculate_moving_average(price['Close'], 50)
+        price['MA200'] = calculate_moving_average(price['Close'], 200)
+        price['RSI'] = calculate_rsi_wilders(price['Close'])
+        price['Average_Volume_20'] = calculate_moving_average(price['Volume'], 20)
+        # Formatted as text only for the symbols that alert, in `bot.messages.format_signals`
+        price["Percent_Change"] = ((price["Close"] - price["Open"]) / price["Open"]) * 100
     return price
 
-async def scheduled_task(tokens: List[str]):
-    checker = PriceChecker()
-    prices = []
-    for token in tokens:
-        data = checker.fetch_candles(300, token)
-        prices.append(get_price(data))
-    await notify_signal(prices, tokens)
-    
-def run_scheduled_task(tokens: List[str]):
-    asyncio.run(scheduled_task(tokens))  # Wrap async task
+def latest_signal_rows(prices: List[pd.DataFrame], symbols: List[str], periods=(20, 50, 200)) -> pd.DataFrame:
+    """
+    Turn per-symbol `get_price` frames into the rows `notify_signal` expects.
+    Breakout and support/resistance levels come from the candles before the latest one.
+    """
+    rows = []
+    for price in prices:
+        row = price.iloc[-1].to_dict()
+        row.update(calculate_min_max_scalar(price.iloc[:-1], periods))
+        if LEVEL_LOOKBACK > 0:
+            pivots = previous_pivot_levels(price['Date'].to_numpy(), price['High'], price['Low'], price['Close'])
+            levels = break_levels(price['High'], price['Low'], price['Close'], pivots=pivots)
+            row.update({name: values[0] for name, values in levels.items()})
+        rows.append(row)
+    return pd.DataFrame(rows, index=pd.Index(symbols, name='Symbol'))
+
+def evaluate_candles(candles: List[CandleBuffer], tokens: List[str],
+                     evaluator: ParallelEvaluator = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Evaluate the latest closed candle of every symbol.
+    :param candles: Per-symbol candles, the last one still open.
+    :return: The triggered signals and the rows of the symbols' features they refer to.
+    """
+    # Drop the candle that is still open, then compute every symbol in one pass
+    panel = build_panel([data[:-1] for data in candles], tokens)
+    if evaluator is not None:
+        # Indicators and rules run in the worker processes, so they are timed together
+        with span('evaluate'):
+            return evaluator.evaluate(panel)
+    with span('indicators'):
+        rows = latest_rows(panel, compute_indicators(panel))
+    if LEVEL_LOOKBACK > 0:
+        with span('levels'):
+            pivots = previous_pivot_levels(panel['Date'], panel['High'], panel['Low'], panel['Close'])
+            rows = rows.assign(**break_levels(panel['High'], panel['Low'], panel['Close'], pivots=pivots))
+    with span('rules'):
+        return evaluate_rules(rows, DEFAULT_RULES), rows
+
+def archive_closed(archive: KlineArchive, tokens: List[str], datas: List[CandleBuffer]):
+    for token, data in zip(tokens, datas):
+        archive.append_new(token, INTERVAL, data[:-1].to_frame())
+
+def derive_timeframes(resampler: TimeframeResampler, tokens: List[str],
+                      datas: List[CandleBuffer]) -> Dict[str, List[CandleBuffer]]:
+    resampler.seed(tokens)
+    derived = [resampler.update(token, data) for token, data in zip(tokens, datas)]
+    return {interval: [candles[interval] for candles in derived] for interval in resampler.intervals}
+
+def select_symbols(universe: SymbolUniverse, checker: PriceChecker, shard: Shard = None) -> List[str]:
+    """
+    Pick the symbols to fetch this tick, dropping the stored candles of symbols that left the universe.
+    With a shard, only its symbols are picked, and none while another instance runs the shard.
+    """
+    if shard is not None and not shard.elect():
+        return []
+    tokens, change = universe.tick()
+    if change.added or change.removed:
+        print(f"Universe of {len(universe.symbols)} symbols: added {', '.join(change.added) or 'none'}, "
+              f"removed {', '.join(change.removed) or 'none'}")
+    if checker.store is not None:
+        for symbol in change.removed:
+            checker.store.clear(symbol)
+    return shard.select(tokens) if shard is not None else tokens
+
+def shard_alert_state(shard: Shard, path: Optional[str] = ALERT_STATE_PATH) -> AlertState:
+    """
+    Create the alert state of this instance's shard.
+    With a coordinator, the shard's replicas share it in a file under `path`, reloaded whenever
+    this instance takes over, so the conditions the previous active replica alerted are not
+    alerted again.
+    """
+    if shard.coordinator is not None and not path:
+        raise ValueError("SHARD_COORDINATION needs ALERT_STATE_PATH on storage the shard's replicas share")
+    alerts = AlertState(path=shard.state_path(path) if path else None)
+    shard.on_activate = alerts.reload
+    return alerts
+
+async def renew_lease(shard: Shard, seconds: float = SHARD_LEASE_SECONDS / 3):
+    """
+    Elect the shard every `seconds`, so its lease holds however far apart the ticks or candle closes are.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(seconds)
+        try:
+            await loop.run_in_executor(None, shard.elect)
+        except Exception as e:
+            print(f"Renewing the lease of {shard.name} failed: {e!r}")
+
+async def scheduled_task(tokens: List[str], checker: PriceChecker, resampler: TimeframeResampler = None,
+                         archive: KlineArchive = None, evaluator: ParallelEvaluator = None,
+                         delivery: TelegramDelivery = None, renderer: ChartRenderer = None,
+                         universe: SymbolUniverse = None, alerts: AlertState = None, shard: Shard = None):
+    """
+    Run one tick, recording its duration and outcome in the metrics and logging its spans.
+    With a universe, its symbols for the tick (of `shard` only, if given) replace `tokens`,
+    and a tick where none of them moved enough to be fetched, or where another instance
+    runs the shard, does nothing.
+    """
+    start = time.perf_counter()
+    try:
+        if universe is not None:
+            with span('universe'):
+                tokens = await asyncio.get_running_loop().run_in_executor(None, select_symbols, universe, checker,
+                                                                          shard)
+        if tokens:
+            await run_tick(tokens, checker, resampler, archive, evaluator, delivery, renderer, alerts, universe)
+    except Exception:
+        mark_tick(time.perf_counter() - start, success=False)
+        log_spans('tick', status='failure', symbols=len(tokens))
+        raise
+    mark_tick(time.perf_counter() - start)
+    log_spans('tick', status='success', symbols=len(tokens), seconds=round(time.perf_counter() - start, 3))
+
+async def run_tick(tokens: List[str], checker: PriceChecker, resampler: TimeframeResampler = None,
+                   archive: KlineArchive = None, evaluator: ParallelEvaluator = None,
+                   delivery: TelegramDelivery = None, renderer: ChartRenderer = None,
+                   alerts: AlertState = None, universe: SymbolUniverse = None):
+    """
+    Fetch the latest candles and send the signals of every timeframe that just closed,
+    followed by a chart of each alerting symbol when a renderer is given.
+    With an alert state, only the signals that it lets through are sent.
+    With a universe, the evaluated rows are passed to its prefilter.
+    Blocking fetches and computation run in the loop's executor, so queued alerts keep
+    being delivered meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    with span('fetch'):
+        datas = await loop.run_in_executor(None, checker.fetch_buffers, 300, tokens)
+    pending = []
+    if archive is not None:
+        pending.append(loop.run_in_executor(None, archive_closed, archive, tokens, datas))
+    frames = {INTERVAL: datas}
+    if resampler is not None:
+        frames.update(await loop.run_in_executor(None, derive_timeframes, resampler, tokens, datas))
+    # The newest base candle has just opened; evaluate every timeframe whose candle closed with it.
+    # A symbol may have no candles, e.g. one just listed or delisted, so the first with any is used
+    newest = next((data for data in datas if len(data)), None)
+    if newest is None:
+        print(f"No candles for any of the {len(tokens)} symbols; skipping the tick")
+        await asyncio.gather(*pending)
+        return
+    opened_at = pd.Timestamp(newest['Date'][-1])
+    intervals = closed_timeframes(opened_at, list(frames))
+    results = await asyncio.gather(*(
+        loop.run_in_executor(None, evaluate_candles, frames[interval], tokens, evaluator) for interval in intervals
+    ))
+    for interval, (signals, rows) in zip(intervals, results):
+        if universe is not None:
+            universe.watch(interval, rows, signals)
+        if alerts is not None:
+            # Every evaluated token, so its rules that did not trigger are cleared
+            signals = alerts.update(signals, tokens, interval, opened_at.timestamp())
+        await send_signals(signals, rows, interval if len(frames) > 1 else None, delivery)
+        if renderer is not None:
+            await send_charts(renderer, signals, frames[interval], tokens, interval, delivery)
+    await asyncio.gather(*pending)
+
+async def schedule_signals(tokens: List[str], checker: PriceChecker = None):
+    """
+    Run `scheduled_task` every 15 minutes on this event loop.
+    The Binance client, the Telegram connection pool and the worker processes stay
+    open between ticks, and a tick still running when the next one is due makes
+    the next one skip rather than overlap it.
+    :param tokens: The symbols to scan; when empty, the liquid pairs of the 24hr ticker are scanned.
+    """
+    # Keep one checker for the scheduler's lifetime so its candle store persists across ticks
+    checker = checker or PriceChecker(store=CandleStore())
+    universe = SymbolUniverse(checker, tokens or None)
+    shard = Shard(coordinator=make_coordinator())
+    resampler = TimeframeResampler(checker, INTERVAL, TIMEFRAMES) if TIMEFRAMES != [INTERVAL] else None
+    archive = KlineArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+    evaluator = ParallelEvaluator(EVAL_PROCESSES) if EVAL_PROCESSES > 0 else None
+    renderer = ChartRenderer() if ALERT_CHARTS else None
+    alerts = shard_alert_state(shard)
+    renewal = asyncio.create_task(renew_lease(shard)) if shard.coordinator is not None else None
+    scheduler = AsyncIOScheduler()
+    try:
+        async with TelegramDelivery() as delivery:
+            scheduler.add_job(
+                scheduled_task,
+                tick_trigger(),
+                args=(tokens, checker, resampler, archive, evaluator, delivery, renderer, universe, alerts, shard),
+                max_instances=1,
+                coalesce=True,
+            )
+            scheduler.start()
+            print("Scheduler started...")
+            mark_startup('scheduler')
+            await asyncio.get_running_loop().run_in_executor(None, preload)
+            mark_startup('preloaded')
+            await asyncio.Event().wait()
+    finally:
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+        if evaluator is not None:
+            evaluator.close()
+        if renderer is not None:
+            renderer.close()
+        if renewal is not None:
+            renewal.cancel()
+        alerts.close()
+        shard.close()
+
+def preload():
+    """
+    Import the libraries the indicators load lazily, so the first tick does not pay for them.
+    """
+    import scipy.ndimage  # noqa: F401
+    import scipy.signal  # noqa: F401
 
 def run_scheduler(tokens: List[str]):
-    scheduler = BlockingScheduler()
-    scheduler.add_job(
-        run_scheduled_task, 
-        'cron', 
-        second=20, 
-        minute='0,15,30,45',
-        args=(tokens, )
-    )
-    print("Scheduler started...")
     try:
-        scheduler.start()
+        asyncio.run(schedule_signals(tokens))
+    except (KeyboardInterrupt, SystemExit):
+        print("Scheduler stopped.")
+
+async def stream_signals(tokens: List[str], checker: PriceChecker = None, transport=None,
+                         delivery: TelegramDelivery = None):
+    """
+    Evaluate signals whenever a candle closes on the Binance kline streams.
+    Indicators are updated incrementally per (symbol, interval) from the closed candles.
+    Only the symbols of this instance's shard are streamed; a standby instance of the
+    shard keeps its indicators up to date but does not alert.
+    """
+    # Only the stream mode needs websockets
+    from data.kline_stream import KlineStream
+    checker = checker or PriceChecker(store=CandleStore())
+    delivery = delivery or TelegramDelivery()
+    engines = {}
+    if not tokens:
+        # The streams are subscribed once, so the liquid pairs are selected once at start-up
+        universe = SymbolUniverse(checker)
+        universe.refresh()
+        tokens = universe.symbols
+    shard = Shard(coordinator=make_coordinator())
+    tokens = shard.select(tokens)
+    alerts = shard_alert_state(shard)
+
+    async def on_close(interval: str, candles: Dict[str, pd.DataFrame]):
+        start = time.perf_counter()
+        rows = []
+        with span('indicators'):
+            for symbol, frame in candles.items():
+                engine = engines.setdefault((symbol, interval), IndicatorEngine())
+                row = dict(engine.update_frame(frame))
+                if LEVEL_LOOKBACK > 0:
+                    pivots = previous_pivot_levels(frame['Date'].to_numpy(), frame['High'], frame['Low'],
+                                                   frame['Close'])
+                    levels = break_levels(frame['High'], frame['Low'], frame['Close'], pivots=pivots)
+                    row.update({name: values[0] for name, values in levels.items()})
+                rows.append(row)
+        active = shard.elect()
+        if active:
+            await notify_signal(pd.DataFrame(rows, index=pd.Index(list(candles), name='Symbol')), delivery=delivery,
+                                alerts=alerts)
+        mark_tick(time.perf_counter() - start)
+        log_spans('close', interval=interval, symbols=len(candles), active=active,
+                  seconds=round(time.perf_counter() - start, 3))
+
+    stream = KlineStream(tokens, [INTERVAL], on_close, checker, transport=transport)
+    # A close every INTERVAL may come later than the lease expires, so it is renewed on its own timer
+    renewal = asyncio.create_task(renew_lease(shard)) if shard.coordinator is not None else None
+    print("Kline stream started...")
+    try:
+        async with delivery:
+            await stream.run()
+    finally:
+        if renewal is not None:
+            renewal.cancel()
+        alerts.close()
+        shard.close()
+
+def run_stream(tokens: List[str]):
+    try:
+        asyncio.run(stream_signals(tokens))
     except (KeyboardInterrupt, SystemExit):
-        print("Scheduler stopped.")
\ No newline at end of file
+        print("Kline stream stopped.")
@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.config import LEVEL_LOOKBACK
+from utils.analyze import break_levels
+from utils.panel import PANEL_FIELDS, compute_indicators, latest_rows
+from utils.pivot import previous_pivot_levels
+from utils.rules import Rule, compile_rules, evaluate_rules
+
+# Rules of a worker process, compiled once by `_init_worker`
+_worker_rules: List[Rule] = []
+
+
+def _init_worker() -> None:
+    global _worker_rules
+    _worker_rules = compile_rules()
+
+
+def _evaluate_shard(shm_name: str, shape: Tuple[int, int, int], start: int, stop: int,
+                    symbols: List[str], last_dates: np.ndarray,
+                    pivots: Optional[np.ndarray]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Evaluate the symbols in rows [start, stop) of the shared OHLCV block.
+    The pivot levels of those rows come from the parent, which has the open times of every candle.
+
+    :return: tuple - The triggered signals and the feature rows of the symbols.
+    """
+    # Pool workers share the parent's resource tracker, which unlinks the block only once
+    shm = SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        panel = {field: block[i, start:stop] for i, field in enumerate(PANEL_FIELDS)}
+        panel['symbols'] = np.asarray(symbols, dtype=object)
+        # latest_rows only reads the last date of each row
+        panel['Date'] = last_dates[:, np.newaxis]
+        rows = latest_rows(panel, compute_indicators(panel))
+        if LEVEL_LOOKBACK > 0:
+            rows = rows.assign(**break_levels(panel['High'], panel['Low'], panel['Close'], pivots=pivots))
+        del block, panel
+    finally:
+        shm.close()
+    return evaluate_rules(rows, _worker_rules), rows
+
+
+class ParallelEvaluator:
+    """
+    Evaluates the symbols of a panel across a pool of worker processes.
+
+    The OHLCV arrays are copied once into a shared memory block that every
+    worker maps, instead of pickling DataFrames to each process. Each worker
+    computes the indicators and rules for a contiguous shard of symbols and
+    returns its signals and the latest feature row of each symbol.
+    """
+
+    def __init__(self, processes: int):
+        if processes <= 0:
+            raise ValueError("Processes must be greater than 0")
+        self.processes = processes
+        self.executor = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+
+    def evaluate(self, panel: Dict[str, np.ndarray]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Evaluate every symbol of a panel.
+
+        :param panel: dict - Output of `utils.panel.build_panel`.
+        :return: tuple - The triggered signals (`utils.rules.evaluate_rules` layout)
+            and the latest feature rows of every symbol, indexed by symbol.
+        """
+        symbols = list(panel['symbols'])
+        shape = (len(PANEL_FIELDS),) + panel['Close'].shape
+        shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        try:
+            block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            for i, field in enumerate(PANEL_FIELDS):
+                block[i] = panel[field]
+            del block
+            last_dates = panel['Date'][:, -1]
+            pivots = (previous_pivot_levels(panel['Date'], panel['High'], panel['Low'], panel['Close'])
+                      if LEVEL_LOOKBACK > 0 else None)
+            shards = [shard for shard in np.array_split(np.arange(len(symbols)), self.processes) if len(shard)]
+            futures = [
+                self.executor.submit(_evaluate_shard, shm.name, shape, shard[0], shard[-1] + 1,
+                                     symbols[shard[0]:shard[-1] + 1], last_dates[shard[0]:shard[-1] + 1],
+                                     None if pivots is None else pivots[shard[0]:shard[-1] + 1])
+                for shard in shards
+            ]
+            results = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+        signals = pd.concat([signals for signals, _ in results], ignore_index=True)
+        rows = pd.concat([rows for _, rows in results])
+        return signals, rows
+
+    def close(self) -> None:
+        self.executor.shutdown()
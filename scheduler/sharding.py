@@ -0,0 +1,232 @@
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Sequence
+
+from config.config import SHARD_COORDINATION, SHARD_COUNT, SHARD_ID, SHARD_LEASE_SECONDS, SHARD_VIRTUAL_NODES
+
+
+def _hash(key: str) -> int:
+    # Python's hash() is salted per process, so instances would disagree on it
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring assigning keys to nodes.
+
+    Each node is placed on the ring `virtual_nodes` times, which spreads the keys
+    evenly, and adding or removing a node only moves the keys of its neighbours:
+    going from n to n + 1 nodes moves about 1 / (n + 1) of the keys.
+    """
+
+    def __init__(self, nodes: Sequence[str], virtual_nodes: int = SHARD_VIRTUAL_NODES):
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node")
+        if virtual_nodes <= 0:
+            raise ValueError("Virtual nodes must be greater than 0")
+        points = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(virtual_nodes))
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, key: str) -> str:
+        """
+        The node owning `key`: the first one clockwise from the key's hash.
+        """
+        i = bisect_right(self._points, _hash(key))
+        return self._nodes[i % len(self._nodes)]
+
+
+class FileLockCoordinator:
+    """
+    Locks held as `flock` locks on files in a directory.
+
+    The kernel releases a lock when its process dies, so a standby instance takes
+    over at its next tick. Only works between processes sharing the directory's
+    file system, e.g. instances on one host or tests.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._files: Dict[str, int] = {}
+
+    def acquire(self, name: str) -> bool:
+        """
+        Take the lock without waiting, or confirm it is still held.
+
+        :return: bool - Whether this process holds the lock.
+        """
+        # fcntl only exists on POSIX systems, so it is imported when a lock is used
+        import fcntl
+        if name in self._files:
+            return True
+        descriptor = os.open(os.path.join(self.directory, f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(descriptor)
+            return False
+        self._files[name] = descriptor
+        return True
+
+    def release(self, name: str) -> None:
+        descriptor = self._files.pop(name, None)
+        if descriptor is not None:
+            # Closing the descriptor drops its flock
+            os.close(descriptor)
+
+    def close(self) -> None:
+        for name in list(self._files):
+            self.release(name)
+
+
+class SQLiteCoordinator:
+    """
+    Locks held as leases in a SQLite table.
+
+    The holder renews its lease on every `acquire`; once a lease has not been
+    renewed for `lease_seconds`, e.g. because its holder died, the next instance
+    asking takes it over. The lease must outlast the time between two renewals.
+    """
+
+    def __init__(self, path: str, owner: Optional[str] = None, lease_seconds: float = SHARD_LEASE_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        """
+        :param owner: str - Identifies this instance, host name and process ID by default.
+        :param clock: Callable - Current time in seconds; every instance must share it.
+        """
+        if lease_seconds <= 0:
+            raise ValueError("Lease seconds must be greater than 0")
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        # Ticks run on the event loop, but the scheduler may be created on another thread
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, "
+                         "expires_at REAL NOT NULL)")
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str) -> bool:
+        """
+        Take or renew the lease if it is free, expired or already ours.
+
+        :return: bool - Whether this instance holds the lease.
+        """
+        with self._lock:
+            now = self.clock()
+            # IMMEDIATE takes the write lock up front, so two instances cannot both see the lease as free
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                held = row is None or row[0] == self.owner or row[1] <= now
+                if held:
+                    self._db.execute("INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                                     (name, self.owner, now + self.lease_seconds))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return held
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def make_coordinator(url: str = SHARD_COORDINATION):
+    """
+    Create the coordinator a `SHARD_COORDINATION` value names.
+
+    :param url: str - 'file:<directory>' for `FileLockCoordinator`, 'sqlite:<path>' for
+        `SQLiteCoordinator`, or empty for no coordination.
+    :return: The coordinator, or None.
+    """
+    if not url:
+        return None
+    backend, _, path = url.partition(':')
+    if not path:
+        raise ValueError(f"No path in the coordination URL {url!r}")
+    if backend == 'file':
+        return FileLockCoordinator(path)
+    if backend == 'sqlite':
+        return SQLiteCoordinator(path)
+    raise ValueError(f"Unknown coordination backend {backend!r}; expected 'file' or 'sqlite'")
+
+
+class Shard:
+    """
+    The part of the symbols one instance scans.
+
+    Symbols are split over `count` shards with a `HashRing`, so every instance
+    computes the same split on its own and scanning capacity grows with the number
+    of shards. Several instances may run the same shard for availability: with a
+    coordinator, only the one holding the shard's lock scans and alerts, and the
+    others stand by until it is released.
+    """
+
+    def __init__(self, shard_id: int = SHARD_ID, count: int = SHARD_COUNT, coordinator=None,
+                 virtual_nodes: int = SHARD_VIRTUAL_NODES):
+        """
+        :param coordinator: FileLockCoordinator or SQLiteCoordinator - Elects the active
+            instance of the shard; without one, every instance of it is active.
+        """
+        if count <= 0:
+            raise ValueError("Shard count must be greater than 0")
+        if not 0 <= shard_id < count:
+            raise ValueError(f"Shard ID must be between 0 and {count - 1}")
+        self.shard_id = shard_id
+        self.count = count
+        self.name = f"shard-{shard_id}"
+        self.coordinator = coordinator
+        self.ring = HashRing([f"shard-{i}" for i in range(count)], virtual_nodes)
+        self.active = coordinator is None
+        # Called when this instance becomes the shard's active one, e.g. to reload state the previous one saved
+        self.on_activate: Optional[Callable[[], None]] = None
+
+    def owns(self, symbol: str) -> bool:
+        return self.count == 1 or self.ring.node(symbol) == self.name
+
+    def select(self, symbols: Sequence[str]) -> List[str]:
+        """
+        The symbols of this shard, in their original order.
+        """
+        return [symbol for symbol in symbols if self.owns(symbol)]
+
+    def elect(self) -> bool:
+        """
+        Take or renew the shard's lock; call once per tick.
+
+        :return: bool - Whether this instance is the shard's active one.
+        """
+        if self.coordinator is None:
+            return True
+        active = self.coordinator.acquire(self.name)
+        if active != self.active:
+            print(f"{'Active' if active else 'Standing by'} for {self.name} of {self.count}")
+            if active and self.on_activate is not None:
+                self.on_activate()
+        self.active = active
+        return active
+
+    def state_path(self, path: str) -> str:
+        """
+        The file of this shard's state, e.g. 'alerts.db' -> 'alerts.shard-1.db' with several shards.
+        """
+        if self.count == 1:
+            return path
+        root, extension = os.path.splitext(path)
+        return f"{root}.{self.name}{extension}"
+
+    def close(self) -> None:
+        if self.coordinator is not None:
+            self.coordinator.release(self.name)
+            self.coordinator.close()
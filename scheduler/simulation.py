@@ -0,0 +1,155 @@
+"""
+Offline tick simulation: the scheduler's ticks replayed on a simulated clock.
+
+    python -m scheduler.simulation --symbols 1000 --days 3
+    python -m scheduler.simulation --archive ./klines --symbols BTCUSDT,ETHUSDT --start 2024-03-01 --days 7
+    python -m scheduler.simulation --symbols 1000 --min-quote-volume 2500000 --prefilter
+    python -m scheduler.simulation --symbols 1000 --shards 4 --shard-id 0
+
+Each tick runs the production `scheduled_task` at the times `tick_trigger` would fire,
+with Binance replaced by a `ReplayClient` and Telegram by a `CapturingBot`, as fast
+as the machine allows.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+import pandas as pd
+from binance.helpers import interval_to_milliseconds
+
+from bot.alert_state import AlertState
+from bot.capture import CapturingBot
+from bot.delivery import RateLimiter, TelegramDelivery
+from config.config import INTERVAL, TIMEFRAMES
+from data.archive import KlineArchive
+from data.candle_store import CandleStore
+from data.data_fetcher import PriceChecker
+from data.replay import ReplayClient, SimulatedClock
+from data.synthetic import synthetic_symbols
+from data.timeframes import TimeframeResampler
+from data.universe import SymbolUniverse
+from scheduler.job_scheduler import scheduled_task, tick_trigger
+from scheduler.parallel import ParallelEvaluator
+from scheduler.sharding import Shard
+
+# Candles each tick fetches per symbol
+TICK_HISTORY = 300
+
+
+async def simulate(tokens: List[str], client: ReplayClient, end: pd.Timestamp, timeframes: List[str] = None,
+                   evaluator: ParallelEvaluator = None, bot: CapturingBot = None, quiet: bool = True,
+                   min_quote_volume: float = None, prefilter: bool = False, shard: Shard = None) -> Dict[str, float]:
+    """
+    Run every tick from the client's clock time until `end`.
+
+    :param tokens: List[str] - Symbols to evaluate; the client must hold candles for each.
+    :param client: ReplayClient - Candle source; its clock is advanced to each tick.
+    :param end: pd.Timestamp - Last simulated time (UTC).
+    :param timeframes: List[str] - Timeframes to evaluate, TIMEFRAMES by default.
+    :param bot: CapturingBot - Receives the alerts; stamped with the simulated time by default.
+    :param quiet: bool - Hide the per-tick span log.
+    :param min_quote_volume: float - Scan only the replayed symbols with this 24h quote volume,
+        refreshed like the live universe; all of `tokens` are scanned when omitted.
+    :param prefilter: bool - Skip symbols that could not have triggered a rule, see `SymbolUniverse`.
+    :param shard: Shard - Scan only this shard's symbols, while it is the shard's active instance.
+    :return: dict - 'ticks', 'symbols', 'messages', 'seconds' and the 'ticks_per_second'
+        and 'symbol_ticks_per_second' throughput.
+    """
+    timeframes = timeframes or TIMEFRAMES
+    clock = client.clock
+    checker = PriceChecker(store=CandleStore(), client=client)
+    resampler = TimeframeResampler(checker, INTERVAL, timeframes) if timeframes != [INTERVAL] else None
+    universe = SymbolUniverse(checker, tokens if min_quote_volume is None else None,
+                              min_quote_volume=min_quote_volume or 0.0, max_symbols=0, exclude=(),
+                              prefilter=prefilter, clock=lambda: clock.now_ms() / 1000)
+    # In memory, so repeated runs start from the same state
+    alerts = AlertState(path=None)
+    bot = bot or CapturingBot(clock=lambda: clock.now)
+    trigger = tick_trigger()
+    end = pd.Timestamp(end).tz_localize('UTC')
+    fire_time = trigger.get_next_fire_time(None, clock.now.tz_localize('UTC').to_pydatetime())
+    ticks = 0
+    start = time.perf_counter()
+    # Telegram's rate limits run on wall-clock time, which a simulation does not follow
+    delivery = TelegramDelivery(bot=bot, chat_ids=[bot.chat_id], limiter=RateLimiter(float('inf'), float('inf')))
+    async with delivery:
+        while fire_time is not None and fire_time <= end:
+            clock.advance_to(pd.Timestamp(fire_time).tz_convert(None))
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                await scheduled_task(tokens, checker, resampler, evaluator=evaluator, delivery=delivery,
+                                     universe=universe, alerts=alerts, shard=shard)
+            # Deliver before the clock moves on, so captured messages carry their tick's time
+            await delivery.flush()
+            ticks += 1
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time + timedelta(seconds=1))
+    seconds = time.perf_counter() - start
+    if shard is not None:
+        tokens = shard.select(tokens)
+    return {
+        'ticks': ticks,
+        'symbols': len(tokens),
+        'messages': len(bot.messages),
+        'seconds': seconds,
+        'ticks_per_second': ticks / seconds if seconds else 0.0,
+        'symbol_ticks_per_second': ticks * len(tokens) / seconds if seconds else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', default='100',
+                        help="number of synthetic symbols, or comma-separated symbols to replay from --archive")
+    parser.add_argument('--days', type=float, default=1.0, help="simulated days")
+    parser.add_argument('--archive', help="replay recorded candles from this archive directory")
+    parser.add_argument('--start', help="first simulated day (UTC) when replaying an archive")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeframes', default=','.join(TIMEFRAMES))
+    parser.add_argument('--processes', type=int, default=0, help="evaluate across this many worker processes")
+    parser.add_argument('--min-quote-volume', type=float,
+                        help="scan only the symbols with this 24h quote volume")
+    parser.add_argument('--prefilter', action='store_true',
+                        help="skip symbols whose ticker prices could not have triggered a rule since their last fetch")
+    parser.add_argument('--shards', type=int, default=1, help="split the symbols over this many shards")
+    parser.add_argument('--shard-id', type=int, default=0, help="the shard to scan")
+    parser.add_argument('--verbose', action='store_true', help="print the per-tick span log")
+    args = parser.parse_args(argv)
+    if args.archive and not args.start:
+        parser.error("--start is required with --archive")
+
+    interval_ms = interval_to_milliseconds(INTERVAL)
+    if args.archive:
+        tokens = args.symbols.split(',')
+        start = pd.Timestamp(args.start)
+        # Load the history the first tick needs as well
+        first = start - pd.Timedelta(milliseconds=TICK_HISTORY * interval_ms)
+        clock = SimulatedClock(first)
+        client = ReplayClient.from_archive(clock, KlineArchive(args.archive), tokens, INTERVAL,
+                                           start_time=first.value // 1_000_000)
+    else:
+        tokens = synthetic_symbols(int(args.symbols))
+        clock = SimulatedClock(pd.Timestamp('2024-01-01'))
+        start = clock.now + pd.Timedelta(milliseconds=TICK_HISTORY * interval_ms)
+        length = TICK_HISTORY + int(args.days * 24 * 60 * 60 * 1000 / interval_ms) + 2
+        client = ReplayClient.synthetic(clock, tokens, length, args.seed, INTERVAL)
+    clock.advance_to(start)
+    end = start + pd.Timedelta(days=args.days)
+
+    evaluator = ParallelEvaluator(args.processes) if args.processes > 0 else None
+    try:
+        result = asyncio.run(simulate(tokens, client, end, args.timeframes.split(','), evaluator,
+                                      quiet=not args.verbose, min_quote_volume=args.min_quote_volume,
+                                      prefilter=args.prefilter, shard=Shard(args.shard_id, args.shards)))
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+    print(f"{result['ticks']} ticks x {result['symbols']} symbols in {result['seconds']:.1f}s: "
+          f"{result['ticks_per_second']:.2f} ticks/s, {result['symbol_ticks_per_second']:.0f} symbol-ticks/s, "
+          f"{result['messages']} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmarks for the indicator functions and the full tick pipeline on synthetic candles.
+
+    python test/benchmark.py --symbols 50 --length 300 --output bench.json
+    python test/benchmark.py --baseline bench.json     # exits 1 on a regression
+    python test/benchmark.py --only rsi --repeat 20    # benchmarks whose name contains 'rsi'
+    python test/benchmark.py --only wilders --length 50000   # Wilder's RSI kernel against its loop
+
+Binance is replaced by `data.synthetic.SyntheticClient` and Telegram by a bot that
+only records the messages, so results depend on the code and the machine only.
+"""
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from bot.capture import CapturingBot
+from bot.delivery import RateLimiter, TelegramDelivery
+from data.candle_store import CandleStore
+from data.data_fetcher import PriceChecker
+from data.synthetic import SyntheticClient, synthetic_candles, synthetic_symbols
+from scheduler.job_scheduler import get_price, latest_signal_rows, notify_signal, scheduled_task
+from utils.analyze import break_levels, find_bottoms
+from utils.ma import calculate_min_max_scalar, calculate_moving_average, check_cross_ohlc, notify_cross
+from utils.macd import calculate_macd_histogram, find_divergence_convergence
+from utils.pivot import calculate_pivot_levels
+from utils.rsi import (_calculate_rsi_wilders_loop, calculate_rsi, calculate_rsi_fireant, calculate_rsi_wilders,
+                       calculate_rsi_with_ema, calculate_rsi_with_smoothing)
+from utils.rsi_divergence import find_pivot_points, find_rsi_divergences
+
+# A benchmark is flagged when its median is this many times the baseline median
+DEFAULT_THRESHOLD = 1.25
+
+
+def stub_delivery(bot: CapturingBot) -> TelegramDelivery:
+    # No rate limit, so the pipeline timing measures our code rather than Telegram's limits
+    return TelegramDelivery(bot=bot, chat_ids=['benchmark'], limiter=RateLimiter(1e9, 1e9))
+
+
+def stub_checker(length: int, store: bool = False) -> PriceChecker:
+    return PriceChecker(store=CandleStore() if store else None, client=SyntheticClient(length=length))
+
+
+def time_call(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    Call `function` `repeat` times after one warm-up call.
+
+    :return: dict - 'min', 'median' and 'mean' seconds per call.
+    """
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'mean': statistics.fmean(timings)}
+
+
+def indicator_benchmarks(length: int, seed: int) -> Dict[str, Callable[[], object]]:
+    """
+    One benchmark per function of utils.ma, utils.rsi, utils.macd, utils.rsi_divergence, utils.analyze and utils.pivot.
+    """
+    candles = synthetic_candles(length, seed)
+    close = candles['Close']
+    price = get_price(candles)
+    macd = calculate_macd_histogram(price.copy())
+    last_row = price.iloc[-1]
+    lows = candles['Low'].tolist()
+    rsi = price['RSI'].to_numpy(dtype=float)
+    return {
+        'ma.calculate_moving_average': lambda: calculate_moving_average(close, 20),
+        'ma.check_cross_ohlc': lambda: check_cross_ohlc(price, 'MA20'),
+        'ma.notify_cross': lambda: notify_cross(last_row, 'MA20'),
+        'ma.calculate_min_max_scalar': lambda: calculate_min_max_scalar(price),
+        'rsi.calculate_rsi_wilders': lambda: calculate_rsi_wilders(close),
+        # The loop the smoothing kernel replaced, to compare their speed
+        'rsi.calculate_rsi_wilders_loop': lambda: _calculate_rsi_wilders_loop(close),
+        'rsi.calculate_rsi_fireant': lambda: calculate_rsi_fireant(close),
+        'rsi.calculate_rsi': lambda: calculate_rsi(close),
+        'rsi.calculate_rsi_with_smoothing': lambda: calculate_rsi_with_smoothing(close),
+        'rsi.calculate_rsi_with_ema': lambda: calculate_rsi_with_ema(close),
+        'macd.calculate_macd_histogram': lambda: calculate_macd_histogram(candles.copy()),
+        'macd.find_divergence_convergence': lambda: find_divergence_convergence(macd.copy()),
+        'rsi_divergence.find_pivot_points': lambda: find_pivot_points(rsi, 5, 5),
+        'rsi_divergence.find_rsi_divergences': lambda: find_rsi_divergences(price),
+        'analyze.find_bottoms': lambda: find_bottoms(lows),
+        'analyze.break_levels': lambda: break_levels(candles['High'], candles['Low'], close),
+        'pivot.calculate_pivot_levels': lambda: calculate_pivot_levels(candles, 'camarilla'),
+    }
+
+
+def pipeline_benchmarks(symbols: List[str], length: int) -> Dict[str, Callable[[], object]]:
+    """
+    End-to-end ticks from the (stubbed) Binance client to the (stubbed) Telegram bot.
+    """
+    bot = CapturingBot()
+    checker = stub_checker(length)
+    store_checker = stub_checker(length, store=True)
+
+    async def per_symbol_tick(delivery):
+        datas = checker.fetch_many(300, symbols)
+        prices = [get_price(data) for data in datas]
+        await notify_signal(latest_signal_rows(prices, symbols), delivery=delivery)
+
+    async def panel_tick(delivery, tick_checker):
+        await scheduled_task(symbols, tick_checker, delivery=delivery)
+
+    async def deliver(tick, *args):
+        # A new delivery per run, or the repeated alerts would be deduplicated
+        async with stub_delivery(bot) as delivery:
+            await tick(delivery, *args)
+
+    def run(tick, *args):
+        # Keep the per-tick span log out of the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(deliver(tick, *args))
+
+    return {
+        'pipeline.get_price_notify_signal': lambda: run(per_symbol_tick),
+        'pipeline.scheduled_task': lambda: run(panel_tick, checker),
+        'pipeline.scheduled_task_with_store': lambda: run(panel_tick, store_checker),
+    }
+
+
+def startup_benchmarks() -> Dict[str, Callable[[], object]]:
+    """
+    Cold imports in a fresh interpreter, as the service pays them on every container start.
+
+    `startup.main` is the time until the health endpoint can bind; `startup.scheduler`
+    adds the dependencies the worker thread loads before its first tick.
+    """
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+    def run(module):
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=root, check=True)
+
+    return {
+        'startup.interpreter': lambda: run('sys'),
+        'startup.main': lambda: run('main'),
+        'startup.scheduler': lambda: run('scheduler.job_scheduler'),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    :return: List[str] - One line per benchmark whose median is `threshold` times its baseline or more.
+    """
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing['median'] / baseline[name]['median']
+        if ratio >= threshold:
+            regressions.append(f"{name}: {timing['median'] * 1e3:.3f} ms vs {baseline[name]['median'] * 1e3:.3f} ms "
+                               f"baseline ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=50, help="symbols per pipeline tick")
+    parser.add_argument('--length', type=int, default=300, help="candles per symbol")
+    parser.add_argument('--repeat', type=int, default=10, help="timed calls per benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help="run only the benchmarks whose name contains this text")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio of the median that counts as a regression")
+    args = parser.parse_args(argv)
+
+    benchmarks = indicator_benchmarks(args.length, args.seed)
+    benchmarks.update(pipeline_benchmarks(synthetic_symbols(args.symbols), args.length))
+    benchmarks.update(startup_benchmarks())
+    if args.only:
+        benchmarks = {name: function for name, function in benchmarks.items() if args.only in name}
+
+    results = {}
+    for name, function in benchmarks.items():
+        results[name] = time_call(function, args.repeat)
+        print(f"{name:45s} median {results[name]['median'] * 1e3:10.3f} ms   min {results[name]['min'] * 1e3:10.3f} ms")
+
+    report = {
+        'meta': {
+            'symbols': args.symbols,
+            'length': args.length,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if {key: baseline['meta'].get(key) for key in ('symbols', 'length')} != \
+                {key: report['meta'][key] for key in ('symbols', 'length')}:
+            print("Warning: the baseline was run with different --symbols/--length")
+        regressions = compare(results, baseline['results'], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.pivot import calculate_pivot
 from data.data_fetcher import PriceChecker
 from visualizer.candles import Drawer
+from config.config import SYMBOL, INTERVAL
 
 if __name__ == "__main__":
     checker = PriceChecker()
-    data = checker.fetch_candles(300)
+    data = checker.fetch_candles(300, SYMBOL, INTERVAL)
     price = data.iloc[:-1].copy()
     price["P"] = (price["High"] + price["Low"] + price["Close"]) / 3
     print(price)
@@ -0,0 +1,54 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+
+import pandas as pd
+
+from bot.alert_state import AlertState
+
+
+def signals(*pairs) -> pd.DataFrame:
+    return pd.DataFrame({'Symbol': [symbol for symbol, _ in pairs], 'Rule': [rule for _, rule in pairs]})
+
+
+def test_rule_cleared_within_cooldown_expires(tmp_path):
+    path = str(tmp_path / "alerts.db")
+    state = AlertState(cooldown=3600, path=path)
+    assert len(state.update(signals(('BTCUSDT', 'rsi')), ['BTCUSDT'], '15m', now=0)) == 1
+    # Cleared inside the cooldown: kept inactive to hold back a quick re-trigger
+    state.update(signals(), ['BTCUSDT'], '15m', now=900)
+    assert not state.get('BTCUSDT', '15m', 'rsi').active
+    # BTCUSDT is never evaluated again, but its record still goes once the cooldown is over
+    state.update(signals(), ['ETHUSDT'], '15m', now=3600)
+    assert state.get('BTCUSDT', '15m', 'rsi') is None
+    assert len(state) == 0
+    state.close()
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM alert_state").fetchone() == (0,)
+
+
+def test_retriggered_rule_is_not_expired():
+    state = AlertState(cooldown=3600, path=None)
+    state.update(signals(('BTCUSDT', 'rsi')), ['BTCUSDT'], '15m', now=0)
+    state.update(signals(), ['BTCUSDT'], '15m', now=900)
+    # Holds again inside the cooldown: not alerted, and active again
+    assert len(state.update(signals(('BTCUSDT', 'rsi')), ['BTCUSDT'], '15m', now=1800)) == 0
+    state.update(signals(('BTCUSDT', 'rsi')), ['BTCUSDT'], '15m', now=2700)
+    # The cooldown is over: the held back start is alerted, not dropped
+    assert len(state.update(signals(('BTCUSDT', 'rsi')), ['BTCUSDT'], '15m', now=3600)) == 1
+    assert state.get('BTCUSDT', '15m', 'rsi').active
+
+
+def test_inactive_records_loaded_from_disk_expire(tmp_path):
+    path = str(tmp_path / "alerts.db")
+    state = AlertState(cooldown=3600, path=path)
+    state.update(signals(('BTCUSDT', 'rsi')), ['BTCUSDT'], '15m', now=0)
+    state.update(signals(), ['BTCUSDT'], '15m', now=900)
+    state.close()
+    state = AlertState(cooldown=3600, path=path)
+    assert state.get('BTCUSDT', '15m', 'rsi') is not None
+    state.update(signals(), [], '1h', now=7200)
+    assert len(state) == 0
+    state.close()
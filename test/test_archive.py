@@ -0,0 +1,77 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from data.archive import KlineArchive
+from data.synthetic import synthetic_candles
+
+
+def column_path(archive: KlineArchive, month: str, column: str) -> str:
+    return os.path.join(archive.root, 'BTCUSDT', '15m', month, f"{column}.npy")
+
+
+def test_appends_match_one_write(tmp_path):
+    # About 31 days of candles, so they span two months
+    candles = synthetic_candles(3000)
+    appended, written = KlineArchive(str(tmp_path / "appended")), KlineArchive(str(tmp_path / "written"))
+    written.append('BTCUSDT', '15m', candles)
+    for end in range(100, 3001, 100):
+        # Overlapping batches, as each tick passes its whole buffer
+        appended.append_new('BTCUSDT', '15m', candles.iloc[max(0, end - 150):end])
+    assert appended.months('BTCUSDT', '15m') == ['2024-01', '2024-02']
+    pd.testing.assert_frame_equal(appended.read('BTCUSDT', '15m'), written.read('BTCUSDT', '15m'))
+    pd.testing.assert_frame_equal(appended.read('BTCUSDT', '15m'), candles.astype({'Date': 'datetime64[ms]'}))
+
+
+def test_newer_candles_are_appended_in_place(tmp_path):
+    candles = synthetic_candles(200)
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '15m', candles.iloc[:100])
+    inode = os.stat(column_path(archive, '2024-01', 'Close')).st_ino
+    archive.append('BTCUSDT', '15m', candles.iloc[100:])
+    assert os.stat(column_path(archive, '2024-01', 'Close')).st_ino == inode
+    assert len(archive.read('BTCUSDT', '15m')) == 200
+
+
+def test_archived_candles_are_replaced(tmp_path):
+    candles = synthetic_candles(200)
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '15m', candles)
+    changed = candles.iloc[50:60].assign(Close=1.0)
+    archive.append('BTCUSDT', '15m', changed)
+    read = archive.read('BTCUSDT', '15m')
+    assert len(read) == 200
+    assert (read['Close'].iloc[50:60] == 1.0).all() and (read['Close'].iloc[60:] == candles['Close'].iloc[60:]).all()
+
+
+def test_interrupted_append_is_ignored_and_repaired(tmp_path):
+    candles = synthetic_candles(200)
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '15m', candles.iloc[:100])
+    # An append that stopped after writing the first columns
+    for column in ('Date', 'Open'):
+        stored = np.load(column_path(archive, '2024-01', column))
+        np.save(column_path(archive, '2024-01', column), np.append(stored, stored[-1:]))
+    assert len(archive.read('BTCUSDT', '15m')) == 100
+    archive.append_new('BTCUSDT', '15m', candles.iloc[100:])
+    pd.testing.assert_frame_equal(archive.read('BTCUSDT', '15m'), candles.astype({'Date': 'datetime64[ms]'}))
+
+
+def test_reads_with_a_start_time_or_limit(tmp_path):
+    candles = synthetic_candles(3000)
+    archive = KlineArchive(str(tmp_path))
+    archive.append('BTCUSDT', '15m', candles)
+    newest = archive.read_arrays('BTCUSDT', '15m', limit=10)
+    assert (newest['Close'] == candles['Close'].iloc[-10:].to_numpy()).all()
+    # The newest month alone holds them, so they are views of its memory-mapped file
+    assert isinstance(newest['Close'], np.memmap)
+    start_time = int(candles['Date'].iloc[2970].value // 1_000_000)
+    from_start = archive.read('BTCUSDT', '15m', start_time=start_time, limit=5)
+    assert (from_start['Close'].to_numpy() == candles['Close'].iloc[2970:2975].to_numpy()).all()
+    # Across the month boundary
+    spanning = archive.read('BTCUSDT', '15m', limit=2990)
+    assert (spanning['Date'].to_numpy() == candles['Date'].iloc[10:].to_numpy()).all()
@@ -0,0 +1,41 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from backtest.engine import summarize, sweep
+from data.synthetic import synthetic_symbols, synthetic_universe
+from utils.rules import Rule, compile_rules
+
+
+def always(features):
+    return np.ones(features['Close'].shape, dtype=bool)
+
+
+def test_bearish_signal_followed_by_a_fall_is_a_hit():
+    features = {'Close': np.array([[100.0, 99.0, 98.0, 97.0, 96.0]])}
+    rules = [Rule('bearish', 'bearish', always, always, direction=-1),
+             Rule('bullish', 'bullish', always, always, direction=1)]
+    report = summarize(features, rules, horizons=(1,))
+    assert report.loc['bearish', 'hit_rate_1'] == 1.0
+    assert report.loc['bullish', 'hit_rate_1'] == 0.0
+    assert report.loc['bearish', 'mean_1'] > 0 > report.loc['bullish', 'mean_1']
+
+
+def test_rsi_direction_follows_the_extreme():
+    # Oversold, then overbought, each followed by the move that reverts it
+    features = {'Close': np.array([[100.0, 110.0, 99.0]]), 'RSI': np.array([[20.0, 80.0, 50.0]])}
+    rsi = [rule for rule in compile_rules(rsi_lower=30, rsi_upper=70, level_breaks=False) if rule.name == 'rsi']
+    report = summarize(features, rsi, horizons=(1,))
+    assert report.loc['rsi', 'signals'] == 2
+    assert report.loc['rsi', 'hit_rate_1'] == 1.0
+
+
+def test_sweep_over_the_volume_period():
+    symbols = synthetic_symbols(3)
+    report = sweep(synthetic_universe(symbols, 300), symbols, {'volume_period': [10, 30]}, horizons=(1,), processes=2)
+    spikes = report[report['rule'] == 'volume_spike'].set_index('volume_period')
+    assert sorted(spikes.index) == [10, 30]
+    assert spikes.loc[10, 'signals'] != spikes.loc[30, 'signals']
@@ -0,0 +1,59 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from data.candle_buffer import CandleBuffer
+from data.synthetic import synthetic_candles
+
+
+def test_extend_keeps_the_newest_candles():
+    candles = synthetic_candles(500)
+    buffer = CandleBuffer(100)
+    stop = 0
+    # Each batch repeats the previous last candle, which was still open, with new values
+    for size in (30, 50, 7, 90, 1, 60, 120, 40):
+        start = max(0, stop - 1)
+        batch = candles.iloc[start:stop + size].copy()
+        batch.iloc[-1, batch.columns.get_loc('Close')] = -1.0
+        buffer.extend(CandleBuffer.from_frame(batch))
+        stop += size
+        expected = candles.iloc[max(0, stop - 100):stop]
+        assert len(buffer) == len(expected)
+        assert (buffer['Date'] == expected['Date'].to_numpy(dtype='datetime64[ms]')).all()
+        # Only the newest candle is still open
+        assert (buffer['Close'][:-1] == expected['Close'].to_numpy()[:-1]).all() and buffer['Close'][-1] == -1.0
+    pd.testing.assert_frame_equal(buffer.to_frame()[['Open', 'High', 'Low', 'Volume']],
+                                  candles.iloc[stop - 100:stop][['Open', 'High', 'Low', 'Volume']].reset_index(drop=True))
+
+
+def test_views_keep_their_rows_across_a_reallocation():
+    candles = CandleBuffer.from_frame(synthetic_candles(300))
+    buffer = CandleBuffer(100)
+    buffer.extend(candles[:100])
+    view = buffer[:-1]
+    closes = view['Close'].copy()
+    # Fills the spare rows, so the kept candles move to new storage
+    for end in range(101, 301):
+        buffer.extend(candles[end - 1:end])
+    assert (view['Close'] == closes).all()
+    assert (buffer['Close'] == candles['Close'][-100:]).all()
+
+
+def test_views_see_the_open_candle_replaced_in_place():
+    candles = synthetic_candles(20)
+    buffer = CandleBuffer(100)
+    buffer.extend(CandleBuffer.from_frame(candles))
+    view = buffer[-1:]
+    buffer.extend(CandleBuffer.from_frame(candles.iloc[-1:].assign(Close=1.0)))
+    assert view['Close'][0] == 1.0 and len(buffer) == 20
+
+
+def test_batch_longer_than_the_capacity():
+    candles = synthetic_candles(50)
+    buffer = CandleBuffer(10)
+    buffer.extend(CandleBuffer.from_frame(candles))
+    assert (buffer.times == candles['Date'].iloc[-10:].to_numpy(dtype='datetime64[ms]').astype(np.int64)).all()
@@ -0,0 +1,116 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+import pandas as pd
+from telegram.error import BadRequest
+
+from bot.capture import CapturingBot
+from bot.delivery import RateLimiter, TelegramDelivery
+from scheduler.job_scheduler import send_signals
+
+
+class FlakyBot(CapturingBot):
+    """
+    Rejects the first `failures` messages, then records them like `CapturingBot`.
+    """
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def send_message(self, message, chat_id=None):
+        if self.failures:
+            self.failures -= 1
+            raise BadRequest("rejected")
+        await super().send_message(message, chat_id)
+
+
+def make_delivery(bot: CapturingBot) -> TelegramDelivery:
+    return TelegramDelivery(bot=bot, chat_ids=[bot.chat_id], limiter=RateLimiter(float('inf'), float('inf')))
+
+
+def tick_rows(date: str, rsi: float) -> pd.DataFrame:
+    return pd.DataFrame({'Date': [pd.Timestamp(date)], 'Close': [100.0], 'Percent_Change': [0.5], 'RSI': [rsi]},
+                        index=pd.Index(['BTCUSDT'], name='Symbol'))
+
+
+def rsi_signal(rsi: float) -> pd.DataFrame:
+    return pd.DataFrame({'Symbol': ['BTCUSDT'], 'Rule': ['rsi'], 'Kind': ['rsi'],
+                         'Period': pd.Series([None], dtype=object), 'Value': [rsi]})
+
+
+def test_same_alert_on_a_later_tick_is_deduplicated():
+    bot = CapturingBot()
+
+    async def scenario():
+        async with make_delivery(bot) as delivery:
+            await send_signals(rsi_signal(30.0), tick_rows('2024-01-01 00:00', 30.0), '15m', delivery)
+            await delivery.flush()
+            # Another tick: a different header time and RSI value, but the same alert
+            await send_signals(rsi_signal(29.0), tick_rows('2024-01-01 00:15', 29.0), '15m', delivery)
+            await send_signals(rsi_signal(29.0), tick_rows('2024-01-01 00:15', 29.0), '1h', delivery)
+
+    asyncio.run(scenario())
+    assert [text.splitlines()[0] for _, _, text in bot.messages] == [
+        'At 2024-01-01 07:00:00 [15m]: ', 'At 2024-01-01 07:15:00 [1h]: ']
+
+
+def test_failed_message_does_not_block_a_resend():
+    bot = FlakyBot(failures=1)
+
+    async def scenario():
+        async with make_delivery(bot) as delivery:
+            assert delivery.submit("alert", key="BTCUSDT rsi") == 1
+            await delivery.flush()
+            assert delivery.submit("alert", key="BTCUSDT rsi") == 1
+            await delivery.flush()
+            assert delivery.submit("alert", key="BTCUSDT rsi") == 0
+
+    asyncio.run(scenario())
+    assert [text for _, _, text in bot.messages] == ["alert"]
+
+
+def test_queued_duplicate_is_dropped():
+    bot = CapturingBot()
+
+    async def scenario():
+        async with make_delivery(bot) as delivery:
+            assert delivery.submit("alert", key="k") == 1
+            assert delivery.submit("alert again", key="k") == 0
+
+    asyncio.run(scenario())
+    assert len(bot.messages) == 1
+
+
+class BrokenBot(CapturingBot):
+    """
+    Fails the first message with an error that is not a Telegram one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.broken = True
+
+    async def send_message(self, message, chat_id=None):
+        if self.broken:
+            self.broken = False
+            raise ValueError("bug in the bot")
+        await super().send_message(message, chat_id)
+
+
+def test_unexpected_error_does_not_stop_the_worker():
+    bot = BrokenBot()
+
+    async def scenario():
+        async with make_delivery(bot) as delivery:
+            delivery.submit("first")
+            await asyncio.wait_for(delivery.flush(), timeout=5)
+            delivery.submit("second")
+            await asyncio.wait_for(delivery.flush(), timeout=5)
+
+    asyncio.run(scenario())
+    assert [text for _, _, text in bot.messages] == ["second"]
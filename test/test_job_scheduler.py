@@ -0,0 +1,50 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+from bot.capture import CapturingBot
+from bot.delivery import RateLimiter, TelegramDelivery
+from data.candle_store import CandleStore
+from data.data_fetcher import PriceChecker
+from data.synthetic import SyntheticClient
+from scheduler.job_scheduler import run_tick
+
+
+class UnlistedClient(SyntheticClient):
+    """
+    Returns no klines for the `unlisted` symbols, like a pair that was just listed or delisted.
+    """
+
+    def __init__(self, unlisted, **kwargs):
+        super().__init__(**kwargs)
+        self.unlisted = set(unlisted)
+
+    def get_klines(self, **kwargs):
+        return [] if kwargs['symbol'] in self.unlisted else super().get_klines(**kwargs)
+
+
+def tick(tokens, unlisted) -> CapturingBot:
+    bot = CapturingBot()
+    checker = PriceChecker(store=CandleStore(), client=UnlistedClient(unlisted, length=400))
+
+    async def scenario():
+        limiter = RateLimiter(float('inf'), float('inf'))
+        async with TelegramDelivery(bot=bot, chat_ids=[bot.chat_id], limiter=limiter) as delivery:
+            await run_tick(tokens, checker, delivery=delivery)
+
+    asyncio.run(scenario())
+    return bot
+
+
+def test_first_symbol_without_candles():
+    bot = tick(['NEWUSDT', 'BTCUSDT'], unlisted=['NEWUSDT'])
+    assert len(bot.messages) == 1
+    assert 'BTCUSDT' in bot.messages[0][2] and 'NEWUSDT' not in bot.messages[0][2]
+
+
+def test_tick_without_any_candles_is_skipped():
+    bot = tick(['NEWUSDT', 'BTCUSDT'], unlisted=['NEWUSDT', 'BTCUSDT'])
+    assert bot.messages == []
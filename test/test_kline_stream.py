@@ -0,0 +1,70 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import json
+
+from data.candle_store import CandleStore
+from data.data_fetcher import PriceChecker
+from data.kline_stream import KlineStream
+from data.synthetic import SyntheticClient
+
+
+def kline_message(symbol: str, open_time: int, closed: bool = True) -> str:
+    return json.dumps({'stream': f"{symbol.lower()}@kline_15m", 'data': {'e': 'kline', 'k': {
+        's': symbol, 'i': '15m', 't': open_time, 'x': closed,
+        'o': '1', 'h': '2', 'l': '0.5', 'c': '1.5', 'v': '10'}}})
+
+
+class CleanCloseTransport:
+    """
+    Serves one message per connection and then ends it cleanly, like a server closing the socket.
+    """
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.connections = 0
+        self.reconnected = asyncio.Event()
+
+    async def connect(self, streams):
+        self.connections += 1
+        if self.connections > 1:
+            self.reconnected.set()
+        if self.messages:
+            yield self.messages.pop(0)
+
+
+class CountingClient(SyntheticClient):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def get_klines(self, **kwargs):
+        self.calls += 1
+        return super().get_klines(**kwargs)
+
+
+def test_clean_close_reconnects_and_backfills():
+    client = CountingClient(length=400)
+    checker = PriceChecker(store=CandleStore(), client=client)
+    closed = []
+
+    async def on_close(interval, candles):
+        closed.append((interval, sorted(candles)))
+
+    async def scenario():
+        transport = CleanCloseTransport([kline_message('BTCUSDT', 1704067200000 + 400 * 900000)])
+        stream = KlineStream(['BTCUSDT'], ['15m'], on_close, checker, transport=transport, batch_window=0)
+        task = asyncio.create_task(stream.run())
+        await asyncio.wait_for(transport.reconnected.wait(), timeout=10)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return transport
+
+    transport = asyncio.run(scenario())
+    assert transport.connections >= 2
+    # The initial backfill plus the one after the clean close
+    assert client.calls >= 2
+    assert ('15m', ['BTCUSDT']) in closed
@@ -0,0 +1,86 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.timeframes import resample_candles
+from utils.analyze import break_levels, cluster_levels, find_swings
+from utils.pivot import PIVOT_LEVELS, calculate_pivot_levels, pivot_levels, previous_pivot_levels
+
+
+def test_swings_stand_out_from_their_neighbours():
+    high = np.array([1.0, 2.0, 5.0, 2.0, 1.0, 3.0, 3.0, 1.0, 0.5])
+    tops, bottoms = find_swings(high, high - 1, order=2)
+    # Equal highs count once, at the first of them; the last `order` bars never qualify
+    assert np.flatnonzero(tops).tolist() == [2, 5]
+    assert np.flatnonzero(bottoms).tolist() == [4]
+    # Every series of a panel is marked on its own
+    panel_tops, _ = find_swings(np.array([high, high[::-1]]), np.array([high, high[::-1]]) - 1, order=2)
+    assert (panel_tops[0] == tops).all() and np.flatnonzero(panel_tops[1]).tolist() == [2, 6]
+
+
+def test_swings_next_to_missing_candles_are_left_out():
+    high = np.array([np.nan, np.nan, 1.0, 2.0, 5.0, 2.0, np.nan])
+    tops, _ = find_swings(high, high, order=2)
+    assert not tops.any()
+
+
+def test_close_prices_merge_into_one_level():
+    levels, touches = cluster_levels(np.array([100.0, 200.0, 100.4, np.nan, 99.8]), tolerance=0.005)
+    np.testing.assert_allclose(levels, [100.0666666, 200.0])
+    assert touches.tolist() == [3, 1]
+    levels, touches = cluster_levels(np.array([np.nan]))
+    assert len(levels) == len(touches) == 0
+
+
+def approx(expected):
+    return pytest.approx(expected, abs=1e-6)
+
+
+def test_pivot_formulas():
+    high, low, close = np.array([12.0]), np.array([8.0]), np.array([11.0])
+    classic = pivot_levels(high, low, close, 'classic')
+    assert {level: classic[level][0] for level in PIVOT_LEVELS} == approx(
+        {'S3': 4.6666666, 'S2': 6.3333333, 'S1': 8.6666666, 'P': 10.3333333,
+         'R1': 12.6666666, 'R2': 14.3333333, 'R3': 16.6666666})
+    fibonacci = pivot_levels(high, low, close, 'fibonacci')
+    assert fibonacci['R1'][0] == approx(10.3333333 + 0.382 * 4)
+    assert fibonacci['S3'][0] == approx(10.3333333 - 4)
+    camarilla = pivot_levels(high, low, close, 'camarilla')
+    assert camarilla['R1'][0] == approx(11 + 4 * 1.1 / 12)
+    assert camarilla['S3'][0] == approx(11 - 4 * 1.1 / 4)
+
+
+def candles(days: int) -> pd.DataFrame:
+    dates = pd.date_range('2024-01-01', periods=days * 24, freq='1h')
+    close = 100 + np.sin(np.arange(len(dates)) / 5) * 10
+    return pd.DataFrame({'Date': dates, 'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.ones(len(dates))})
+
+
+def test_previous_pivots_match_the_resampled_candles():
+    hourly = candles(3)
+    daily = calculate_pivot_levels(resample_candles(hourly, '1d'))
+    levels = previous_pivot_levels(hourly['Date'].to_numpy(), hourly['High'], hourly['Low'], hourly['Close'])
+    np.testing.assert_allclose(levels[0], daily.iloc[-1][list(PIVOT_LEVELS)].to_numpy())
+    # Candles starting inside the previous day do not give it a high and low
+    partial = hourly.iloc[30:]
+    assert np.isnan(previous_pivot_levels(partial['Date'].to_numpy(), partial['High'], partial['Low'],
+                                          partial['Close'])).all()
+    assert previous_pivot_levels(hourly['Date'].to_numpy(), hourly['High'], hourly['Low'], hourly['Close'],
+                                 method='') is None
+
+
+def test_pivot_levels_are_break_levels():
+    hourly = candles(3)
+    high, low, close = hourly['High'], hourly['Low'], hourly['Close']
+    pivots = previous_pivot_levels(hourly['Date'].to_numpy(), high, low, close)
+    swings = break_levels(high, low, close, lookback=48)
+    levels = break_levels(high, low, close, lookback=48, pivots=pivots)
+    previous_close = close.iloc[-2]
+    below = np.concatenate(([swings['Support'][0]], pivots[0][pivots[0] < previous_close]))
+    assert levels['Support'][0] == max(below)
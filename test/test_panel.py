@@ -0,0 +1,25 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from data.synthetic import synthetic_symbols, synthetic_universe
+from scheduler.job_scheduler import get_price, latest_signal_rows
+from utils.panel import build_panel, compute_indicators, latest_rows
+
+
+def test_panel_matches_the_per_symbol_indicators():
+    symbols = synthetic_symbols(3)
+    candles = synthetic_universe(symbols, 300)
+    # A history shorter than MA200 is padded with NaN in the panel
+    candles[1] = candles[1].iloc[-120:]
+    expected = latest_signal_rows([get_price(data) for data in candles], symbols)
+    panel = build_panel([data.iloc[:-1] for data in candles], symbols)
+    rows = latest_rows(panel, compute_indicators(panel))
+    assert (rows['Date'] == expected['Date']).all()
+    for column in ('Close', 'MA20', 'MA50', 'MA200', 'RSI', 'Average_Volume_20', 'Percent_Change',
+                   'MinLow20', 'MaxHigh20', 'MinLow200', 'MaxHigh200'):
+        np.testing.assert_allclose(rows[column], expected[column], rtol=1e-9, err_msg=column)
+    assert np.isnan(rows.loc[symbols[1], 'MA200']) and not np.isnan(rows.loc[symbols[1], 'MA50'])
@@ -0,0 +1,27 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from data.candle_buffer import CandleBuffer
+from data.synthetic import synthetic_symbols, synthetic_universe
+from scheduler.job_scheduler import evaluate_candles
+from scheduler.parallel import ParallelEvaluator
+
+
+def test_parallel_evaluation_matches_in_process():
+    symbols = synthetic_symbols(40)
+    candles = [CandleBuffer.from_frame(data) for data in synthetic_universe(symbols, 300)]
+    # A short history, padded with NaN in the shared block
+    candles[5] = candles[5][-60:]
+    signals, rows = evaluate_candles(candles, symbols)
+    evaluator = ParallelEvaluator(3)
+    try:
+        parallel_signals, parallel_rows = evaluate_candles(candles, symbols, evaluator)
+    finally:
+        evaluator.close()
+    assert not signals.empty
+    pd.testing.assert_frame_equal(parallel_signals, signals)
+    pd.testing.assert_frame_equal(parallel_rows, rows)
@@ -0,0 +1,25 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from data.synthetic import synthetic_candles
+from utils.rsi import _calculate_rsi_wilders_loop, calculate_rsi_wilders
+
+
+def test_wilders_kernel_matches_the_loop():
+    for length, seed in ((14, 0), (15, 1), (300, 2), (5000, 3)):
+        closes = synthetic_candles(length, seed)['Close']
+        np.testing.assert_allclose(calculate_rsi_wilders(closes), _calculate_rsi_wilders_loop(closes),
+                                   rtol=0, atol=1e-12)
+
+
+def test_wilders_kernel_matches_the_loop_without_losses():
+    # Only gains for a while, so the average loss is zero and the RSI is 100
+    closes = pd.Series(np.r_[np.arange(100.0, 130.0), np.arange(130.0, 100.0, -0.5)])
+    rsi = calculate_rsi_wilders(closes)
+    assert rsi.iloc[20] == 100.0
+    np.testing.assert_allclose(rsi, _calculate_rsi_wilders_loop(closes), rtol=0, atol=1e-12)
@@ -0,0 +1,62 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from utils.rules import compile_rules, evaluate_mask, evaluate_rules
+
+# A candle that triggers nothing: every level is far from its range and the RSI and volume are normal
+QUIET = {'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.5, 'Volume': 100.0, 'Average_Volume_20': 100.0,
+         'RSI': 50.0, 'MA20': 200.0, 'MinLow20': 50.0, 'MaxHigh20': 150.0, 'Support': 50.0, 'Resistance': 150.0}
+
+# One change to the quiet candle per rule it should trigger
+CASES = {
+    'rsi': {'RSI': 20.0},
+    'volume_spike': {'Volume': 200.0},
+    'MA20_crossed_above': {'MA20': 100.2},
+    'MA20_crossed_below': {'Open': 100.5, 'Close': 100.0, 'MA20': 100.2},
+    'MA20_reached_from_above': {'MA20': 99.5},
+    'MA20_reached_from_below': {'MA20': 100.8},
+    'breakout_below_20': {'MinLow20': 100.7},
+    'breakout_above_20': {'MaxHigh20': 100.3},
+    'support_break': {'Support': 100.7},
+    'resistance_break': {'Resistance': 100.3},
+}
+
+
+def rules():
+    return compile_rules(rsi_lower=30, rsi_upper=70, volume_spike_rate=1.5, volume_period=20, ma_periods=(20,),
+                         breakout_periods=(20,), level_breaks=True)
+
+
+def features(cases) -> pd.DataFrame:
+    return pd.DataFrame([{**QUIET, **changes} for changes in cases.values()], index=pd.Index(list(cases), name='Symbol'))
+
+
+def test_each_rule_kind_triggers_on_its_own():
+    table = features({'QUIET': {}, **CASES})
+    signals = evaluate_rules(table, rules())
+    assert signals['Symbol'].tolist() == list(CASES)
+    assert signals['Rule'].tolist() == list(CASES)
+    values = dict(zip(signals['Rule'], signals['Value']))
+    assert values['rsi'] == 20.0 and values['volume_spike'] == 2.0 and values['support_break'] == 100.7
+    assert evaluate_rules(features({'QUIET': {}}), rules()).empty
+
+
+def test_signals_are_ordered_by_symbol_then_rule():
+    table = features({'A': {'RSI': 80.0, 'MaxHigh20': 100.3}, 'B': {'Volume': 200.0}})
+    signals = evaluate_rules(table, rules())
+    assert list(zip(signals['Symbol'], signals['Rule'])) == [('A', 'rsi'), ('A', 'breakout_above_20'),
+                                                             ('B', 'volume_spike')]
+
+
+def test_rules_evaluate_every_bar_of_a_panel():
+    table = features({'QUIET': {}, **CASES})
+    # The candles as the bars of two symbols, in the (symbols x bars) arrays the backtest passes
+    panel = {column: np.vstack([table[column].to_numpy()] * 2) for column in table.columns}
+    mask = evaluate_mask(panel, rules())
+    assert mask.shape == (2, len(table), len(rules()))
+    assert (mask[0] == evaluate_mask(table, rules())).all() and (mask[1] == mask[0]).all()
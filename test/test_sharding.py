@@ -0,0 +1,105 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scheduler.sharding import HashRing, Shard, SQLiteCoordinator
+
+
+class Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / "leases.db")
+    clock = Clock()
+    first = SQLiteCoordinator(path, owner='a', lease_seconds=60, clock=clock)
+    second = SQLiteCoordinator(path, owner='b', lease_seconds=60, clock=clock)
+    assert first.acquire('shard-0')
+    assert not second.acquire('shard-0')
+    # Renewing keeps the lease past its first expiry
+    clock.now = 50
+    assert first.acquire('shard-0')
+    clock.now = 100
+    assert not second.acquire('shard-0')
+    # The holder stops renewing, e.g. because it died
+    clock.now = 110
+    assert second.acquire('shard-0')
+    assert not first.acquire('shard-0')
+    first.close()
+    second.close()
+
+
+def test_released_lease_is_free_at_once(tmp_path):
+    path = str(tmp_path / "leases.db")
+    clock = Clock()
+    first = SQLiteCoordinator(path, owner='a', lease_seconds=60, clock=clock)
+    second = SQLiteCoordinator(path, owner='b', lease_seconds=60, clock=clock)
+    assert first.acquire('shard-0')
+    first.release('shard-0')
+    assert second.acquire('shard-0')
+    first.close()
+    second.close()
+
+
+def test_standby_shard_is_elected_after_takeover(tmp_path):
+    path = str(tmp_path / "leases.db")
+    clock = Clock()
+    active = Shard(0, 2, SQLiteCoordinator(path, owner='a', lease_seconds=60, clock=clock))
+    standby = Shard(0, 2, SQLiteCoordinator(path, owner='b', lease_seconds=60, clock=clock))
+    assert active.elect() and not standby.elect()
+    clock.now = 60
+    assert standby.elect()
+    active.coordinator.close()
+    standby.close()
+
+
+def test_shards_split_the_symbols():
+    symbols = [f"SYM{i}USDT" for i in range(200)]
+    shards = [Shard(i, 3) for i in range(3)]
+    selected = [shard.select(symbols) for shard in shards]
+    assert sorted(sum(selected, [])) == sorted(symbols)
+    assert all(selected)
+    # Every instance computes the same ring
+    assert HashRing(['a', 'b']).node('BTCUSDT') == HashRing(['a', 'b']).node('BTCUSDT')
+
+
+def test_takeover_does_not_alert_active_conditions_again(tmp_path):
+    import pandas as pd
+    from scheduler.job_scheduler import shard_alert_state
+
+    leases, alerts = str(tmp_path / "leases.db"), str(tmp_path / "alerts.db")
+    clock = Clock()
+    active = Shard(0, 2, SQLiteCoordinator(leases, owner='a', lease_seconds=60, clock=clock))
+    standby = Shard(0, 2, SQLiteCoordinator(leases, owner='b', lease_seconds=60, clock=clock))
+    active_alerts, standby_alerts = shard_alert_state(active, alerts), shard_alert_state(standby, alerts)
+    assert os.path.exists(tmp_path / "alerts.shard-0.db")
+    signals = pd.DataFrame({'Symbol': ['BTCUSDT'], 'Rule': ['rsi']})
+    assert active.elect() and not standby.elect()
+    assert len(active_alerts.update(signals, ['BTCUSDT'], '15m', now=0)) == 1
+    # The active replica dies; the standby loads its state when taking over
+    clock.now = 60
+    assert standby.elect()
+    assert len(standby_alerts.update(signals, ['BTCUSDT'], '15m', now=900)) == 0
+    active_alerts.close()
+    standby_alerts.close()
+    active.coordinator.close()
+    standby.close()
+
+
+def test_coordinated_shard_needs_a_shared_alert_state(tmp_path):
+    from scheduler.job_scheduler import shard_alert_state
+
+    shard = Shard(0, 2, SQLiteCoordinator(str(tmp_path / "leases.db"), owner='a'))
+    try:
+        shard_alert_state(shard, None)
+        assert False, "expected a ValueError"
+    except ValueError:
+        pass
+    shard.close()
+    # A single instance keeps its state in memory
+    assert shard_alert_state(Shard(), None)._db is None
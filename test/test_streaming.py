@@ -0,0 +1,40 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from data.synthetic import synthetic_candles
+from scheduler.job_scheduler import get_price
+from utils.ma import calculate_moving_average
+from utils.rsi import calculate_rsi_wilders
+from utils.streaming import IndicatorEngine
+
+
+def test_streamed_indicators_match_the_batch_ones():
+    candles = synthetic_candles(400)
+    engine = IndicatorEngine()
+    rows = [engine.update(candle) for candle in candles.to_dict('records')]
+    for period in (20, 50, 200):
+        np.testing.assert_allclose([row[f'MA{period}'] for row in rows],
+                                   calculate_moving_average(candles['Close'], period), rtol=1e-12)
+    np.testing.assert_allclose([row['RSI'] for row in rows], calculate_rsi_wilders(candles['Close']), rtol=1e-12)
+    np.testing.assert_allclose([row['Average_Volume_20'] for row in rows],
+                               calculate_moving_average(candles['Volume'], 20), rtol=1e-12)
+    # Breakout levels cover the candles before the current one
+    np.testing.assert_allclose([row['MaxHigh50'] for row in rows], candles['High'].rolling(50).max().shift(),
+                               rtol=0)
+
+
+def test_engine_catches_up_from_a_frame():
+    candles = synthetic_candles(400)
+    engine = IndicatorEngine()
+    engine.update_frame(candles.iloc[:250])
+    # Overlapping candles already fed are skipped
+    row = engine.update_frame(candles.iloc[200:-1])
+    # get_price leaves out the last candle, which it takes for the one still open
+    expected = get_price(candles).iloc[-1]
+    assert row['Date'] == expected['Date']
+    for column in ('MA20', 'MA50', 'MA200', 'RSI', 'Average_Volume_20', 'Percent_Change'):
+        np.testing.assert_allclose(row[column], expected[column], rtol=1e-12, err_msg=column)
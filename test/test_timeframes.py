@@ -0,0 +1,83 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from data.candle_buffer import CandleBuffer
+from data.candle_store import CandleStore
+from data.data_fetcher import PriceChecker
+from data.synthetic import DEFAULT_START, SyntheticClient, synthetic_candles, to_klines
+from data.timeframes import TimeframeResampler, resample_buffer, resample_candles
+
+QUARTER_HOUR_MS = 15 * 60 * 1000
+
+
+class GrowingClient(SyntheticClient):
+    """
+    Serves the first `now` candles of one 15m walk, and the higher intervals resampled from
+    them, so the derived and the downloaded timeframes can be compared. Logs each request.
+    """
+
+    def __init__(self, length: int, now: int):
+        super().__init__(length=length)
+        self.candles = synthetic_candles(length)
+        self.now = now
+        self.requests = []
+
+    def served(self, interval: str) -> pd.DataFrame:
+        candles = self.candles.iloc[:self.now]
+        return candles if interval == '15m' else resample_candles(candles, interval)
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500, startTime=None, **kwargs) -> list:
+        self.requests.append(interval)
+        candles = self.served(interval)
+        if startTime is not None:
+            candles = candles[candles['Date'] >= pd.Timestamp(startTime, unit='ms')]
+        return to_klines(candles.head(limit) if startTime is not None else candles.tail(limit), interval)
+
+
+def test_resampled_buffer_matches_pandas():
+    # Starts at 00:30, so the first hour is partial like the last one
+    candles = synthetic_candles(50, start_time=DEFAULT_START + 2 * QUARTER_HOUR_MS)
+    resampled = resample_buffer(CandleBuffer.from_frame(candles), '1h').to_frame()
+    expected = candles.set_index('Date').resample('1h').agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'})
+    assert (resampled['Date'].to_numpy() == expected.index.to_numpy()).all()
+    np.testing.assert_allclose(resampled[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(),
+                               expected.to_numpy(), rtol=1e-12)
+
+
+def test_higher_timeframes_are_derived_without_downloading_them():
+    client = GrowingClient(length=1000, now=400)
+    checker = PriceChecker(store=CandleStore(), client=client)
+    resampler = TimeframeResampler(checker, '15m', ['15m', '1h', '4h'], history=50)
+    resampler.seed(['AAA'])
+    assert client.requests == ['1h', '4h']
+    for _ in range(9):
+        client.now += 1
+        buffers = resampler.update('AAA', checker.latest_buffer(300, 'AAA', '15m'))
+        for interval in ('1h', '4h'):
+            expected = client.served(interval).tail(50)
+            derived = buffers[interval].to_frame()
+            assert (derived['Date'].to_numpy() == expected['Date'].to_numpy()).all()
+            np.testing.assert_allclose(derived[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(),
+                                       expected[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(), rtol=1e-12)
+    assert client.requests.count('1h') == client.requests.count('4h') == 1
+
+
+def test_base_candles_after_a_gap_download_the_timeframe():
+    client = GrowingClient(length=1000, now=400)
+    checker = PriceChecker(store=CandleStore(), client=client)
+    resampler = TimeframeResampler(checker, '15m', ['1h'], history=50)
+    resampler.seed(['AAA'])
+    assert client.requests == ['1h']
+    # The service was down for longer than the base candles reach back
+    client.now = 900
+    base = CandleBuffer.from_frame(client.served('15m').tail(20))
+    buffers = resampler.update('AAA', base)
+    assert client.requests.count('1h') > 1
+    expected = client.served('1h').tail(50)
+    np.testing.assert_allclose(buffers['1h'].to_frame()['Close'].to_numpy(), expected['Close'].to_numpy())
@@ -0,0 +1,121 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from config.config import BREAKOUT_PERIODS
+from data.universe import SymbolUniverse, liquid_symbols
+
+
+def ticker(symbol: str, quote_volume: float, price: float = 100.0) -> dict:
+    return {'symbol': symbol, 'quoteVolume': str(quote_volume), 'lastPrice': str(price),
+            'highPrice': str(price), 'lowPrice': str(price)}
+
+
+class StubChecker:
+    """
+    Serves fixed 24hr tickers in place of `PriceChecker.fetch_tickers`, counting the requests.
+    """
+
+    def __init__(self, tickers):
+        self.tickers = tickers
+        self.requests = 0
+
+    def fetch_tickers(self):
+        self.requests += 1
+        return self.tickers
+
+
+def test_liquid_symbols_filters_and_orders_by_volume():
+    tickers = [ticker('BTCUSDT', 5e9), ticker('JUPUSDT', 1e9), ticker('SYRUPUSDT', 1e9), ticker('ETHBTC', 9e9),
+               ticker('USDCUSDT', 8e9), ticker('DUSTUSDT', 1e3)]
+    assert liquid_symbols(tickers, 'USDT', min_quote_volume=1e7, max_symbols=0, exclude=['USDCUSDT']) == [
+        'BTCUSDT', 'JUPUSDT', 'SYRUPUSDT']
+    assert liquid_symbols(tickers, 'USDT', min_quote_volume=1e7, max_symbols=1, exclude=[]) == ['USDCUSDT']
+
+
+def test_refresh_reports_only_the_changes():
+    checker = StubChecker([ticker('BTCUSDT', 5e9), ticker('ETHUSDT', 3e9)])
+    clock = [0.0]
+    universe = SymbolUniverse(checker, min_quote_volume=1e7, max_symbols=0, exclude=(), refresh_seconds=60,
+                              clock=lambda: clock[0])
+    assert universe.refresh() == (['BTCUSDT', 'ETHUSDT'], [])
+    checker.tickers = [ticker('BTCUSDT', 5e9), ticker('SOLUSDT', 4e9)]
+    assert not universe.refresh_due()
+    clock[0] = 60
+    assert universe.refresh_due()
+    assert universe.refresh() == (['SOLUSDT'], ['ETHUSDT'])
+    assert universe.symbols == ['BTCUSDT', 'SOLUSDT']
+
+
+def test_fixed_universe_never_requests_tickers():
+    checker = StubChecker([])
+    universe = SymbolUniverse(checker, ['BTCUSDT'])
+    assert universe.tick() == (['BTCUSDT'], ([], []))
+    assert checker.requests == 0
+
+
+def prefiltered(tickers) -> SymbolUniverse:
+    universe = SymbolUniverse(StubChecker(tickers), ['BTCUSDT'], prefilter=True, level_margin=0.5, rsi_margin=5)
+    assert universe.movers() == ['BTCUSDT']
+    return universe
+
+
+def evaluated(ma20: float = 110.0, rsi: float = 50.0) -> pd.DataFrame:
+    # Levels far below the price except MA20, a calm RSI and an average volume of 100
+    row = {'Open': 100.0, 'High': 101.0, 'Low': 99.0, 'Close': 100.0, 'Volume': 100.0, 'RSI': rsi,
+           'MA20': ma20, 'MA50': 50.0, 'MA200': 50.0, 'Average_Volume_20': 100.0, 'Support': 50.0, 'Resistance': 150.0}
+    row.update({f'MinLow{period}': 50.0 for period in BREAKOUT_PERIODS})
+    row.update({f'MaxHigh{period}': 150.0 for period in BREAKOUT_PERIODS})
+    return pd.DataFrame([row], index=pd.Index(['BTCUSDT'], name='Symbol'))
+
+
+def no_signals() -> pd.DataFrame:
+    return pd.DataFrame({'Symbol': [], 'Rule': []})
+
+
+def price(last: float, high: float = 105.0, low: float = 95.0, volume: float = 1000.0) -> dict:
+    return {'symbol': 'BTCUSDT', 'quoteVolume': '1e9', 'lastPrice': str(last), 'highPrice': str(high),
+            'lowPrice': str(low), 'volume': str(volume)}
+
+
+def test_symbol_far_from_every_level_is_skipped():
+    universe = prefiltered([price(100.0)])
+    universe.watch('15m', evaluated(), no_signals())
+    universe.checker.tickers = [price(101.0)]
+    assert universe.movers() == []
+    # The price range reaches MA20 = 110, or would once widened by the margin
+    universe.checker.tickers = [price(109.6)]
+    assert universe.movers() == ['BTCUSDT']
+
+
+def test_new_24h_high_since_the_last_fetch_reaches_a_level():
+    universe = prefiltered([price(100.0)])
+    universe.watch('15m', evaluated(), no_signals())
+    # Back where it was, but a new 24h high of 111 means the price crossed MA20 meanwhile
+    universe.checker.tickers = [price(100.0, high=111.0)]
+    assert universe.movers() == ['BTCUSDT']
+
+
+def test_triggered_rsi_and_volume_keep_a_symbol_fetched():
+    universe = prefiltered([price(100.0)])
+    universe.watch('15m', evaluated(), pd.DataFrame({'Symbol': ['BTCUSDT'], 'Rule': ['volume_spike']}))
+    universe.checker.tickers = [price(100.0)]
+    assert universe.movers() == ['BTCUSDT']
+    universe.watch('15m', evaluated(rsi=62.0), no_signals())
+    assert universe.movers() == ['BTCUSDT']
+    universe.watch('15m', evaluated(), no_signals())
+    # 200 traded since the last fetch is more than a volume spike over the average of 100
+    universe.checker.tickers = [price(100.0, volume=1200.0)]
+    assert universe.movers() == ['BTCUSDT']
+    universe.checker.tickers = [price(100.0, volume=1210.0)]
+    assert universe.movers() == []
+
+
+def test_prefilter_off_fetches_everything():
+    universe = SymbolUniverse(StubChecker([price(100.0)]), ['BTCUSDT'], prefilter=False)
+    universe.watch('15m', evaluated(), no_signals())
+    assert universe.movers() == ['BTCUSDT']
+    assert universe.checker.requests == 0
@@ -1,4 +1,11 @@
-from typing import List
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config.config import LEVEL_LOOKBACK, LEVEL_SWING_ORDER, LEVEL_TOLERANCE
+
 
 def find_bottoms(data: List[float]) -> List[int]:
     """
@@ -8,12 +15,135 @@ def find_bottoms(data: List[float]) -> List[int]:
     :param data: List[float] - Array of float values to search for bottoms.
     :return: List[int] - List of indices representing the bottoms.
     """
-    if len(data) < 3:
+    values = np.asarray(data, dtype=float)
+    if len(values) < 3:
         # There can't be any bottoms in arrays shorter than 3
         return []
+    middle = values[1:-1]
+    return (np.flatnonzero((middle < values[:-2]) & (middle < values[2:])) + 1).tolist()
+
+
+def find_swings(high: np.ndarray, low: np.ndarray, order: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mark swing tops and bottoms along the last axis.
+
+    A top is a high above the `order` highs before it and not below the `order`
+    highs after it; a bottom mirrors that on the lows. Equal extremes therefore
+    count once, and the first and last `order` bars never qualify.
+
+    :param high: np.ndarray - Highs, one series per row.
+    :param low: np.ndarray - Lows, same shape as `high`.
+    :param order: int - Bars on each side a swing must stand out from.
+    :return: tuple - Boolean (tops, bottoms) masks shaped like the input.
+    """
+    if order <= 0:
+        raise ValueError("Order must be greater than 0")
+    high, low = np.asarray(high, dtype=float), np.asarray(low, dtype=float)
+    tops = np.zeros(high.shape, dtype=bool)
+    bottoms = np.zeros(low.shape, dtype=bool)
+    if high.shape[-1] < 2 * order + 1:
+        return tops, bottoms
+    for values, mask, stands_out, extreme in ((high, tops, np.greater, np.max), (low, bottoms, np.less, np.min)):
+        windows = sliding_window_view(values, 2 * order + 1, axis=-1)
+        centre = windows[..., order]
+        before, after = windows[..., :order], windows[..., order + 1:]
+        with np.errstate(invalid='ignore'):
+            mask[..., order:-order] = stands_out(centre, extreme(before, axis=-1)) \
+                & ~stands_out(extreme(after, axis=-1), centre) & ~np.isnan(after).any(axis=-1)
+    return tops, bottoms
+
+
+def cluster_levels(prices: np.ndarray, tolerance: float = 0.005) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge nearby prices into levels.
+
+    Sorted prices less than `tolerance` (relative) apart from their neighbour
+    fall in the same cluster, whose level is the mean price.
+
+    :param prices: np.ndarray - Swing prices, in any order; NaN is ignored.
+    :param tolerance: float - Largest relative gap within a cluster, e.g. 0.005 for 0.5%.
+    :return: tuple - The sorted levels and how many prices each one merges.
+    """
+    prices = np.sort(np.asarray(prices, dtype=float).ravel())
+    prices = prices[~np.isnan(prices)]
+    if len(prices) == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gaps = np.diff(prices) / np.abs(prices[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(gaps > tolerance) + 1))
+    touches = np.diff(np.append(starts, len(prices)))
+    return np.add.reduceat(prices, starts) / touches, touches
+
+
+class LevelIndex:
+    """
+    Sorted support/resistance levels with O(log n) lookups around a price.
+    """
+
+    def __init__(self, levels: Sequence[float], touches: Optional[Sequence[int]] = None):
+        """
+        :param levels: List[float] - Price levels, e.g. `cluster_levels` output or pivot levels.
+        :param touches: List[int] - How often each level was touched, 1 each by default.
+        """
+        order = np.argsort(np.asarray(levels, dtype=float), kind='stable')
+        self.levels: List[float] = np.asarray(levels, dtype=float)[order].tolist()
+        self.touches: List[int] = (np.asarray(touches)[order].tolist() if touches is not None
+                                   else [1] * len(self.levels))
+
+    def __len__(self) -> int:
+        return len(self.levels)
 
-    bottoms = []
-    for i in range(1, len(data) - 1):
-        if data[i] < data[i - 1] and data[i] < data[i + 1]:
-            bottoms.append(i)
-    return bottoms
\ No newline at end of file
+    def support(self, price: float) -> Optional[float]:
+        """
+        The highest level below `price`, or None.
+        """
+        i = bisect_left(self.levels, price)
+        return self.levels[i - 1] if i > 0 else None
+
+    def resistance(self, price: float) -> Optional[float]:
+        """
+        The lowest level above `price`, or None.
+        """
+        i = bisect_right(self.levels, price)
+        return self.levels[i] if i < len(self.levels) else None
+
+
+def break_levels(high: np.ndarray, low: np.ndarray, close: np.ndarray, lookback: int = LEVEL_LOOKBACK,
+                 order: int = LEVEL_SWING_ORDER, tolerance: float = LEVEL_TOLERANCE,
+                 pivots: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Find the support and resistance the last candle of each series can break.
+
+    Levels are the clustered swings of the `lookback` candles before the last
+    one; the support is the nearest level below the previous close and the
+    resistance the nearest above it. Swings are detected for every series at
+    once, and each series then costs one clustering and two bisections.
+    `pivots` are clustered together with the swings, so a pivot level close to
+    a swing level merges with it.
+
+    :param high: np.ndarray - Highs, one series per row (or a single 1-D series).
+    :param low: np.ndarray - Lows, same shape as `high`.
+    :param close: np.ndarray - Closes, same shape as `high`.
+    :param pivots: np.ndarray - More levels per series, one row each, e.g. `utils.pivot.previous_pivot_levels`.
+    :return: dict - 'Support' and 'Resistance' with one value per series, NaN when
+        there is no level on that side.
+    """
+    high, low, close = (np.atleast_2d(np.asarray(values, dtype=float)) for values in (high, low, close))
+    support = np.full(len(close), np.nan)
+    resistance = np.full(len(close), np.nan)
+    if close.shape[1] < 2:
+        return {'Support': support, 'Resistance': resistance}
+    history_high = high[:, max(0, close.shape[1] - 1 - lookback):-1]
+    history_low = low[:, max(0, close.shape[1] - 1 - lookback):-1]
+    tops, bottoms = find_swings(history_high, history_low, order)
+    for row, previous_close in enumerate(close[:, -2]):
+        if np.isnan(previous_close):
+            continue
+        prices = [history_high[row, tops[row]], history_low[row, bottoms[row]]]
+        if pivots is not None:
+            prices.append(np.atleast_2d(pivots)[row])
+        index = LevelIndex(*cluster_levels(np.concatenate(prices), tolerance))
+        below, above = index.support(previous_close), index.resistance(previous_close)
+        support[row] = np.nan if below is None else below
+        resistance[row] = np.nan if above is None else above
+    return {'Support': support, 'Resistance': resistance}
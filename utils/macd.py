@@ -41,55 +41,67 @@ def find_divergence_convergence(df: pd.DataFrame) -> pd.DataFrame:
     if not {'Close', 'MACD_Histogram', 'RSI'}.issubset(df.columns):
         raise ValueError("The DataFrame must contain 'Close', 'MACD_Histogram', and 'RSI' columns.")
     
-    # Identify tops and bottoms for Price, MACD Histogram, and RSI
-    price_peaks, _ = find_peaks(df['Close'])
-    price_troughs, _ = find_peaks(-df['Close'])
-    macd_peaks, _ = find_peaks(df['MACD_Histogram'])
-    macd_troughs, _ = find_peaks(-df['MACD_Histogram'])
-    rsi_peaks, _ = find_peaks(df['RSI'])
-    rsi_troughs, _ = find_peaks(-df['RSI'])
+    close = df['Close'].to_numpy(dtype=float)
+    histogram = df['MACD_Histogram'].to_numpy(dtype=float)
+    rsi = df['RSI'].to_numpy(dtype=float)
 
-    # Prepare columns
-    df['Divergence'] = np.nan
-    df['Convergence'] = np.nan
+    # Identify tops and bottoms for Price, MACD Histogram, and RSI as boolean masks
+    price_peaks = _extrema_mask(close)
+    price_troughs = _extrema_mask(-close)
+    macd_peaks = _extrema_mask(histogram)
+    macd_troughs = _extrema_mask(-histogram)
+    rsi_peaks = _extrema_mask(rsi)
+    rsi_troughs = _extrema_mask(-rsi)
 
-    # Check for divergence and convergence
-    for i in range(1, len(df)):
-        # Divergence or Convergence between Price and MACD Histogram
-        if i in price_troughs and i in macd_troughs:
-            # Bullish Divergence
-            if df['Close'].iloc[i] < df['Close'].iloc[i - 1] and df['MACD_Histogram'].iloc[i] > df['MACD_Histogram'].iloc[i - 1]:
-                df.loc[df.index[i], 'Divergence'] = 'Bullish Divergence'
-            # Bearish Convergence
-            elif df['Close'].iloc[i] < df['Close'].iloc[i - 1] and df['MACD_Histogram'].iloc[i] < df['MACD_Histogram'].iloc[i - 1]:
-                df.loc[df.index[i], 'Convergence'] = 'Bearish Convergence'
+    # Direction of each series compared with the previous row (False on the first row)
+    close_down, close_up = _direction(close)
+    macd_down, macd_up = _direction(histogram)
+    rsi_down, rsi_up = _direction(rsi)
 
-        if i in price_peaks and i in macd_peaks:
-            # Bearish Divergence
-            if df['Close'].iloc[i] > df['Close'].iloc[i - 1] and df['MACD_Histogram'].iloc[i] < df['MACD_Histogram'].iloc[i - 1]:
-                df.loc[df.index[i], 'Divergence'] = 'Bearish Divergence'
-            # Bullish Convergence
-            elif df['Close'].iloc[i] > df['Close'].iloc[i - 1] and df['MACD_Histogram'].iloc[i] > df['MACD_Histogram'].iloc[i - 1]:
-                df.loc[df.index[i], 'Convergence'] = 'Bullish Convergence'
+    price_macd_troughs = price_troughs & macd_troughs
+    price_macd_peaks = price_peaks & macd_peaks
+    price_rsi_troughs = price_troughs & rsi_troughs
+    price_rsi_peaks = price_peaks & rsi_peaks
 
-        # Divergence or Convergence between Price and RSI
-        if i in price_troughs and i in rsi_troughs:
-            # Bullish Divergence
-            if df['Close'].iloc[i] < df['Close'].iloc[i - 1] and df['RSI'].iloc[i] > df['RSI'].iloc[i - 1]:
-                df.loc[df.index[i], 'Divergence'] = 'Bullish Divergence (RSI)'
-            # Bearish Convergence
-            elif df['Close'].iloc[i] < df['Close'].iloc[i - 1] and df['RSI'].iloc[i] < df['RSI'].iloc[i - 1]:
-                df.loc[df.index[i], 'Convergence'] = 'Bearish Convergence (RSI)'
+    # RSI labels take precedence over MACD labels on the same row
+    df['Divergence'] = _select_labels(len(df), [
+        (price_rsi_troughs & close_down & rsi_up, 'Bullish Divergence (RSI)'),
+        (price_rsi_peaks & close_up & rsi_down, 'Bearish Divergence (RSI)'),
+        (price_macd_troughs & close_down & macd_up, 'Bullish Divergence'),
+        (price_macd_peaks & close_up & macd_down, 'Bearish Divergence'),
+    ])
+    df['Convergence'] = _select_labels(len(df), [
+        (price_rsi_troughs & close_down & rsi_down, 'Bearish Convergence (RSI)'),
+        (price_rsi_peaks & close_up & rsi_up, 'Bullish Convergence (RSI)'),
+        (price_macd_troughs & close_down & macd_down, 'Bearish Convergence'),
+        (price_macd_peaks & close_up & macd_up, 'Bullish Convergence'),
+    ])
+    return df
 
-        if i in price_peaks and i in rsi_peaks:
-            # Bearish Divergence
-            if df['Close'].iloc[i] > df['Close'].iloc[i - 1] and df['RSI'].iloc[i] < df['RSI'].iloc[i - 1]:
-                df.loc[df.index[i], 'Divergence'] = 'Bearish Divergence (RSI)'
-            # Bullish Convergence
-            elif df['Close'].iloc[i] > df['Close'].iloc[i - 1] and df['RSI'].iloc[i] > df['RSI'].iloc[i - 1]:
-                df.loc[df.index[i], 'Convergence'] = 'Bullish Convergence (RSI)'
+def _extrema_mask(values: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of the peaks `find_peaks` reports for the given values.
+    """
+    mask = np.zeros(len(values), dtype=bool)
+    peaks, _ = find_peaks(values)
+    mask[peaks] = True
+    return mask
 
-    return df
+def _select_labels(length: int, rules) -> np.ndarray:
+    """
+    Object array holding, per row, the label of the first matching (mask, label) rule, or NaN.
+    """
+    labels = np.full(length, np.nan, dtype=object)
+    for mask, label in reversed(rules):
+        labels[mask] = label
+    return labels
+
+def _direction(values: np.ndarray):
+    """
+    Masks of rows lower and higher than the previous row.
+    """
+    previous = np.concatenate(([np.nan], values[:-1]))
+    return values < previous, values > previous
 
 # Example usage
 # data = {
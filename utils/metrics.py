@@ -0,0 +1,149 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST as CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram
+
+from config.config import PROFILE_DIR, PROFILE_STAGES
+
+SPAN_BUFFER = 1000
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Metrics are registered in prometheus_client's default REGISTRY, which also exports the process metrics.
+# Symbols are left out of the labels: with the whole universe scanned, a series per symbol would
+# multiply the series count by thousands
+TICK_SECONDS = Histogram('signal_tick_duration_seconds', 'Duration of a scheduler tick from fetch to queued alerts.',
+                         buckets=DEFAULT_BUCKETS)
+TICKS = Counter('signal_ticks', 'Scheduler ticks by outcome.', ['status'])
+LAST_TICK_SUCCESS = Gauge('signal_last_tick_success_timestamp_seconds', 'Unix time the last successful tick finished.')
+STAGE_SECONDS = Histogram('signal_stage_duration_seconds', 'Duration of each pipeline stage.', ['stage'],
+                          buckets=DEFAULT_BUCKETS)
+FETCH_SECONDS = Histogram('binance_fetch_duration_seconds', 'Latency of fetching the candles of one symbol.',
+                          buckets=DEFAULT_BUCKETS)
+USED_WEIGHT = Gauge('binance_used_weight_1m', 'Request weight used in the current minute, as reported by Binance.')
+CANDLES_PROCESSED = Counter('candles_processed', 'Candles received from Binance.')
+ALERTS_SENT = Counter('alerts', 'Signals alerted on.', ['rule'])
+TELEGRAM_MESSAGES = Counter('telegram_messages', 'Telegram messages by delivery outcome.', ['status'])
+STARTUP_SECONDS = Gauge('service_startup_seconds', 'Seconds from process start until each start-up phase completed.',
+                        ['phase'])
+
+# Imported first thing by main.py, so this is close to the process start
+_started_at = time.time()
+# Unix time the last successful tick finished, None before the first one
+_last_tick: Optional[float] = None
+
+
+def mark_startup(phase: str) -> float:
+    """
+    Record that a start-up phase has completed.
+
+    :return: float - Seconds since start-up.
+    """
+    seconds = time.time() - _started_at
+    STARTUP_SECONDS.labels(phase=phase).set(seconds)
+    print(f"Startup: {phase} after {seconds:.2f}s")
+    return seconds
+
+
+def seconds_since_last_tick() -> Optional[float]:
+    """
+    Seconds since the last successful tick, or None before the first one.
+    """
+    return None if _last_tick is None else time.time() - _last_tick
+
+
+def mark_tick(seconds: float, success: bool = True) -> None:
+    """
+    Record a finished scheduler tick (or stream evaluation).
+    """
+    global _last_tick
+    TICK_SECONDS.observe(seconds)
+    TICKS.labels(status='success' if success else 'failure').inc()
+    if success:
+        _last_tick = time.time()
+        LAST_TICK_SUCCESS.set(_last_tick)
+
+
+def tick_age() -> float:
+    """
+    Seconds since the last successful tick, counted from start-up until the first one.
+    """
+    age = seconds_since_last_tick()
+    return time.time() - _started_at if age is None else age
+
+
+SECONDS_SINCE_TICK = Gauge('signal_seconds_since_last_tick',
+                           'Seconds since the last successful tick; NaN before the first one.')
+SECONDS_SINCE_TICK.set_function(lambda: float('nan') if _last_tick is None else time.time() - _last_tick)
+
+
+# Spans not yet collected; the oldest are dropped if nobody collects them
+_spans: Deque[Dict[str, object]] = deque(maxlen=SPAN_BUFFER)
+_spans_lock = threading.Lock()
+_profiling = threading.local()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a pipeline stage into `signal_stage_duration_seconds` and the span log.
+
+    Stages listed in PROFILE_STAGES are also run under cProfile, and their
+    accumulated stats are written to `<PROFILE_DIR>/<stage>.prof` for pstats or
+    snakeviz. Only the thread entering the span is profiled, and a stage
+    nested in one already being profiled is only timed.
+    """
+    profiler = None
+    if stage in PROFILE_STAGES and not getattr(_profiling, 'active', False):
+        profiler = cProfile.Profile()
+        _profiling.active = True
+        profiler.enable()
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            _profiling.active = False
+            _save_profile(stage, profiler)
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+        with _spans_lock:
+            _spans.append({'stage': stage, 'start': started_at, 'seconds': round(seconds, 6)})
+
+
+_profile_lock = threading.Lock()
+
+
+def _save_profile(stage: str, profiler: cProfile.Profile) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{stage}.prof")
+    with _profile_lock:
+        stats = pstats.Stats(profiler)
+        if os.path.exists(path):
+            stats.add(path)
+        stats.dump_stats(path)
+
+
+def collect_spans() -> List[Dict[str, object]]:
+    """
+    Return and clear the spans recorded since the last call, oldest first.
+    """
+    with _spans_lock:
+        spans = list(_spans)
+        _spans.clear()
+    return sorted(spans, key=lambda s: s['start'])
+
+
+def log_spans(event: str, **fields) -> None:
+    """
+    Print the collected spans as one JSON line.
+    """
+    print(json.dumps({'event': event, **fields, 'spans': collect_spans()}, default=str))
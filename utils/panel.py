@@ -0,0 +1,176 @@
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from data.candle_buffer import CandleBuffer
+from utils.metrics import span
+from utils.rsi import _recursive_smooth
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+def build_panel(dfs: List[Union[pd.DataFrame, CandleBuffer]], symbols: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Stack per-symbol candles into 2-D (symbols x bars) arrays.
+
+    Frames are aligned on their last bar; shorter histories are padded with NaN
+    at the front, so every indicator window touching the padding is NaN, just
+    as it would be for the symbol on its own.
+
+    :param dfs: List[pd.DataFrame] - Candles in the `PriceChecker.fetch_candles` layout,
+        as DataFrames or `CandleBuffer`s, whose columns are read without a copy.
+    :param symbols: List[str] - Symbol of each frame.
+    :return: dict - 'symbols', 'Date' and one float64 array per OHLCV field.
+    """
+    if len(dfs) != len(symbols):
+        raise ValueError("Each DataFrame must have a matching symbol.")
+    bars = max((len(df) for df in dfs), default=0)
+    panel = {'symbols': np.asarray(symbols, dtype=object)}
+    panel['Date'] = np.full((len(dfs), bars), np.datetime64('NaT'), dtype='datetime64[ns]')
+    for field in PANEL_FIELDS:
+        panel[field] = np.full((len(dfs), bars), np.nan)
+    for row, df in enumerate(dfs):
+        offset = bars - len(df)
+        panel['Date'][row, offset:] = np.asarray(df['Date'], dtype='datetime64[ns]')
+        for field in PANEL_FIELDS:
+            panel[field][row, offset:] = np.asarray(df[field], dtype=float)
+    return panel
+
+
+def _trailing_sums(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Sum of each trailing window of `period` bars, from cumulative sums; the first period - 1 bars are NaN.
+    """
+    if period <= 0:
+        raise ValueError("Period must be greater than 0")
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] >= period:
+        totals = np.cumsum(values, axis=-1)
+        result[..., period - 1:] = totals[..., period - 1:]
+        result[..., period:] -= totals[..., :-period]
+    return result
+
+
+def _incomplete_windows(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Mask of bars whose trailing window is shorter than `period` or contains NaN.
+    """
+    return ~(_trailing_sums(np.isnan(values).astype(float), period) == 0)
+
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Moving average per row, matching `utils.ma.calculate_moving_average`.
+    Runs in O(bars) whatever the period, so it also suits long backtest histories.
+    """
+    result = _trailing_sums(np.nan_to_num(values), period) / period
+    result[_incomplete_windows(values, period)] = np.nan
+    return result
+
+
+def _rolling_extreme(values: np.ndarray, period: int, extreme_filter, fill: float) -> np.ndarray:
+    # A trailing window is a centred filter window shifted by (period - 1) // 2
+    result = extreme_filter(np.where(np.isnan(values), fill, values), period, axis=-1, origin=(period - 1) // 2)
+    result[_incomplete_windows(values, period)] = np.nan
+    return result
+
+
+def rolling_min(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Rolling minimum per row over the last `period` bars, including the current one.
+    """
+    # scipy.ndimage is imported on first use to keep it off the service's start-up path
+    from scipy.ndimage import minimum_filter1d
+    return _rolling_extreme(values, period, minimum_filter1d, np.inf)
+
+
+def rolling_max(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Rolling maximum per row over the last `period` bars, including the current one.
+    """
+    from scipy.ndimage import maximum_filter1d
+    return _rolling_extreme(values, period, maximum_filter1d, -np.inf)
+
+
+def shift(values: np.ndarray, bars: int = 1) -> np.ndarray:
+    """
+    Shift every row `bars` bars later along the bar axis, padding the front with NaN.
+    """
+    result = np.full(values.shape, np.nan)
+    if bars < values.shape[-1]:
+        result[..., bars:] = values[..., :values.shape[-1] - bars]
+    return result
+
+
+def panel_rsi_wilders(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Wilder's RSI per row, matching `utils.rsi.calculate_rsi_wilders`.
+
+    Rows are grouped by where their history starts, so each group is smoothed
+    with a single call to the shared recursive kernel.
+    """
+    result = np.full(close.shape, np.nan)
+    valid = ~np.isnan(close)
+    starts = np.where(valid.any(axis=1), valid.argmax(axis=1), close.shape[1])
+    for start in np.unique(starts):
+        rows = np.flatnonzero(starts == start)
+        values = close[rows, start:]
+        if values.shape[1] < period:
+            continue
+        delta = np.diff(values, axis=1, prepend=np.nan)
+        # The first bar counts as no change, as in the single-symbol version
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        avg_gain = _recursive_smooth(gain, 1 / period, gain[:, :period].mean(axis=1), period - 1)
+        avg_loss = _recursive_smooth(loss, 1 / period, loss[:, :period].mean(axis=1), period - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = avg_gain / avg_loss
+        result[rows, start:] = 100 - (100 / (1 + rs))
+    return result
+
+
+def compute_indicators(panel: Dict[str, np.ndarray], ma_periods: Sequence[int] = (20, 50, 200),
+                       volume_period: int = 20, rsi_period: int = 14,
+                       breakout_periods: Sequence[int] = (20, 50, 200)) -> Dict[str, np.ndarray]:
+    """
+    Compute the `get_price` indicators for every symbol at once.
+
+    :param panel: dict - Output of `build_panel`.
+    :return: dict - One (symbols x bars) array per indicator: MA{p}, RSI,
+        Average_Volume_{volume_period}, Volume_Rate, Percent_Change,
+        MinLow{p} and MaxHigh{p}. The breakout levels MinLow{p}/MaxHigh{p}
+        cover the `p` bars before each bar, so the bar itself can break them.
+    """
+    close = panel['Close']
+    indicators = {}
+    with span('indicator.ma'):
+        for period in ma_periods:
+            indicators[f'MA{period}'] = rolling_mean(close, period)
+    with span('indicator.rsi'):
+        indicators['RSI'] = panel_rsi_wilders(close, rsi_period)
+    with span('indicator.volume'):
+        average_volume = rolling_mean(panel['Volume'], volume_period)
+        indicators[f'Average_Volume_{volume_period}'] = average_volume
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indicators['Volume_Rate'] = panel['Volume'] / average_volume
+            indicators['Percent_Change'] = ((close - panel['Open']) / panel['Open']) * 100
+    with span('indicator.breakout'):
+        for period in breakout_periods:
+            indicators[f'MinLow{period}'] = shift(rolling_min(panel['Low'], period))
+            indicators[f'MaxHigh{period}'] = shift(rolling_max(panel['High'], period))
+    return indicators
+
+
+def latest_rows(panel: Dict[str, np.ndarray], indicators: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Take the last bar of every symbol as one row per symbol.
+
+    :return: pd.DataFrame - Indexed by symbol, with 'Date', the OHLCV fields and every indicator.
+    """
+    columns = {'Date': panel['Date'][:, -1]}
+    for field in PANEL_FIELDS:
+        columns[field] = panel[field][:, -1]
+    for name, values in indicators.items():
+        columns[name] = values[:, -1]
+    return pd.DataFrame(columns, index=pd.Index(panel['symbols'], name='Symbol'))
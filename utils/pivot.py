@@ -1,12 +1,120 @@
+from typing import Dict, Optional
+
+import numpy as np
 import pandas as pd
 
+from config.config import LEVEL_PIVOT_INTERVAL, LEVEL_PIVOTS
+from data.timeframes import interval_to_milliseconds
+
+PIVOT_METHODS = ('classic', 'fibonacci', 'camarilla')
+PIVOT_LEVELS = ('S3', 'S2', 'S1', 'P', 'R1', 'R2', 'R3')
+
 def calculate_pivot(df: pd.DataFrame) -> pd.Series:
     """
     Calculate pivot point (P) for the given DataFrame.
-    
+
     :param df: DataFrame with columns ['High', 'Low', 'Close'].
     :return: Series containing the pivot points.
     """
     if not {'High', 'Low', 'Close'}.issubset(df.columns):
         raise ValueError("DataFrame must contain 'High', 'Low', and 'Close' columns.")
-    return (df['High'] + df['Low'] + df['Close']) / 3
\ No newline at end of file
+    return (df['High'] + df['Low'] + df['Close']) / 3
+
+def pivot_levels(high: np.ndarray, low: np.ndarray, close: np.ndarray, method: str = 'classic') -> Dict[str, np.ndarray]:
+    """
+    Calculate the pivot point and three support/resistance levels from a period's high, low and close.
+
+    Works element-wise on arrays of any shape, so every period of every symbol
+    is computed in one pass.
+
+    :param high: np.ndarray - Highs of the periods.
+    :param low: np.ndarray - Lows of the periods.
+    :param close: np.ndarray - Closes of the periods.
+    :param method: str - 'classic', 'fibonacci' or 'camarilla'.
+    :return: dict - One array per level of `PIVOT_LEVELS`.
+    """
+    high, low, close = (np.asarray(values, dtype=float) for values in (high, low, close))
+    pivot = (high + low + close) / 3
+    spread = high - low
+    if method == 'classic':
+        return {
+            'S3': low - 2 * (high - pivot),
+            'S2': pivot - spread,
+            'S1': 2 * pivot - high,
+            'P': pivot,
+            'R1': 2 * pivot - low,
+            'R2': pivot + spread,
+            'R3': high + 2 * (pivot - low),
+        }
+    if method == 'fibonacci':
+        levels = {'P': pivot}
+        for i, ratio in enumerate((0.382, 0.618, 1.0), start=1):
+            levels[f'S{i}'] = pivot - ratio * spread
+            levels[f'R{i}'] = pivot + ratio * spread
+        return {level: levels[level] for level in PIVOT_LEVELS}
+    if method == 'camarilla':
+        levels = {'P': pivot}
+        for i, divisor in enumerate((12, 6, 4), start=1):
+            levels[f'S{i}'] = close - spread * 1.1 / divisor
+            levels[f'R{i}'] = close + spread * 1.1 / divisor
+        return {level: levels[level] for level in PIVOT_LEVELS}
+    raise ValueError(f"Unknown pivot method {method!r}; expected one of {', '.join(PIVOT_METHODS)}.")
+
+def calculate_pivot_levels(candles: pd.DataFrame, method: str = 'classic') -> pd.DataFrame:
+    """
+    Calculate the pivot levels in force during each candle, from the candle before it.
+
+    Pass higher-timeframe candles for intraday levels, e.g. daily candles
+    (`data.timeframes.resample_candles(candles, '1d')`) for the levels of each day.
+
+    :param candles: pd.DataFrame - Candles with 'High', 'Low' and 'Close'.
+    :param method: str - 'classic', 'fibonacci' or 'camarilla'.
+    :return: pd.DataFrame - One column per level of `PIVOT_LEVELS`, indexed like
+        `candles`; the first row is NaN as it has no previous candle.
+    """
+    if not {'High', 'Low', 'Close'}.issubset(candles.columns):
+        raise ValueError("DataFrame must contain 'High', 'Low', and 'Close' columns.")
+    previous = candles[['High', 'Low', 'Close']].shift()
+    levels = pivot_levels(previous['High'], previous['Low'], previous['Close'], method)
+    return pd.DataFrame(levels, index=candles.index)
+
+def previous_pivot_levels(dates: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                          interval: str = LEVEL_PIVOT_INTERVAL, method: str = LEVEL_PIVOTS) -> Optional[np.ndarray]:
+    """
+    Calculate the pivot levels in force during the last candle of each series, from the
+    `interval` period before the one that candle opened in, e.g. yesterday's for '1d'.
+
+    The period's high, low and close are reduced from the candles themselves, the
+    same as resampling them with `data.timeframes.resample_buffer`, but only for the
+    one period every series needs.
+
+    :param dates: np.ndarray - Open times, one series per row (or a single 1-D series); NaT pads the front.
+    :param high: np.ndarray - Highs, same shape as `dates`.
+    :param low: np.ndarray - Lows, same shape as `dates`.
+    :param close: np.ndarray - Closes, same shape as `dates`.
+    :param interval: str - Period of the pivots, e.g. '1d' or '1w'.
+    :param method: str - 'classic', 'fibonacci' or 'camarilla'; empty for no pivot levels.
+    :return: np.ndarray - (series x levels) in `PIVOT_LEVELS` order, NaN where the candles
+        do not cover the whole previous period; None when `method` is empty.
+    """
+    if not method:
+        return None
+    dates = np.atleast_2d(np.asarray(dates, dtype='datetime64[ms]'))
+    high, low, close = (np.atleast_2d(np.asarray(values, dtype=float)) for values in (high, low, close))
+    if not dates.shape[1]:
+        return np.full((len(dates), len(PIVOT_LEVELS)), np.nan)
+    rows = np.arange(len(dates))
+    valid = ~np.isnat(dates)
+    interval_ms = interval_to_milliseconds(interval)
+    periods = dates.astype(np.int64) // interval_ms
+    previous = periods[:, -1] - 1
+    in_previous = valid & (periods == previous[:, np.newaxis])
+    # A series starting after the previous period began would give it a partial high and low
+    first_time = np.where(valid.any(axis=1), dates.astype(np.int64)[rows, valid.argmax(axis=1)], np.iinfo(np.int64).max)
+    complete = in_previous.any(axis=1) & valid[:, -1] & (first_time <= previous * interval_ms)
+    last = dates.shape[1] - 1 - in_previous[:, ::-1].argmax(axis=1)
+    levels = pivot_levels(np.where(in_previous, high, -np.inf).max(axis=1),
+                          np.where(in_previous, low, np.inf).min(axis=1), close[rows, last], method)
+    result = np.column_stack([levels[level] for level in PIVOT_LEVELS])
+    result[~complete] = np.nan
+    return result
@@ -1,6 +1,47 @@
 import numpy as np
 import pandas as pd
 
+def _recursive_smooth(values: np.ndarray, alpha: float, seed, start: int = 0) -> np.ndarray:
+    """
+    Exponential smoothing kernel shared by the RSI variants.
+    Computes y[start] = seed and y[i] = alpha * values[i] + (1 - alpha) * y[i - 1] afterwards,
+    as a first-order recursive filter instead of a Python loop.
+    2-D values are smoothed row by row along the last axis, with one seed per row.
+    :param values: np.ndarray, the values to smooth.
+    :param alpha: float, the smoothing factor (1 / period for Wilder's method).
+    :param seed: float or np.ndarray, the value of the average at `start` (one per row for 2-D values).
+    :param start: int, the index at which the recursion starts; earlier values are NaN.
+    :return: np.ndarray, the smoothed values.
+    """
+    result = np.full(values.shape, np.nan)
+    if start >= values.shape[-1]:
+        return result
+    decay = 1 - alpha
+    seed = np.asarray(seed, dtype=float)
+    result[..., start] = seed
+    if start + 1 < values.shape[-1]:
+        # scipy.signal takes about a second to import, so it is loaded on the first call
+        from scipy.signal import lfilter
+        result[..., start + 1:], _ = lfilter([alpha], [1, -decay], values[..., start + 1:], axis=-1,
+                                             zi=decay * seed[..., np.newaxis])
+    return result
+
+def _wilder_average(values: pd.Series, period: int) -> np.ndarray:
+    """
+    Wilder's running average: a simple mean of the first `period` values, then smoothing with alpha = 1 / period.
+    """
+    sma = values.rolling(window=period, min_periods=period).mean().to_numpy()
+    return _recursive_smooth(values.to_numpy(dtype=float), 1 / period, sma[period - 1], period - 1)
+
+def _gains_losses(data: pd.Series):
+    """
+    Split price changes into gains and losses; the first bar counts as no change.
+    """
+    delta = data.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    return gain, loss
+
 def calculate_rsi_fireant(data: pd.Series, period: int = 14) -> pd.Series:
     """
     Calculate the RSI using Fireant-compatible smoothing (Wilder's method).
@@ -21,8 +62,10 @@ def calculate_rsi_fireant(data: pd.Series, period: int = 14) -> pd.Series:
     avg_loss = loss.rolling(window=period, min_periods=period).mean()
 
     # Use exponential moving average (EMA) for smoothing
-    avg_gain = avg_gain.fillna(0).ewm(alpha=1 / period, adjust=False).mean()
-    avg_loss = avg_loss.fillna(0).ewm(alpha=1 / period, adjust=False).mean()
+    avg_gain = avg_gain.fillna(0).to_numpy()
+    avg_loss = avg_loss.fillna(0).to_numpy()
+    avg_gain = pd.Series(_recursive_smooth(avg_gain, 1 / period, avg_gain[0]), index=data.index)
+    avg_loss = pd.Series(_recursive_smooth(avg_loss, 1 / period, avg_loss[0]), index=data.index)
 
     # Calculate RS (relative strength)
     rs = avg_gain / avg_loss
@@ -44,38 +87,26 @@ def calculate_rsi_wilders(data: pd.Series, period: int = 14) -> pd.Series:
     if len(data) < period:
         raise ValueError(f"Data length must be at least {period}.")
 
-    # Calculate daily price changes
-    delta = data.diff()
-
     # Separate gains and losses
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    gain, loss = _gains_losses(data)
 
-    # Wilder's smoothed averages
-    avg_gain = gain.rolling(window=period, min_periods=period).mean()
-    avg_loss = loss.rolling(window=period, min_periods=period).mean()
-
-    # Apply Wilder's smoothing for subsequent values
-    for i in range(period, len(data)):
-        avg_gain.iloc[i] = (avg_gain.iloc[i - 1] * (period - 1) + gain.iloc[i]) / period
-        avg_loss.iloc[i] = (avg_loss.iloc[i - 1] * (period - 1) + loss.iloc[i]) / period
+    # Wilder's smoothed averages: SMA seed, then (prev * (period - 1) + current) / period
+    avg_gain = _wilder_average(gain, period)
+    avg_loss = _wilder_average(loss, period)
 
     # Calculate RS (relative strength)
-    rs = avg_gain / avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
     # Calculate RSI
     rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return pd.Series(rsi, index=data.index, name=data.name)
 
 def calculate_rsi(data: pd.Series, period: int=14) -> pd.Series:
     if len(data) < period:
         raise ValueError(f"Data length must be at least {period}")
     
-    # Calculate daily price changes
-    delta = data.diff()
-    
     # Gains and losses
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    gain, loss = _gains_losses(data)
     
     # Calculate SMA of gains and losses
     avg_gain = gain.rolling(window=period, min_periods=period).mean()
@@ -94,12 +125,8 @@ def calculate_rsi(data: pd.Series, period: int=14) -> pd.Series:
 def calculate_rsi_with_smoothing(data: pd.Series, period: int = 14, smooth_period: int = 14) -> pd.Series:
     if len(data) < period + smooth_period:
         raise ValueError(f"Data length must be at least {period + smooth_period}")
-    # Calculate daily price changes
-    delta = data.diff()
-
     # Gains and losses
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    gain, loss = _gains_losses(data)
 
     # Calculate initial Average Gain and Average Loss
     avg_gain = gain.rolling(window=period, min_periods=period).mean()
@@ -123,16 +150,13 @@ def calculate_rsi_with_ema(data: pd.Series, period: int = 14) -> pd.Series:
     if len(data) < period:
         raise ValueError(f"Data length must be at least {period}")
 
-    # Calculate daily price changes
-    delta = data.diff()
-
     # Gains and losses
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    gain, loss = _gains_losses(data)
 
     # Calculate the exponential moving averages of gains and losses
-    avg_gain = gain.ewm(span=period, adjust=False).mean()
-    avg_loss = loss.ewm(span=period, adjust=False).mean()
+    alpha = 2 / (period + 1)
+    avg_gain = pd.Series(_recursive_smooth(gain.to_numpy(dtype=float), alpha, gain.iloc[0]), index=data.index)
+    avg_loss = pd.Series(_recursive_smooth(loss.to_numpy(dtype=float), alpha, loss.iloc[0]), index=data.index)
 
     # Avoid division by zero
     avg_loss = avg_loss.replace(0, np.nan)
@@ -142,3 +166,17 @@ def calculate_rsi_with_ema(data: pd.Series, period: int = 14) -> pd.Series:
     rsi = 100 - (100 / (1 + rs))
 
     return rsi.fillna(0)  # Fill NaN values with 0 for initial periods
+
+def _calculate_rsi_wilders_loop(data: pd.Series, period: int = 14) -> pd.Series:
+    """
+    Reference loop implementation of `calculate_rsi_wilders`, which the tests check it against
+    and test/benchmark.py times it against.
+    """
+    gain, loss = _gains_losses(data)
+    avg_gain = gain.rolling(window=period, min_periods=period).mean()
+    avg_loss = loss.rolling(window=period, min_periods=period).mean()
+    for i in range(period, len(data)):
+        avg_gain.iloc[i] = (avg_gain.iloc[i - 1] * (period - 1) + gain.iloc[i]) / period
+        avg_loss.iloc[i] = (avg_loss.iloc[i - 1] * (period - 1) + loss.iloc[i]) / period
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
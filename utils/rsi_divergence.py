@@ -1,106 +1,89 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 def find_pivot_points(data, left_bars, right_bars):
     """Find pivot highs and lows in the data"""
-    pivot_highs = []
-    pivot_lows = []
-    for i in range(left_bars, len(data) - right_bars):
-        window = data[i-left_bars:i+right_bars+1]
-        if data[i] == max(window):
-            pivot_highs.append(i)
-        if data[i] == min(window):
-            pivot_lows.append(i)
-    return pivot_highs, pivot_lows
+    data = np.asarray(data, dtype=float)
+    if len(data) < left_bars + right_bars + 1:
+        return [], []
+    # One row per candidate bar, holding the bar and its left/right neighbours
+    windows = sliding_window_view(data, left_bars + right_bars + 1)
+    centers = data[left_bars:len(data) - right_bars]
+    # Windows containing NaN (e.g. the RSI warm-up) never produce a pivot
+    pivot_highs = np.flatnonzero(centers == windows.max(axis=1)) + left_bars
+    pivot_lows = np.flatnonzero(centers == windows.min(axis=1)) + left_bars
+    return pivot_highs.tolist(), pivot_lows.tolist()
+
+def _pivot_pairs(pivot_idx, lookback_range):
+    """Consecutive (previous, current) pivot pairs whose distance is within the lookback range"""
+    pivot_idx = np.asarray(pivot_idx, dtype=int)
+    prev_idx = pivot_idx[:-1]
+    curr_idx = pivot_idx[1:]
+    distance = curr_idx - prev_idx
+    in_range = (lookback_range[0] <= distance) & (distance <= lookback_range[1])
+    return prev_idx[in_range], curr_idx[in_range]
+
+def _divergence_points(prev_idx, curr_idx, mask):
+    return list(zip(prev_idx[mask].tolist(), curr_idx[mask].tolist()))
 
 def check_regular_bullish_divergence(price, rsi, pivot_idx, lookback_range):
     """Check for regular bullish divergence"""
-    divergence_points = []
-    print("lookback", lookback_range)
-
-    for i in range(len(pivot_idx)-1):
-        curr_idx = pivot_idx[i]
-        prev_idx = pivot_idx[i-1]
-        print("cur_idx", curr_idx)
-        if lookback_range[0] <= curr_idx - prev_idx <= lookback_range[1]:
-            if price[curr_idx] < price[prev_idx] and rsi[curr_idx] > rsi[prev_idx]:
-                divergence_points.append((prev_idx, curr_idx))
-    return divergence_points
+    price, rsi = np.asarray(price, dtype=float), np.asarray(rsi, dtype=float)
+    prev_idx, curr_idx = _pivot_pairs(pivot_idx, lookback_range)
+    # Price: Lower Low, RSI: Higher Low
+    mask = (price[curr_idx] < price[prev_idx]) & (rsi[curr_idx] > rsi[prev_idx])
+    return _divergence_points(prev_idx, curr_idx, mask)
 
 
 def check_hidden_bullish_divergence(price, rsi, pivot_idx, lookback_range):
     """Check for hidden bullish divergence"""
-    divergence_points = []
-
-    for i in range(len(pivot_idx)-1):
-        curr_idx = pivot_idx[i]
-        prev_idx = pivot_idx[i-1]
-
-        if lookback_range[0] <= curr_idx - prev_idx <= lookback_range[1]:
-            # Price: Higher Low
-            if price[curr_idx] > price[prev_idx]:
-                # RSI: Lower Low
-                if rsi[curr_idx] < rsi[prev_idx]:
-                    divergence_points.append((prev_idx, curr_idx))
-    return divergence_points
+    price, rsi = np.asarray(price, dtype=float), np.asarray(rsi, dtype=float)
+    prev_idx, curr_idx = _pivot_pairs(pivot_idx, lookback_range)
+    # Price: Higher Low, RSI: Lower Low
+    mask = (price[curr_idx] > price[prev_idx]) & (rsi[curr_idx] < rsi[prev_idx])
+    return _divergence_points(prev_idx, curr_idx, mask)
 
 
 def check_regular_bearish_divergence(price, rsi, pivot_idx, lookback_range):
     """Check for regular bearish divergence"""
-    divergence_points = []
-
-    for i in range(len(pivot_idx)-1):
-        curr_idx = pivot_idx[i]
-        prev_idx = pivot_idx[i-1]
-
-        if lookback_range[0] <= curr_idx - prev_idx <= lookback_range[1]:
-            # Price: Higher High
-            if price[curr_idx] > price[prev_idx]:
-                # RSI: Lower High
-                if rsi[curr_idx] < rsi[prev_idx]:
-                    divergence_points.append((prev_idx, curr_idx))
-    return divergence_points
+    price, rsi = np.asarray(price, dtype=float), np.asarray(rsi, dtype=float)
+    prev_idx, curr_idx = _pivot_pairs(pivot_idx, lookback_range)
+    # Price: Higher High, RSI: Lower High
+    mask = (price[curr_idx] > price[prev_idx]) & (rsi[curr_idx] < rsi[prev_idx])
+    return _divergence_points(prev_idx, curr_idx, mask)
 
 
 def check_hidden_bearish_divergence(price, rsi, pivot_idx, lookback_range):
     """Check for hidden bearish divergence"""
-    divergence_points = []
-
-    for i in range(len(pivot_idx)-1):
-        curr_idx = pivot_idx[i]
-        prev_idx = pivot_idx[i-1]
-
-        if lookback_range[0] <= curr_idx - prev_idx <= lookback_range[1]:
-            # Price: Lower High
-            if price[curr_idx] < price[prev_idx]:
-                # RSI: Higher High
-                if rsi[curr_idx] > rsi[prev_idx]:
-                    divergence_points.append((prev_idx, curr_idx))
-    return divergence_points
+    price, rsi = np.asarray(price, dtype=float), np.asarray(rsi, dtype=float)
+    prev_idx, curr_idx = _pivot_pairs(pivot_idx, lookback_range)
+    # Price: Lower High, RSI: Higher High
+    mask = (price[curr_idx] < price[prev_idx]) & (rsi[curr_idx] > rsi[prev_idx])
+    return _divergence_points(prev_idx, curr_idx, mask)
 
 
 def find_rsi_divergences(df: pd.DataFrame, left_bars: int=5, right_bars: int=5,
                          range_lower: int=5, range_upper: int=60):
-    rsi = df['RSI'].to_numpy()
+    rsi = df['RSI'].to_numpy(dtype=float)
+    low = df['Low'].to_numpy(dtype=float)
+    high = df['High'].to_numpy(dtype=float)
     pivot_highs, pivot_lows = find_pivot_points(rsi, left_bars, right_bars)
     lookback_range = (range_lower, range_upper)
-    print(df['Low'])
-    print(rsi)
     divergences = {
         'regular_bullish': check_regular_bullish_divergence(
-            df['Low'], rsi, pivot_lows, lookback_range
+            low, rsi, pivot_lows, lookback_range
         ),
         'hidden_bullish': check_hidden_bullish_divergence(
-            df['Low'], rsi, pivot_lows, lookback_range
+            low, rsi, pivot_lows, lookback_range
         ),
         'regular_bearish': check_regular_bearish_divergence(
-            df['High'], rsi, pivot_highs, lookback_range
+            high, rsi, pivot_highs, lookback_range
         ),
         'hidden_bearish': check_hidden_bearish_divergence(
-            df['High'], rsi, pivot_highs, lookback_range
+            high, rsi, pivot_highs, lookback_range
         )
     }
-    print(df['Low'][divergences['regular_bullish'][0][1]])
     return divergences
 
 # Sử dụng:
@@ -0,0 +1,160 @@
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from config.config import (BREAKOUT_PERIODS, LEVEL_LOOKBACK, MA_PERIODS, RSI_LOWER, RSI_UPPER, VOLUME_PERIOD,
+                           VOLUME_SPIKE_RATE)
+
+SIGNAL_COLUMNS = ['Symbol', 'Rule', 'Kind', 'Period', 'Value']
+
+
+class Rule:
+    """
+    A named signal condition evaluated over a symbols x features table.
+
+    `condition` returns a boolean mask with one entry per symbol and `value`
+    the number reported with the signal (the RSI, the volume rate, the MA or
+    the broken level). Both also accept a dict of (symbols x bars) arrays, such
+    as `utils.panel.compute_indicators` output merged with the panel, and then
+    return (symbols x bars) arrays.
+
+    `direction` is the move the signal expects: 1 for a rise, -1 for a fall, or
+    a callable returning it per symbol (and bar) like `value`, for rules that
+    can go either way. The backtest signs the forward returns with it.
+    """
+
+    def __init__(self, name: str, kind: str, condition: Callable[[pd.DataFrame], np.ndarray],
+                 value: Callable[[pd.DataFrame], np.ndarray], period: Optional[int] = None,
+                 direction: Union[int, Callable[[pd.DataFrame], np.ndarray]] = 1):
+        self.name = name
+        self.kind = kind
+        self.condition = condition
+        self.value = value
+        self.period = period
+        self.direction = direction
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r})"
+
+
+def _get(features, name: str) -> np.ndarray:
+    return np.asarray(features[name], dtype=float)
+
+
+def _column(name: str) -> Callable[[pd.DataFrame], np.ndarray]:
+    return lambda features: _get(features, name)
+
+
+def _volume_rate(volume_period: int) -> Callable[[pd.DataFrame], np.ndarray]:
+    def rate(features: pd.DataFrame) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _get(features, 'Volume') / _get(features, f'Average_Volume_{volume_period}')
+    return rate
+
+
+def _ma_cross_rules(period: int) -> List[Rule]:
+    """
+    The four `utils.ma.notify_cross` outcomes as mutually exclusive rules.
+    """
+    ma_column = f'MA{period}'
+
+    def crossed_above(f):
+        return (_get(f, 'Open') < _get(f, ma_column)) & (_get(f, 'Close') > _get(f, ma_column))
+
+    def crossed_below(f):
+        return (_get(f, 'Open') > _get(f, ma_column)) & (_get(f, 'Close') < _get(f, ma_column))
+
+    def touched(f):
+        return (_get(f, 'Low') < _get(f, ma_column)) & (_get(f, 'High') > _get(f, ma_column)) \
+            & ~crossed_above(f) & ~crossed_below(f)
+
+    # A touch from above that closes over the MA holds it as support, one from below as resistance
+    conditions = {
+        'crossed_above': (crossed_above, 1),
+        'crossed_below': (crossed_below, -1),
+        'reached_from_above': (lambda f: touched(f) & (_get(f, 'Close') > _get(f, ma_column)), 1),
+        'reached_from_below': (lambda f: touched(f) & (_get(f, 'Close') < _get(f, ma_column)), -1),
+    }
+    return [Rule(f'{ma_column}_{kind}', kind, condition, _column(ma_column), period, direction)
+            for kind, (condition, direction) in conditions.items()]
+
+
+def compile_rules(rsi_lower: float = RSI_LOWER, rsi_upper: float = RSI_UPPER,
+                  volume_spike_rate: float = VOLUME_SPIKE_RATE, volume_period: int = VOLUME_PERIOD,
+                  ma_periods: Sequence[int] = MA_PERIODS,
+                  breakout_periods: Sequence[int] = BREAKOUT_PERIODS,
+                  level_breaks: bool = LEVEL_LOOKBACK > 0) -> List[Rule]:
+    """
+    Build the signal rules from their thresholds and periods.
+
+    The rule order is the order signals are reported in for each symbol.
+
+    :param rsi_lower: float - RSI below this is oversold.
+    :param rsi_upper: float - RSI above this is overbought.
+    :param volume_spike_rate: float - Minimum Volume / Average_Volume ratio for a volume spike.
+    :param volume_period: int - Period of the average volume column.
+    :param ma_periods: Sequence[int] - Moving averages checked for crosses.
+    :param breakout_periods: Sequence[int] - Lookbacks of the low/high breakout checks.
+    :param level_breaks: bool - Add the support/resistance break rules, which read the
+        'Support' and 'Resistance' columns of `utils.analyze.break_levels`.
+    :return: List[Rule] - The compiled rules.
+    """
+    rate = _volume_rate(volume_period)
+    average_volume = f'Average_Volume_{volume_period}'
+    rules = [
+        # Oversold expects a rebound and overbought a pullback
+        Rule('rsi', 'rsi', lambda f: (_get(f, 'RSI') < rsi_lower) | (_get(f, 'RSI') > rsi_upper), _column('RSI'),
+             direction=lambda f: np.where(_get(f, 'RSI') < rsi_lower, 1, -1)),
+        # A spike follows the direction of its candle
+        Rule('volume_spike', 'volume_spike',
+             lambda f: (_get(f, 'Volume') > _get(f, average_volume)) & (rate(f) > volume_spike_rate), rate, volume_period,
+             direction=lambda f: np.sign(_get(f, 'Close') - _get(f, 'Open'))),
+    ]
+    for period in ma_periods:
+        rules.extend(_ma_cross_rules(period))
+    for period in breakout_periods:
+        low, high = f'MinLow{period}', f'MaxHigh{period}'
+        rules.append(Rule(f'breakout_below_{period}', 'breakout_below',
+                          lambda f, low=low: _get(f, 'Close') < _get(f, low), _column(low), period, -1))
+        rules.append(Rule(f'breakout_above_{period}', 'breakout_above',
+                          lambda f, high=high: _get(f, 'Close') > _get(f, high), _column(high), period, 1))
+    if level_breaks:
+        rules.append(Rule('support_break', 'level_break_below',
+                          lambda f: _get(f, 'Close') < _get(f, 'Support'), _column('Support'), direction=-1))
+        rules.append(Rule('resistance_break', 'level_break_above',
+                          lambda f: _get(f, 'Close') > _get(f, 'Resistance'), _column('Resistance'), direction=1))
+    return rules
+
+
+def evaluate_mask(features: pd.DataFrame, rules: List[Rule]) -> np.ndarray:
+    """
+    Evaluate every rule for every symbol.
+
+    :return: np.ndarray - Boolean (symbols x rules) matrix of triggered rules,
+        or (symbols x bars x rules) when the features are (symbols x bars) arrays.
+    """
+    return np.stack([rule.condition(features) for rule in rules], axis=-1)
+
+
+def evaluate_rules(features: pd.DataFrame, rules: List[Rule]) -> pd.DataFrame:
+    """
+    Evaluate the rules and return the triggered signals.
+
+    :param features: pd.DataFrame - One row per symbol, indexed by symbol.
+    :param rules: List[Rule] - Rules from `compile_rules`.
+    :return: pd.DataFrame - One row per triggered signal with 'Symbol', 'Rule',
+        'Kind', 'Period' and 'Value', ordered by symbol and then rule.
+    """
+    mask = evaluate_mask(features, rules)
+    rows, columns = np.nonzero(mask)
+    if len(rows) == 0:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+    values = np.column_stack([rule.value(features) for rule in rules])
+    return pd.DataFrame({
+        'Symbol': features.index.to_numpy()[rows],
+        'Rule': [rules[c].name for c in columns],
+        'Kind': [rules[c].kind for c in columns],
+        'Period': pd.Series([rules[c].period for c in columns], dtype=object),
+        'Value': values[rows, columns],
+    })
@@ -0,0 +1,234 @@
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class RollingMean:
+    """
+    Rolling mean updated in O(1) per value.
+
+    Mirrors the compensated (Kahan) add/remove summation pandas uses for
+    `Series.rolling(window).mean()`, so the values match
+    `utils.ma.calculate_moving_average` exactly rather than drifting with the
+    usual running-sum rounding error.
+    """
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("Period must be greater than 0")
+        self.period = period
+        self.window = deque()
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.nobs = 0
+        self.neg_ct = 0
+        self.prev_value = np.nan
+        self.same_value_count = 0
+
+    def update(self, value: float) -> float:
+        """
+        Add a value, drop the one that left the window and return the current mean (NaN until the window is full).
+        """
+        self.window.append(value)
+        if len(self.window) > self.period:
+            self._remove(self.window.popleft())
+        self._add(value)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self.window) < self.period or self.nobs == 0:
+            return np.nan
+        if self.same_value_count >= self.nobs:
+            return self.prev_value
+        result = self.sum / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+    def _add(self, value: float) -> None:
+        if value != value:
+            return
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum + y
+        self.compensation_add = t - self.sum - y
+        self.sum = t
+        if value < 0:
+            self.neg_ct += 1
+        if value == self.prev_value:
+            self.same_value_count += 1
+        else:
+            self.same_value_count = 1
+        self.prev_value = value
+
+    def _remove(self, value: float) -> None:
+        if value != value:
+            return
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum + y
+        self.compensation_remove = t - self.sum - y
+        self.sum = t
+        if value < 0:
+            self.neg_ct -= 1
+
+
+class RollingExtreme:
+    """
+    Rolling minimum or maximum over a fixed window, using a monotonic deque.
+
+    Each value is pushed and popped at most once, so updates are amortised O(1).
+    """
+
+    def __init__(self, period: int, mode: str = 'max'):
+        if period <= 0:
+            raise ValueError("Period must be greater than 0")
+        if mode not in ('min', 'max'):
+            raise ValueError("Mode must be 'min' or 'max'")
+        self.period = period
+        self.mode = mode
+        self.count = 0
+        # (position, value) pairs, monotonic in value
+        self.candidates = deque()
+
+    def update(self, value: float) -> float:
+        """
+        Add a value and return the extreme of the last `period` values (NaN until the window is full).
+        """
+        if self.mode == 'max':
+            while self.candidates and self.candidates[-1][1] <= value:
+                self.candidates.pop()
+        else:
+            while self.candidates and self.candidates[-1][1] >= value:
+                self.candidates.pop()
+        self.candidates.append((self.count, value))
+        self.count += 1
+        while self.candidates[0][0] <= self.count - 1 - self.period:
+            self.candidates.popleft()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period:
+            return np.nan
+        return self.candidates[0][1]
+
+
+class WilderRSI:
+    """
+    RSI with Wilder's smoothing, updated in O(1) per closing price.
+
+    Follows `utils.rsi.calculate_rsi_wilders`: the first average gain/loss is the
+    simple mean of the first `period` changes (the first bar counts as no change),
+    then each new change is blended in with alpha = 1 / period, in the same
+    operation order as the batch smoothing kernel.
+    """
+
+    def __init__(self, period: int = 14):
+        if period <= 0:
+            raise ValueError("Period must be greater than 0")
+        self.period = period
+        self.alpha = 1 / period
+        self.decay = 1 - self.alpha
+        self.prev_close: Optional[float] = None
+        self.seed_gain = RollingMean(period)
+        self.seed_loss = RollingMean(period)
+        self.avg_gain = np.nan
+        self.avg_loss = np.nan
+        self.count = 0
+
+    def update(self, close: float) -> float:
+        """
+        Add a closing price and return the current RSI (NaN until `period` prices are seen).
+        """
+        delta = close - self.prev_close if self.prev_close is not None else np.nan
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.prev_close = close
+        self.count += 1
+        if self.count <= self.period:
+            self.avg_gain = self.seed_gain.update(gain)
+            self.avg_loss = self.seed_loss.update(loss)
+        else:
+            self.avg_gain = self.alpha * gain + self.decay * self.avg_gain
+            self.avg_loss = self.alpha * loss + self.decay * self.avg_loss
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period:
+            return np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(self.avg_gain) / np.float64(self.avg_loss)
+            return float(100 - (100 / (1 + rs)))
+
+
+class IndicatorEngine:
+    """
+    Per-symbol indicator state fed one closed candle at a time.
+
+    Produces the same columns `scheduler.job_scheduler.get_price` adds (MA20,
+    MA50, MA200, RSI, Average_Volume_20, Percent_Change) plus the breakout
+    levels MinLow{p}/MaxHigh{p}, taken over the `p` candles before the current one.
+    """
+
+    def __init__(self, ma_periods: Sequence[int] = (20, 50, 200), volume_period: int = 20,
+                 rsi_period: int = 14, extreme_periods: Sequence[int] = (20, 50, 200)):
+        self.ma = {period: RollingMean(period) for period in ma_periods}
+        self.volume_period = volume_period
+        self.volume_ma = RollingMean(volume_period)
+        self.rsi = WilderRSI(rsi_period)
+        self.min_low = {period: RollingExtreme(period, 'min') for period in extreme_periods}
+        self.max_high = {period: RollingExtreme(period, 'max') for period in extreme_periods}
+        self.last_date = None
+        self.last: Dict[str, float] = {}
+
+    def update(self, candle) -> Dict[str, float]:
+        """
+        Feed one closed candle and return the latest indicator values.
+
+        :param candle: Mapping or pd.Series with 'Date', 'Open', 'High', 'Low', 'Close' and 'Volume'.
+        :return: dict - The candle's OHLCV values plus the indicator values.
+        """
+        close = float(candle['Close'])
+        open_ = float(candle['Open'])
+        row = {
+            'Date': candle['Date'],
+            'Open': open_,
+            'High': float(candle['High']),
+            'Low': float(candle['Low']),
+            'Close': close,
+            'Volume': float(candle['Volume']),
+        }
+        for period, mean in self.ma.items():
+            row[f'MA{period}'] = mean.update(close)
+        row['RSI'] = self.rsi.update(close)
+        row[f'Average_Volume_{self.volume_period}'] = self.volume_ma.update(row['Volume'])
+        row['Percent_Change'] = ((close - open_) / open_) * 100
+        for period, extreme in self.min_low.items():
+            row[f'MinLow{period}'] = extreme.value
+            extreme.update(row['Low'])
+        for period, extreme in self.max_high.items():
+            row[f'MaxHigh{period}'] = extreme.value
+            extreme.update(row['High'])
+        self.last_date = candle['Date']
+        self.last = row
+        return row
+
+    def update_frame(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Feed every candle in `df` newer than the last one seen and return the latest values.
+
+        Useful both to warm the engine up from history and to catch up after a fetch.
+        """
+        if self.last_date is not None:
+            df = df[df['Date'] > self.last_date]
+        for candle in df.to_dict('records'):
+            self.update(candle)
+        return self.last
@@ -0,0 +1,204 @@
+import asyncio
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from config.config import (CHART_CACHE_SIZE, CHART_CANDLES, CHART_OVERLAYS, CHART_PROCESSES, LEVEL_PIVOT_INTERVAL,
+                           LEVEL_PIVOTS, MA_PERIODS)
+from data.candle_buffer import CandleBuffer
+from data.timeframes import resample_candles
+from utils.ma import calculate_moving_average
+from utils.pivot import calculate_pivot_levels
+from utils.rsi import calculate_rsi_wilders
+
+OVERLAYS = ('ma', 'rsi', 'pivots')
+MA_COLORS = ('orange', 'royalblue', 'purple')
+# Pivot levels drawn by the 'pivots' overlay
+PIVOT_COLORS = {'S2': 'green', 'S1': 'green', 'P': 'blue', 'R1': 'red', 'R2': 'red'}
+
+
+def _init_worker() -> None:
+    # Render without a display; must run before pyplot is imported, so it is the pool's initializer
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def render_chart(candles: pd.DataFrame, title: str = '', overlays: Sequence[str] = CHART_OVERLAYS,
+                 ma_periods: Sequence[int] = MA_PERIODS, shown: Optional[int] = None) -> bytes:
+    """
+    Draw a candlestick chart with volume and return it as PNG bytes.
+
+    :param candles: pd.DataFrame - Candles in the `PriceChecker.fetch_candles` layout; not modified.
+    :param title: str - Chart title.
+    :param overlays: List[str] - Any of 'ma' (a line per MA period), 'rsi' (Wilder's RSI
+        in its own panel) and 'pivots' (the pivot levels of the previous LEVEL_PIVOT_INTERVAL
+        period in force during each candle, the ones the level-break alerts use).
+    :param ma_periods: List[int] - Periods of the 'ma' overlay; periods longer than the
+        candles are left out.
+    :param shown: int - Draw only the newest `shown` candles; the overlays are still
+        computed over all of them, so long MAs start at the left edge.
+    :return: bytes - The PNG image.
+    """
+    unknown = set(overlays) - set(OVERLAYS)
+    if unknown:
+        raise ValueError(f"Unknown chart overlays: {', '.join(sorted(unknown))}")
+    import mplfinance as mpf
+    from matplotlib import pyplot as plt
+
+    history = candles[['Open', 'High', 'Low', 'Close', 'Volume']].set_index(pd.DatetimeIndex(candles['Date']))
+    frame = history.tail(shown) if shown else history
+    add_plots = []
+    if 'ma' in overlays:
+        for i, period in enumerate(ma_periods):
+            ma = calculate_moving_average(history['Close'], period).loc[frame.index]
+            if ma.notna().any():
+                add_plots.append(mpf.make_addplot(ma, color=MA_COLORS[i % len(MA_COLORS)], width=1,
+                                                  label=f'MA{period}'))
+    if 'pivots' in overlays:
+        periods = resample_candles(candles, LEVEL_PIVOT_INTERVAL)
+        levels = calculate_pivot_levels(periods, LEVEL_PIVOTS or 'classic')
+        if len(periods) > 1 and periods['Date'].iloc[0] < candles['Date'].iloc[0]:
+            # The candles start inside the first period, whose high and low are then partial
+            levels.iloc[1] = np.nan
+        levels = levels.set_index(pd.DatetimeIndex(periods['Date']))
+        # Each candle gets the levels of the period it opened in
+        levels = levels.reindex(frame.index, method='ffill')
+        for level, color in PIVOT_COLORS.items():
+            if levels[level].notna().any():
+                add_plots.append(mpf.make_addplot(levels[level].to_numpy(), color=color, width=1,
+                                                  linestyle='-' if level == 'P' else '--', label=level))
+    panel_ratios = (3, 1)
+    if 'rsi' in overlays:
+        rsi = calculate_rsi_wilders(history['Close']).loc[frame.index]
+        if rsi.notna().any():
+            add_plots.append(mpf.make_addplot(rsi, panel=2, color='purple', width=1, ylabel='RSI', ylim=(0, 100)))
+            panel_ratios = (3, 1, 1)
+    figure, _ = mpf.plot(
+        frame,
+        type='candle',
+        style='charles',
+        addplot=add_plots,
+        title=title,
+        ylabel='Price',
+        volume=True,
+        panel_ratios=panel_ratios,
+        returnfig=True,
+    )
+    image = io.BytesIO()
+    try:
+        figure.savefig(image, format='png')
+    finally:
+        plt.close(figure)
+    return image.getvalue()
+
+
+def chart_key(symbol: str, interval: str, candles: Union[pd.DataFrame, CandleBuffer], overlays: Sequence[str],
+              shown: int) -> Tuple:
+    """
+    Cache key of a chart: what it shows, down to the open time of its last candle.
+    """
+    if isinstance(candles, CandleBuffer):
+        last_open_time = candles.last_open_time()
+        last_open_time = pd.Timestamp(last_open_time, unit='ms') if last_open_time is not None else None
+    else:
+        last_open_time = pd.Timestamp(candles['Date'].iloc[-1]) if len(candles) else None
+    return symbol, interval, last_open_time, min(shown, len(candles)), tuple(sorted(set(overlays)))
+
+
+class ChartRenderer:
+    """
+    Renders alert charts in worker processes, caching the PNGs.
+
+    Charts are cached by `chart_key`, least recently used first out, and a chart
+    requested again while it is still being drawn waits for the same render, so
+    the same chart is never drawn twice. The pool starts on the first render, so
+    creating a renderer costs nothing at start-up, and is started again if a
+    worker dies.
+    """
+
+    def __init__(self, processes: int = CHART_PROCESSES, cache_size: int = CHART_CACHE_SIZE,
+                 overlays: Sequence[str] = CHART_OVERLAYS, candles: int = CHART_CANDLES):
+        """
+        :param overlays: List[str] - Default overlays, see `render_chart`.
+        :param candles: int - Newest candles shown per chart.
+        """
+        if processes <= 0:
+            raise ValueError("Processes must be greater than 0")
+        if cache_size <= 0:
+            raise ValueError("Cache size must be greater than 0")
+        self.processes = processes
+        self.cache_size = cache_size
+        self.overlays = list(overlays)
+        self.candles = candles
+        self.executor = None
+        self._cache: 'OrderedDict[Tuple, Future]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, symbol: str, interval: str, candles: Union[pd.DataFrame, CandleBuffer],
+               overlays: Optional[Sequence[str]] = None) -> Future:
+        """
+        Start rendering a chart, or return the cached or pending render of the same chart.
+
+        :param candles: Closed candles of the symbol; only the newest `candles` are drawn,
+            the older ones feed the overlays.
+        :return: Future - Resolves to the PNG bytes.
+        """
+        overlays = self.overlays if overlays is None else list(overlays)
+        # Keyed on the buffer itself, so a cached chart costs no copy to a DataFrame
+        key = chart_key(symbol, interval, candles, overlays, self.candles)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self._cache.move_to_end(key)
+                return future
+            if isinstance(candles, CandleBuffer):
+                candles = candles.to_frame()
+            future = self._submit_render(candles, f"{symbol} {interval}", overlays)
+            self._cache[key] = future
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        def discard_failed(done: Future) -> None:
+            # A failed render is dropped, so the chart is drawn again on the next request
+            if done.cancelled() or done.exception() is not None:
+                self._discard(key, done)
+
+        future.add_done_callback(discard_failed)
+        return future
+
+    def _submit_render(self, candles: pd.DataFrame, title: str, overlays: Sequence[str]) -> Future:
+        # Called with the lock held
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+        try:
+            return self.executor.submit(render_chart, candles, title, overlays, shown=self.candles)
+        except BrokenProcessPool:
+            # A worker died, e.g. killed for memory, and a broken pool refuses all work; start a new one
+            print("Chart worker pool broke; starting a new one")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+            return self.executor.submit(render_chart, candles, title, overlays, shown=self.candles)
+
+    async def render(self, symbol: str, interval: str, candles: Union[pd.DataFrame, CandleBuffer],
+                     overlays: Optional[Sequence[str]] = None) -> bytes:
+        """
+        Render a chart without blocking the event loop; see `submit`.
+        """
+        # Shielded, so a cancelled caller does not cancel a render other callers share
+        return await asyncio.shield(asyncio.wrap_future(self.submit(symbol, interval, candles, overlays)))
+
+    def _discard(self, key: Tuple, future: Future) -> None:
+        with self._lock:
+            if self._cache.get(key) is future:
+                del self._cache[key]
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None